@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from hotel_backend import idempotencia
+
+
+class Command(BaseCommand):
+    help = 'Borra las claves Idempotency-Key vencidas (IDEMPOTENCY_KEY_TTL)'
+
+    def handle(self, *args, **options):
+        borradas = idempotencia.purgar()
+        self.stdout.write(self.style.SUCCESS(f'{borradas} claves de idempotencia vencidas borradas'))
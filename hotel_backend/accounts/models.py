@@ -70,3 +70,29 @@ class User(AbstractUser):
     def can_manage_inventory(self):
         """Admin y recepcionista pueden gestionar inventario"""
         return self.role in ['super_admin', 'admin', 'receptionist']
+
+
+
+class IdempotencyKey(models.Model):
+    """
+    Respuesta guardada de una petición con encabezado Idempotency-Key
+    (ver hotel_backend/idempotencia.py). Solo la huella de la petición y el
+    cuerpo JSON de la respuesta; se borra al vencer ``expires_at``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, verbose_name='Huella de la petición')
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Clave de idempotencia'
+        verbose_name_plural = 'Claves de idempotencia'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
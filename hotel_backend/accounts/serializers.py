@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from hotel_backend.sparse_fields import SparseFieldsSerializerMixin
 from .models import User
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'phone', 'created_at']
@@ -9,6 +9,8 @@ from django.http import JsonResponse
 from .models import User
 from .serializers import UserSerializer, UserCreateSerializer, LoginSerializer
 from .permissions import IsSuperAdmin, IsAdminOrSuperAdmin, CanManageUsers, CanCreateAdmins
+from hotel_backend.idempotencia import idempotente
+from hotel_backend.mixins import ConditionalGetMixin, SparseFieldsMixin
 try:
     from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
     from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
@@ -17,9 +19,10 @@ except ImportError:  # Paquete no instalado aún
     SIMPLEJWT_AVAILABLE = False
 import os
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    sparse_profiles = {'compacto': ('id', 'username', 'first_name', 'last_name', 'role')}
     permission_classes = [CanManageUsers]
     
     def get_serializer_class(self):
@@ -49,6 +52,10 @@ class UserViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
     
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAdminOrSuperAdmin])
     def by_role(self, request):
         """Obtener usuarios filtrados por rol"""
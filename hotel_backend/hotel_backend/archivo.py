@@ -0,0 +1,75 @@
+"""
+Archivo de filas históricas (tablas "frías").
+
+Las reservaciones cerradas y los movimientos de stock más antiguos que
+``ARCHIVO_HORIZONTE_DIAS`` se mueven a tablas de archivo con las mismas
+columnas y el mismo id (``ReservationArchive``, ``StockMovementArchive``), de
+modo que las tablas activas, sus índices y los listados habituales se quedan
+del tamaño de la operación reciente.
+
+``archivar`` mueve por lotes acotados: cada lote es una transacción que toma
+hasta ``tamano_lote`` filas con ``FOR UPDATE SKIP LOCKED``, las copia al
+archivo y las borra de la tabla activa. Una fila está siempre en exactamente
+una de las dos tablas, y varios procesos pueden archivar a la vez.
+
+Las lecturas unen el archivo solo cuando el rango de fechas pedido lo
+necesita (ver ``ArchiveUnionMixin`` en hotel_backend/mixins.py).
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+TAMANO_LOTE = 1000
+
+
+def horizonte(dias=None):
+    """Fecha de corte: se archiva lo anterior a ella."""
+    if dias is None:
+        dias = settings.ARCHIVO_HORIZONTE_DIAS
+    return timezone.now() - timedelta(days=dias)
+
+
+def _archivar_lote(modelo, modelo_archivo, filtro, tamano_lote):
+    columnas = [campo.attname for campo in modelo._meta.concrete_fields]
+    with transaction.atomic():
+        ids = list(
+            modelo.objects.select_for_update(skip_locked=True)
+            .filter(filtro)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:tamano_lote]
+        )
+        if not ids:
+            return 0
+        ahora = timezone.now()
+        modelo_archivo.objects.bulk_create([
+            modelo_archivo(**fila, archivado_en=ahora)
+            for fila in modelo.objects.filter(pk__in=ids).values(*columnas)
+        ])
+        # delete() y no un DELETE directo: las señales mantienen los índices en memoria
+        modelo.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archivar(modelo, modelo_archivo, filtro, tamano_lote=TAMANO_LOTE, max_segundos=None):
+    """
+    Mueve a ``modelo_archivo`` las filas de ``modelo`` que cumplen ``filtro``
+    (un Q), por lotes de ``tamano_lote``. Con ``max_segundos`` se detiene al
+    agotar ese tiempo (el resto queda para la siguiente ejecución).
+
+    Devuelve {'filas': n, 'lotes': n, 'completo': bool}.
+    """
+    inicio = time.monotonic()
+    resultado = {'filas': 0, 'lotes': 0, 'completo': False}
+    while True:
+        filas = _archivar_lote(modelo, modelo_archivo, filtro, tamano_lote)
+        if not filas:
+            resultado['completo'] = True
+            break
+        resultado['filas'] += filas
+        resultado['lotes'] += 1
+        if max_segundos is not None and time.monotonic() - inicio >= max_segundos:
+            break
+    return resultado
@@ -0,0 +1,25 @@
+"""
+Utilidades compartidas de los comandos que siembran datos para medir o
+verificar (bench_*, verificar_planes, import_rooms --dry-run).
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def transaccion_revertida():
+    """
+    Ejecuta el bloque dentro de una transacción que se revierte al final: lo
+    sembrado no queda en la base. Las excepciones del bloque se propagan.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback()
+    except _Rollback:
+        pass
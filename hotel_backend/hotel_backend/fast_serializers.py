@@ -0,0 +1,95 @@
+"""
+Serializers de solo lectura para los listados más consultados.
+
+Construyen la misma estructura JSON que los ModelSerializer equivalentes, pero
+a partir de filas de ``values()`` y con funciones de formato precompiladas, sin
+instanciar modelos ni recorrer la maquinaria de campos de DRF por cada fila.
+"""
+import decimal
+from operator import itemgetter
+
+from django.utils import timezone
+
+
+def formateador_decimal(decimal_places, max_digits):
+    """
+    Igual que DecimalField.to_representation con COERCE_DECIMAL_TO_STRING.
+    """
+    cuanto = decimal.Decimal('.1') ** decimal_places
+    contexto = decimal.getcontext().copy()
+    contexto.prec = max_digits
+
+    def formatear(valor):
+        if valor is None:
+            return ''
+        if not isinstance(valor, decimal.Decimal):
+            valor = decimal.Decimal(str(valor).strip())
+        return '{:f}'.format(valor.quantize(cuanto, context=contexto))
+    return formatear
+
+
+def formateador_fecha():
+    """
+    Igual que DateTimeField.to_representation con formato ISO 8601 en la zona actual.
+    """
+    zona = timezone.get_current_timezone()
+
+    def formatear(valor):
+        if not valor:
+            return None
+        texto = valor.astimezone(zona).isoformat()
+        if texto.endswith('+00:00'):
+            texto = texto[:-6] + 'Z'
+        return texto
+    return formatear
+
+
+def columna(nombre, formato=None):
+    """
+    Representación de un campo que sale de una sola columna, con formato opcional.
+    """
+    if formato is None:
+        return itemgetter(nombre)
+    return lambda row: formato(row[nombre])
+
+
+class FastReadSerializer:
+    """
+    Base para serializers rápidos de solo lectura.
+
+    Las subclases declaran ``field_columns`` ({campo de salida: columnas de
+    ``values()`` que necesita}) en el mismo orden que el serializer original, e
+    implementan ``representaciones()`` devolviendo {campo: función(fila)}. Con
+    una selección de campos (``?fields=``) solo se leen y calculan esos campos.
+    ``columns`` son columnas que se leen siempre (p. ej. la del cursor).
+    """
+    columns = ()
+    field_columns = {}
+
+    def __init__(self, rows, campos=None):
+        self.rows = rows
+        self.campos = tuple(self.field_columns) if campos is None else campos
+
+    @classmethod
+    def values(cls, queryset, campos=None):
+        columnas = dict.fromkeys(cls.columns)
+        for campo in (cls.field_columns if campos is None else campos):
+            columnas.update(dict.fromkeys(cls.field_columns[campo]))
+        return queryset.values(*columnas)
+
+    def representaciones(self):
+        raise NotImplementedError
+
+    def to_representation(self, row):
+        representaciones = self.representaciones()
+        return {campo: representaciones[campo](row) for campo in self.campos}
+
+    @property
+    def data(self):
+        representaciones = self.representaciones()
+        seleccion = [(campo, representaciones[campo]) for campo in self.campos]
+        rows = self.rows
+        if hasattr(rows, 'iterator'):
+            # Sin caché de resultados: solo se mantiene en memoria la salida
+            rows = rows.iterator(chunk_size=2000)
+        return [{campo: representar(row) for campo, representar in seleccion} for row in rows]
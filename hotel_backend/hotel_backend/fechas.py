@@ -0,0 +1,26 @@
+"""
+Lectura de fechas en parámetros de consulta.
+"""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_fecha(valor):
+    """
+    Convierte un parámetro ISO 8601 (fecha o fecha y hora) en datetime aware,
+    en hora local si no trae zona
+    """
+    if not valor:
+        return None
+    try:
+        fecha = parse_datetime(valor)
+        if fecha is None:
+            dia = parse_date(valor)
+            fecha = datetime.combine(dia, time.min) if dia else None
+    except ValueError:
+        return None
+    if fecha is not None and timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
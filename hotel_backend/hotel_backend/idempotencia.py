@@ -0,0 +1,107 @@
+"""
+Soporte del encabezado ``Idempotency-Key`` en endpoints de escritura.
+
+Las tabletas de recepción reintentan los POST cuando el Wi-Fi falla; con una
+clave de idempotencia el reintento no repite la escritura: devuelve la misma
+respuesta que obtuvo la primera petición.
+
+``@idempotente`` envuelve la acción en una transacción que primero inserta la
+fila (usuario, clave) en ``IdempotencyKey``. La restricción única hace el
+resto: un duplicado concurrente queda bloqueado en su INSERT hasta que la
+primera petición confirma o revierte, sin sondeos:
+
+- si la primera confirmó (respuesta 2xx guardada), el duplicado recibe esa
+  respuesta sin tocar las tablas del dominio;
+- si falló (excepción o respuesta no 2xx) la fila no queda y el reintento se
+  ejecuta como una petición nueva.
+
+La misma clave con otro método, ruta o cuerpo responde 422. Las claves
+vencen a los ``IDEMPOTENCY_KEY_TTL`` segundos: una clave vencida se reutiliza
+al llegar y ``python manage.py purgar_idempotencia`` borra el resto.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from accounts.models import IdempotencyKey
+
+ENCABEZADO = 'Idempotency-Key'
+LARGO_MAXIMO = 255
+
+
+def _huella(request):
+    """sha256 de método, ruta y cuerpo (ya parseado, así el orden de las claves no importa)."""
+    datos = request.data
+    if hasattr(datos, 'lists'):
+        datos = dict(datos.lists())
+    cuerpo = json.dumps(datos, cls=JSONEncoder, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}\n{request.path}\n{cuerpo}'.encode()).hexdigest()
+
+
+def _repetir(registro, huella):
+    if registro.fingerprint != huella:
+        return Response(
+            {'error': f'La clave {ENCABEZADO} ya se usó con una petición distinta'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(json.loads(registro.response_body), status=registro.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotente(metodo):
+    """
+    Decorador para acciones de ViewSet: sin encabezado, en métodos de
+    lectura o con usuario anónimo la acción se ejecuta tal cual.
+    """
+    @wraps(metodo)
+    def envoltura(self, request, *args, **kwargs):
+        clave = request.headers.get(ENCABEZADO)
+        if not clave or request.method in ('GET', 'HEAD', 'OPTIONS') or not request.user.is_authenticated:
+            return metodo(self, request, *args, **kwargs)
+        if len(clave) > LARGO_MAXIMO:
+            return Response(
+                {'error': f'{ENCABEZADO} admite como máximo {LARGO_MAXIMO} caracteres'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        huella = _huella(request)
+        ahora = timezone.now()
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(user=request.user, key=clave, expires_at__lte=ahora).delete()
+            try:
+                # Un duplicado concurrente espera aquí a que la primera petición termine
+                with transaction.atomic():
+                    registro = IdempotencyKey.objects.create(
+                        user=request.user, key=clave, fingerprint=huella,
+                        expires_at=ahora + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+            except IntegrityError:
+                registro = IdempotencyKey.objects.get(user=request.user, key=clave)
+                return _repetir(registro, huella)
+
+            response = metodo(self, request, *args, **kwargs)
+            if 200 <= response.status_code < 300 and isinstance(response, Response):
+                registro.status_code = response.status_code
+                registro.response_body = json.dumps(response.data, cls=JSONEncoder, ensure_ascii=False)
+                registro.save(update_fields=['status_code', 'response_body'])
+            else:
+                # Solo se recuerdan los éxitos: el reintento de un rechazo se evalúa de nuevo
+                registro.delete()
+        return response
+
+    return envoltura
+
+
+def purgar(antes=None):
+    """Borra las claves vencidas y devuelve cuántas."""
+    borradas, _ = IdempotencyKey.objects.filter(expires_at__lte=antes or timezone.now()).delete()
+    return borradas
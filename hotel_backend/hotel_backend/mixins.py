@@ -0,0 +1,302 @@
+"""
+Mixins compartidos por los ViewSets de las distintas apps.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Count, Max, Value
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .fechas import parse_fecha
+from .response_cache import response_cache
+from .sparse_fields import dependencias_sql, resolver_campos
+
+
+class ConditionalGetMixin:
+    """
+    GET condicional (ETag / If-None-Match / Last-Modified) para list y retrieve.
+
+    Antes de serializar calcula un validador barato con una sola consulta de
+    agregación: el número de filas del queryset filtrado y el máximo de cada
+    campo de ``conditional_fields`` (por ejemplo ``updated_at`` del modelo y de
+    las relaciones que se anidan en la respuesta). Si el validador coincide con
+    el del cliente se responde 304 sin tocar el serializer.
+    """
+    conditional_fields = ('updated_at',)
+
+    def _validador(self, queryset):
+        agregados = {f'max_{i}': Max(campo) for i, campo in enumerate(self.conditional_fields)}
+        datos = queryset.order_by().aggregate(total=Count('pk'), **agregados)
+        maximos = [datos[f'max_{i}'] for i in range(len(self.conditional_fields))]
+
+        # La ruta completa incluye filtros, página y parámetros de formato
+        partes = [self.request.get_full_path(), str(self.request.user.pk), str(datos['total'])]
+        partes += [valor.isoformat() if valor else '' for valor in maximos]
+        etag = 'W/"%s"' % hashlib.md5('|'.join(partes).encode()).hexdigest()
+
+        fechas = [valor for valor in maximos if valor]
+        last_modified = int(max(fechas).timestamp()) if fechas else None
+        return datos['total'], etag, last_modified
+
+    def _respuesta_condicional(self, request, etag, last_modified=None):
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        _, etag, _ = self._validador(self.filter_queryset(self.get_queryset()))
+        # En listados no se usa Last-Modified: una baja no mueve el máximo de updated_at
+        response = self._respuesta_condicional(request, etag)
+        if response is not None:
+            return response
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+            total, etag, last_modified = self._validador(queryset)
+        except (TypeError, ValueError, ValidationError):
+            # Como get_object_or_404 de DRF: un valor de búsqueda inválido es un 404
+            raise Http404
+        if total:
+            response = self._respuesta_condicional(request, etag, last_modified)
+            if response is not None:
+                return response
+        response = super().retrieve(request, *args, **kwargs)
+        if total:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class FastListMixin:
+    """
+    Sirve ``list`` con un serializer rápido de solo lectura (ver
+    hotel_backend.fast_serializers) leyendo filas de ``values()``. Si el
+    contexto trae una selección de campos solo se leen sus columnas.
+    """
+    fast_list_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.fast_list_serializer_class
+        campos = self.get_serializer_context().get('campos')
+        queryset = serializer_class.values(self.filter_queryset(self.get_queryset()), campos)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page, campos).data)
+        return Response(serializer_class(queryset, campos).data)
+
+
+class CachedListMixin:
+    """
+    Cachea en memoria los bytes ya renderizados de ``list``.
+
+    La clave es (vista, tipo de contenido, ruta completa con filtros y página,
+    versión de las tablas). Las subclases implementan ``get_cache_version()``
+    con una consulta barata que cambie en cada escritura, de modo que todos los
+    workers dejan de usar sus entradas en cuanto otro proceso confirma un cambio.
+    Debe ir antes de ConditionalGetMixin: en un acierto el ETag guardado se
+    valida sin volver a consultar la base.
+    """
+    response_cache = response_cache
+
+    def get_cache_version(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        clave = (
+            type(self).__name__,
+            request.accepted_media_type,
+            request.get_full_path(),
+            self.get_cache_version(),
+        )
+        entrada = self.response_cache.get(clave)
+        if entrada is None:
+            self._clave_cache = clave
+            return super().list(request, *args, **kwargs)
+
+        contenido, content_type, etag = entrada
+        if etag:
+            no_modificado = get_conditional_response(request, etag=etag)
+            if no_modificado is not None:
+                no_modificado['ETag'] = etag
+                return no_modificado
+        response = HttpResponse(contenido, content_type=content_type)
+        if etag:
+            response['ETag'] = etag
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        clave = getattr(self, '_clave_cache', None)
+        if clave is not None and response.status_code == 200 and isinstance(response, Response):
+            self._clave_cache = None
+            response.render()
+            self.response_cache.set(clave, (response.content, response['Content-Type'], response.get('ETag')))
+        return response
+
+
+class SparseFieldsMixin:
+    """
+    Selección de campos por petición: ``?fields=a,b``, ``?perfil=<nombre>``
+    (conjuntos predefinidos en ``sparse_profiles``) y ``?expand=`` para sumar
+    objetos anidados de ``sparse_expandable`` a la selección.
+
+    Solo aplica a peticiones GET. La selección llega al serializer por el
+    contexto (``campos``) y en list/retrieve recorta la consulta con ``only()``
+    y ``select_related()`` según lo que necesiten los campos pedidos.
+    """
+    sparse_profiles = {}
+    sparse_expandable = ()
+
+    def get_sparse_fields(self):
+        if not hasattr(self, '_campos'):
+            self._campos = None
+            if self.request is not None and self.request.method == 'GET':
+                self._campos = resolver_campos(
+                    self.request.query_params,
+                    self._campos_disponibles(),
+                    self.sparse_profiles,
+                    self.sparse_expandable,
+                )
+        return self._campos
+
+    def _campos_disponibles(self):
+        fast = getattr(self, 'fast_list_serializer_class', None)
+        if self.action == 'list' and fast is not None:
+            return tuple(fast.field_columns)
+        serializer = self.get_serializer_class()()
+        return tuple(nombre for nombre, campo in serializer.fields.items() if not campo.write_only)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['campos'] = self.get_sparse_fields()
+        return context
+
+    def filter_queryset(self, queryset):
+        # Se recorta aquí y no en get_queryset: varios viewsets lo redefinen sin super()
+        queryset = super().filter_queryset(queryset)
+        campos = self.get_sparse_fields()
+        if campos is None or self.action not in ('list', 'retrieve'):
+            return queryset
+        if self.action == 'list' and getattr(self, 'fast_list_serializer_class', None) is not None:
+            # FastListMixin ya lee solo las columnas pedidas con values()
+            return queryset
+
+        dependencias = dependencias_sql(self.get_serializer_class()(), campos)
+        if dependencias is None:
+            return queryset
+        solo, relaciones = dependencias
+        queryset = queryset.select_related(None)
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        return queryset.only(*solo)
+
+
+
+class ArchiveUnionMixin:
+    """
+    Lectura transparente de filas archivadas (ver hotel_backend/archivo.py).
+
+    ``list`` acepta ``?desde=&hasta=`` (ISO 8601) sobre ``archive_date_field``.
+    Solo si el archivo tiene filas en ese rango se pagina sobre la unión de las
+    dos tablas: una consulta UNION ALL de (id, fecha, origen) ordena y cuenta,
+    y después se leen de cada tabla solo las filas de la página. Sin rango, o
+    si el rango no llega al archivo, el listado es el de siempre sobre la tabla
+    activa. ``retrieve`` busca en el archivo cuando el id ya no está en la
+    tabla activa; el archivo es de solo lectura.
+
+    Debe ir antes de ConditionalGetMixin: los listados que unen el archivo no
+    usan su validador.
+    """
+    archive_model = None
+    archive_date_field = 'created_at'
+
+    def get_archive_queryset(self):
+        """Las subclases aplican aquí los mismos filtros que en get_queryset."""
+        return self.archive_model.objects.all()
+
+    def _rango_archivo(self):
+        rango = {}
+        for parametro, lookup in (('desde', 'gte'), ('hasta', 'lt')):
+            valor = self.request.query_params.get(parametro)
+            if not valor:
+                continue
+            fecha = parse_fecha(valor)
+            if fecha is None:
+                return None, f'El parámetro {parametro} debe ser una fecha ISO 8601 válida'
+            rango[f'{self.archive_date_field}__{lookup}'] = fecha
+        return rango, None
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        rango = getattr(self, '_rango', None)
+        if rango and self.action == 'list':
+            queryset = queryset.filter(**rango)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        rango, error = self._rango_archivo()
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        self._rango = rango
+        archivadas = self.get_archive_queryset().filter(**rango) if rango else None
+        if archivadas is None or not archivadas.exists():
+            return super().list(request, *args, **kwargs)
+
+        activas = self.filter_queryset(self.get_queryset())
+        campo = self.archive_date_field
+        claves = (
+            activas.order_by().values_list('pk', campo, Value(False, output_field=BooleanField()))
+            .union(
+                archivadas.order_by().values_list('pk', campo, Value(True, output_field=BooleanField())),
+                all=True,
+            )
+            .order_by(f'-{campo}', '-pk')
+        )
+        page = self.paginate_queryset(claves)
+        filas = list(claves) if page is None else page
+
+        ids = {False: [], True: []}
+        for pk, _, archivada in filas:
+            ids[bool(archivada)].append(pk)
+        instancias = {False: activas.in_bulk(ids[False]), True: archivadas.in_bulk(ids[True])}
+        objetos = [
+            instancias[bool(archivada)][pk] for pk, _, archivada in filas
+            if pk in instancias[bool(archivada)]
+        ]
+        serializer = self.get_serializer(objetos, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def get_archived_object(self):
+        """Como get_object(), pero en el archivo (404 si tampoco está ahí)."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instancia = get_object_or_404(
+            self.get_archive_queryset(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, instancia)
+        return instancia
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            return Response(self.get_serializer(self.get_archived_object()).data)
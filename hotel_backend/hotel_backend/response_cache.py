@@ -0,0 +1,69 @@
+"""
+Caché en memoria (por proceso) de respuestas ya renderizadas.
+
+Las claves incluyen la versión de las tablas de las que depende la respuesta,
+así que una escritura en cualquier worker deja obsoletas las entradas de todos
+los procesos sin necesidad de avisarles; las entradas viejas salen por LRU.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class ResponseCache:
+    """
+    LRU acotado de respuestas renderizadas con métricas de aciertos, fallos y desalojos.
+    """
+
+    def __init__(self, max_entradas=None):
+        self._max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    @property
+    def max_entradas(self):
+        if self._max_entradas is not None:
+            return self._max_entradas
+        return getattr(settings, 'RESPONSE_CACHE_MAX_ENTRIES', 256)
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def set(self, clave, entrada):
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def metricas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'bytes': sum(len(entrada[0]) for entrada in self._entradas.values()),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else None,
+            }
+
+
+response_cache = ResponseCache()
@@ -127,6 +127,15 @@ else:
         }
     }
 
+# Los tests con varios hilos (rooms/tests.py) necesitan una base de pruebas en archivo:
+# la base en memoria compartida de SQLite falla con "table is locked" en vez de esperar
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['TEST'] = {'NAME': str(BASE_DIR / 'test_db.sqlite3')}
+    # Sin restricción de exclusión, reservations/booking.py lee y luego inserta: con BEGIN
+    # IMMEDIATE la transacción toma el bloqueo de escritura al empezar y las demás esperan
+    # en lugar de fallar con "database is locked" al querer escribir después de leer
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -237,3 +246,26 @@ CSRF_EXEMPT_URLS = [
 
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
+
+# Stream de eventos de habitaciones (/api/rooms/eventos/). Requiere servir la app por ASGI (bajo WSGI
+# responde 503); Procfile y render.yaml arrancan:
+#   gunicorn hotel_backend.asgi:application -k uvicorn.workers.UvicornWorker
+ROOM_EVENTS_POLL_INTERVAL = config('ROOM_EVENTS_POLL_INTERVAL', default=1.0, cast=float)
+# Segundos que cada sondeo relee hacia atrás para ver escrituras confirmadas tarde (ver rooms/events.py)
+ROOM_EVENTS_OVERLAP = config('ROOM_EVENTS_OVERLAP', default=5.0, cast=float)
+
+# Caché en memoria de listados de habitaciones y tipos (entradas por worker; ver hotel_backend/response_cache.py)
+RESPONSE_CACHE_MAX_ENTRIES = config('RESPONSE_CACHE_MAX_ENTRIES', default=256, cast=int)
+
+# Segundos que vale la instantánea del dashboard para escrituras hechas por otros workers
+# (las del propio worker la recalculan al confirmarse; ver rooms/dashboard.py)
+DASHBOARD_SNAPSHOT_TTL = config('DASHBOARD_SNAPSHOT_TTL', default=10.0, cast=float)
+
+# Días que las reservaciones cerradas y los movimientos de stock se quedan en las tablas activas
+# antes de pasar al archivo (python manage.py archivar_historicos; ver hotel_backend/archivo.py)
+ARCHIVO_HORIZONTE_DIAS = config('ARCHIVO_HORIZONTE_DIAS', default=180, cast=int)
+
+# Segundos que se recuerda la respuesta de una petición con Idempotency-Key
+# (python manage.py purgar_idempotencia borra las vencidas; ver hotel_backend/idempotencia.py)
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+
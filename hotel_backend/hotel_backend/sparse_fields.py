@@ -0,0 +1,127 @@
+"""
+Selección de campos en las respuestas (``?fields=``, ``?expand=``, ``?perfil=``).
+
+El viewset (ver SparseFieldsMixin en hotel_backend.mixins) resuelve la lista de
+campos pedidos y la deja en el contexto del serializer como ``campos``. Los
+serializers con SparseFieldsSerializerMixin solo construyen esos campos, y
+``dependencias_sql`` traduce la selección a rutas para ``only()`` y
+``select_related()``.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+
+
+def _lista(valor):
+    return [nombre.strip() for nombre in (valor or '').split(',') if nombre.strip()]
+
+
+def resolver_campos(query_params, disponibles, perfiles=None, expandibles=()):
+    """
+    Devuelve la tupla ordenada de campos pedidos, o None si se piden todos.
+
+    ``?fields=`` y ``?perfil=`` fijan la selección base; ``?expand=`` agrega
+    campos de ``expandibles`` (objetos anidados) a esa selección. Lanza
+    ValidationError si se nombra un campo o perfil desconocido.
+    """
+    perfiles = perfiles or {}
+    fields = _lista(query_params.get('fields'))
+    expand = _lista(query_params.get('expand'))
+    perfil = query_params.get('perfil')
+
+    errores = {}
+    if perfil and perfil not in perfiles:
+        errores['perfil'] = [f"Perfil desconocido. Opciones: {', '.join(sorted(perfiles)) or 'ninguna'}"]
+    desconocidos = [nombre for nombre in fields if nombre not in disponibles]
+    if desconocidos:
+        errores['fields'] = [f"Campos desconocidos: {', '.join(desconocidos)}"]
+    no_expandibles = [nombre for nombre in expand if nombre not in expandibles]
+    if no_expandibles:
+        errores['expand'] = [
+            f"No se pueden expandir: {', '.join(no_expandibles)}. Opciones: {', '.join(expandibles) or 'ninguna'}"
+        ]
+    if errores:
+        raise serializers.ValidationError(errores)
+
+    if not fields and not perfil:
+        return None
+    pedidos = set(fields) | set(perfiles.get(perfil, ())) | set(expand)
+    # Se respeta el orden declarado en el serializer
+    return tuple(nombre for nombre in disponibles if nombre in pedidos)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Limita los campos del serializer raíz a ``context['campos']``.
+
+    ``sparse_dependencies`` declara las columnas que necesitan los campos que no
+    salen directamente de una columna (propiedades, métodos, displays); un campo
+    sin dependencia conocida desactiva el recorte de la consulta.
+    """
+    sparse_dependencies = {}
+
+    def _es_raiz(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        campos = self.context.get('campos')
+        if campos is None or not self._es_raiz():
+            return fields
+        return {nombre: campo for nombre, campo in fields.items() if nombre in campos}
+
+
+def _columna(modelo, nombre):
+    try:
+        campo = modelo._meta.get_field(nombre)
+    except FieldDoesNotExist:
+        return None
+    if not campo.concrete or campo.many_to_many:
+        return None
+    return campo
+
+
+def dependencias_sql(serializer, campos=None, prefijo=''):
+    """
+    Rutas para ``only()`` y ``select_related()`` que cubren ``campos`` del
+    serializer (todos si es None), recorriendo los serializers anidados.
+    Devuelve (only, select_related) o None si algún campo no se puede resolver.
+    """
+    modelo = serializer.Meta.model
+    dependencias = getattr(serializer, 'sparse_dependencies', {})
+    solo = {prefijo + modelo._meta.pk.name}
+    relaciones = set()
+
+    for nombre, campo in serializer.fields.items():
+        if campo.write_only or (campos is not None and nombre not in campos):
+            continue
+        if nombre in dependencias:
+            for ruta in dependencias[nombre]:
+                solo.add(prefijo + ruta)
+                partes = ruta.split('__')[:-1]
+                for i in range(1, len(partes) + 1):
+                    relacion = prefijo + '__'.join(partes[:i])
+                    relaciones.add(relacion)
+                    solo.add(relacion)
+            continue
+        if campo.source == '*' or len(campo.source_attrs) != 1:
+            return None
+
+        if _columna(modelo, campo.source) is None or isinstance(campo, serializers.ListSerializer):
+            return None
+        if isinstance(campo, serializers.ModelSerializer):
+            anidado = dependencias_sql(campo, prefijo=f'{prefijo}{campo.source}__')
+            if anidado is None:
+                return None
+            relaciones.add(prefijo + campo.source)
+            solo.add(prefijo + campo.source)
+            solo |= anidado[0]
+            relaciones |= anidado[1]
+        elif isinstance(campo, RelatedField) and not isinstance(campo, PrimaryKeyRelatedField):
+            # Representación del objeto relacionado completo (p. ej. StringRelatedField)
+            relaciones.add(prefijo + campo.source)
+            solo.add(prefijo + campo.source)
+        else:
+            solo.add(prefijo + campo.source)
+    return solo, relaciones
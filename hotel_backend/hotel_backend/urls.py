@@ -55,6 +55,7 @@ urlpatterns = [
     path('api/accounts/', include('accounts.urls')),
     path('api/rooms/', include('rooms.urls')),
     path('api/inventory/', include('inventory.urls')),
+    path('api/reservations/', include('reservations.urls')),
     
     # Dominios nuevos
     path('api/domains/users/', include('users.urls')),
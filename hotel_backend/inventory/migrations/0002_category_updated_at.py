@@ -0,0 +1,20 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Fecha de actualización'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_category_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('current_stock__lte', models.F('minimum_stock'))), fields=['name'], name='product_low_stock_name'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', '-created_at'], name='stockmov_product_created'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['-created_at'], name='stockmov_created_desc'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_product_stockmovement_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovementArchive',
+            fields=[
+                ('movement_type', models.CharField(choices=[('in', 'Entrada'), ('out', 'Salida'), ('adjustment', 'Ajuste')], max_length=20, verbose_name='Tipo de movimiento')),
+                ('quantity', models.IntegerField(verbose_name='Cantidad')),
+                ('previous_stock', models.IntegerField(verbose_name='Stock anterior')),
+                ('new_stock', models.IntegerField(verbose_name='Stock nuevo')),
+                ('reason', models.CharField(blank=True, max_length=100, null=True, verbose_name='Motivo')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('archivado_en', models.DateTimeField(verbose_name='Fecha de archivo')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock archivado',
+                'verbose_name_plural': 'Movimientos de Stock archivados',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['product', '-created_at'], name='stockmov_arch_product_created'), models.Index(fields=['-created_at'], name='stockmov_arch_created')],
+            },
+        ),
+    ]
@@ -25,6 +25,10 @@ class Category(models.Model):
         auto_now_add=True,
         verbose_name='Fecha de creación'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de actualización'
+    )
     
     class Meta:
         verbose_name = 'Categoría'
@@ -79,6 +83,14 @@ class Product(models.Model):
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['name']
+        indexes = [
+            # Índice parcial: solo los productos con stock bajo, en el orden del listado
+            models.Index(
+                fields=['name'],
+                condition=models.Q(current_stock__lte=models.F('minimum_stock')),
+                name='product_low_stock_name',
+            ),
+        ]
         
     def __str__(self):
         return self.name
@@ -96,9 +108,9 @@ class Product(models.Model):
         else:
             return 'in_stock'
 
-class StockMovement(models.Model):
+class StockMovementBase(models.Model):
     """
-    Modelo para movimientos de inventario
+    Campos comunes de los movimientos activos y los archivados
     """
     MOVEMENT_TYPES = [
         ('in', 'Entrada'),
@@ -142,9 +154,47 @@ class StockMovement(models.Model):
     )
     
     class Meta:
-        verbose_name = 'Movimiento de Stock'
-        verbose_name_plural = 'Movimientos de Stock'
-        ordering = ['-created_at']
+        abstract = True
         
     def __str__(self):
         return f"{self.product.name} - {self.get_movement_type_display()} - {self.quantity}"
+
+class StockMovement(StockMovementBase):
+    """
+    Modelo para movimientos de inventario
+    """
+    
+    class Meta:
+        verbose_name = 'Movimiento de Stock'
+        verbose_name_plural = 'Movimientos de Stock'
+        ordering = ['-created_at']
+        indexes = [
+            # Movimientos de un producto, más recientes primero
+            models.Index(fields=['product', '-created_at'], name='stockmov_product_created'),
+            models.Index(fields=['-created_at'], name='stockmov_created_desc'),
+        ]
+
+class StockMovementArchive(StockMovementBase):
+    """
+    Movimientos de stock antiguos movidos fuera de la tabla activa
+    (ver hotel_backend/archivo.py). Conservan su id original.
+    """
+    id = models.BigIntegerField(
+        primary_key=True
+    )
+    # Se copia tal cual: sin auto_now_add
+    created_at = models.DateTimeField(
+        verbose_name='Fecha de creación'
+    )
+    archivado_en = models.DateTimeField(
+        verbose_name='Fecha de archivo'
+    )
+    
+    class Meta:
+        verbose_name = 'Movimiento de Stock archivado'
+        verbose_name_plural = 'Movimientos de Stock archivados'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', '-created_at'], name='stockmov_arch_product_created'),
+            models.Index(fields=['-created_at'], name='stockmov_arch_created'),
+        ]
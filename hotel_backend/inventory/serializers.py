@@ -1,17 +1,24 @@
 from rest_framework import serializers
+from hotel_backend.fast_serializers import FastReadSerializer, columna, formateador_decimal, formateador_fecha
+from hotel_backend.sparse_fields import SparseFieldsSerializerMixin
 from .models import Product, Category, StockMovement
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'icon', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     category_detail = CategorySerializer(source='category', read_only=True)
     stock_status = serializers.CharField(read_only=True)
     is_low_stock = serializers.BooleanField(read_only=True)
     
+    sparse_dependencies = {
+        'stock_status': ('current_stock', 'minimum_stock'),
+        'is_low_stock': ('current_stock', 'minimum_stock'),
+    }
+    
     class Meta:
         model = Product
         fields = [
@@ -21,11 +28,67 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-class StockMovementSerializer(serializers.ModelSerializer):
+class ProductFastSerializer(FastReadSerializer):
+    """
+    Versión rápida de solo lectura de ProductSerializer para listados (mismo JSON)
+    """
+    field_columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'category': ('category',),
+        'category_detail': (
+            'category', 'category__name', 'category__description', 'category__icon', 'category__created_at',
+        ),
+        'price': ('price',),
+        'current_stock': ('current_stock',),
+        'minimum_stock': ('minimum_stock',),
+        'description': ('description',),
+        'stock_status': ('current_stock', 'minimum_stock'),
+        'is_low_stock': ('current_stock', 'minimum_stock'),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',),
+    }
+    
+    def representaciones(self):
+        fecha = formateador_fecha()
+        
+        def stock_status(row):
+            if row['current_stock'] == 0:
+                return 'out_of_stock'
+            elif row['current_stock'] <= row['minimum_stock']:
+                return 'low_stock'
+            return 'in_stock'
+        
+        return {
+            'id': columna('id'),
+            'name': columna('name'),
+            'category': columna('category'),
+            'category_detail': lambda row: {
+                'id': row['category'],
+                'name': row['category__name'],
+                'description': row['category__description'],
+                'icon': row['category__icon'],
+                'created_at': fecha(row['category__created_at']),
+            },
+            'price': columna('price', formateador_decimal(2, 10)),
+            'current_stock': columna('current_stock'),
+            'minimum_stock': columna('minimum_stock'),
+            'description': columna('description'),
+            'stock_status': stock_status,
+            'is_low_stock': lambda row: row['current_stock'] <= row['minimum_stock'],
+            'created_at': columna('created_at', fecha),
+            'updated_at': columna('updated_at', fecha),
+        }
+
+class StockMovementSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     product_detail = ProductSerializer(source='product', read_only=True)
     created_by_detail = serializers.StringRelatedField(source='created_by', read_only=True)
     movement_type_display = serializers.CharField(source='get_movement_type_display', read_only=True)
     
+    sparse_dependencies = {
+        'movement_type_display': ('movement_type',),
+    }
+    
     class Meta:
         model = StockMovement
         fields = [
@@ -2,20 +2,27 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, F
-from .models import Product, Category, StockMovement
+from hotel_backend.idempotencia import idempotente
+from hotel_backend.mixins import ArchiveUnionMixin, ConditionalGetMixin, FastListMixin, SparseFieldsMixin
+from .models import Product, Category, StockMovement, StockMovementArchive
 from .serializers import (
     ProductSerializer, CategorySerializer, StockMovementSerializer,
-    StockAdjustmentSerializer
+    StockAdjustmentSerializer, ProductFastSerializer
 )
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    sparse_profiles = {'compacto': ('id', 'name', 'icon')}
     permission_classes = [permissions.IsAuthenticated]
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Product.objects.select_related('category').all()
     serializer_class = ProductSerializer
+    fast_list_serializer_class = ProductFastSerializer
+    sparse_profiles = {'compacto': ('id', 'name', 'category', 'price', 'current_stock', 'stock_status')}
+    sparse_expandable = ('category_detail',)
+    conditional_fields = ('updated_at', 'category__updated_at')
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -38,6 +45,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         return queryset
     
     @action(detail=True, methods=['post'])
+    @idempotente
     def adjust_stock(self, request, pk=None):
         """
         Endpoint para ajustar el stock de un producto
@@ -99,13 +107,24 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(low_stock_products, many=True)
         return Response(serializer.data)
 
-class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
+class StockMovementViewSet(ArchiveUnionMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Movimientos de stock. Con ?desde=&hasta= el listado incluye los archivados.
+    """
     queryset = StockMovement.objects.select_related('product', 'created_by').all()
+    archive_model = StockMovementArchive
     serializer_class = StockMovementSerializer
+    sparse_profiles = {'compacto': ('id', 'product', 'movement_type', 'quantity', 'new_stock', 'created_at')}
+    sparse_expandable = ('product_detail', 'created_by_detail')
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        return self._filtrar(super().get_queryset())
+    
+    def get_archive_queryset(self):
+        return self._filtrar(StockMovementArchive.objects.select_related('product', 'created_by'))
+    
+    def _filtrar(self, queryset):
         product = self.request.query_params.get('product', None)
         
         if product:
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from hotel_backend import archivo
+from inventory.models import StockMovement, StockMovementArchive
+from reservations.models import Reservation, ReservationArchive
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve a las tablas de archivo las reservaciones completadas o canceladas y los movimientos '
+        'de stock más antiguos que el horizonte, por lotes. Idempotente; usar desde cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Horizonte en días (por defecto ARCHIVO_HORIZONTE_DIAS)')
+        parser.add_argument('--lote', type=int, default=archivo.TAMANO_LOTE, help='Filas por transacción')
+        parser.add_argument('--max-segundos', type=float, default=None,
+                            help='Tiempo máximo por tabla; lo pendiente queda para la siguiente ejecución')
+        parser.add_argument('--solo', choices=['reservaciones', 'movimientos'], default=None)
+
+    def handle(self, *args, **options):
+        corte = archivo.horizonte(options['dias'])
+        tablas = [
+            # Por check_out: una reservación se archiva cuando la estancia terminó hace más del horizonte
+            ('reservaciones', Reservation, ReservationArchive,
+             Q(status__in=['completed', 'cancelled'], check_out__lt=corte)),
+            ('movimientos', StockMovement, StockMovementArchive, Q(created_at__lt=corte)),
+        ]
+        self.stdout.write(f'Archivando lo anterior a {corte:%Y-%m-%d %H:%M}')
+        for nombre, modelo, modelo_archivo, filtro in tablas:
+            if options['solo'] and options['solo'] != nombre:
+                continue
+            t0 = time.perf_counter()
+            resultado = archivo.archivar(
+                modelo, modelo_archivo, filtro,
+                tamano_lote=options['lote'], max_segundos=options['max_segundos'],
+            )
+            pendiente = '' if resultado['completo'] else ' (quedan filas para la siguiente ejecución)'
+            self.stdout.write(
+                f'{nombre}: {resultado["filas"]} archivadas en {resultado["lotes"]} lotes '
+                f'({time.perf_counter() - t0:.2f}s); activas={modelo.objects.count()} '
+                f'archivo={modelo_archivo.objects.count()}{pendiente}'
+            )
@@ -0,0 +1,164 @@
+import random
+import statistics
+import time
+import warnings
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from hotel_backend.bench import transaccion_revertida
+from reports import metricas
+from reservations.models import Reservation
+from rooms.models import Room, RoomType
+
+User = get_user_model()
+
+ESTADOS = ['active', 'completed', 'completed', 'completed', 'cancelled']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara las métricas del reporte diario (agregación en la base) con el cálculo anterior '
+        '(recorrer las reservaciones en Python) sobre datos de volumen y mide ambos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservaciones', type=int, default=1000000)
+        parser.add_argument('--habitaciones', type=int, default=2000)
+        parser.add_argument('--dias', type=int, default=30, help='Días de muestra a comparar')
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['semilla'])
+        fallos = []
+        with transaccion_revertida():
+            fallos = self._ejecutar(options)
+        if fallos:
+            raise CommandError('; '.join(fallos))
+
+    def _sembrar(self, options):
+        usuario = User.objects.create_user(username='bench_reporte_diario', password='x')
+        tipo = RoomType.objects.create(nombre='Bench reporte diario', precio_base=Decimal('40000'))
+        Room.objects.bulk_create([
+            Room(numero=f'BR{i}', tipo_habitacion=tipo,
+                 estado=random.choice(['disponible', 'ocupada', 'limpieza', 'mantenimiento']))
+            for i in range(options['habitaciones'])
+        ], batch_size=5000)
+        room_ids = list(Room.objects.filter(tipo_habitacion=tipo).values_list('id', flat=True))
+
+        # Ventanas consecutivas por habitación: en PostgreSQL rige la exclusión de solapamientos
+        ahora = timezone.now()
+        por_habitacion = max(1, options['reservaciones'] // len(room_ids))
+        lote = []
+        for room_id in room_ids:
+            check_in = ahora - timedelta(days=365)
+            for _ in range(por_habitacion):
+                check_out = check_in + timedelta(hours=random.randint(1, 12))
+                lote.append(Reservation(
+                    room_id=room_id, created_by=usuario, guest_name='Huésped',
+                    check_in=check_in, check_out=check_out, total_amount=Decimal('40000'),
+                    paid_amount=Decimal(random.randint(0, 4000000)) / 100, status=random.choice(ESTADOS),
+                ))
+                check_in = check_out + timedelta(minutes=random.randint(0, 120))
+                if len(lote) >= 10000:
+                    Reservation.objects.bulk_create(lote)
+                    lote = []
+        Reservation.objects.bulk_create(lote)
+
+        tabla = connection.ops.quote_name(Reservation._meta.db_table)
+        # created_at es auto_now_add: se reparte de forma pareja en el año, así cada día
+        # local tiene filas justo antes y justo después de medianoche
+        total = len(room_ids) * por_habitacion
+        paso = max(1, 365 * 24 * 3600 // total)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"UPDATE {tabla} SET created_at = %s - (id %% %s) * %s * interval '1 second'",
+                    [ahora, total, paso],
+                )
+            else:
+                cursor.execute(
+                    f"UPDATE {tabla} SET created_at = datetime(%s, '-' || ((id %% %s) * %s) || ' seconds')",
+                    [connection.ops.adapt_datetimefield_value(ahora), total, paso],
+                )
+            # Sin archivar: el cálculo anterior solo lee la tabla activa (la suma del
+            # archivo la cubre reports/tests.py)
+            cursor.execute(f'ANALYZE {tabla}' if connection.vendor == 'postgresql' else 'ANALYZE')
+
+    def _conteo_en_python(self):
+        """
+        Referencia para las habitaciones: el código anterior filtraba por un campo
+        inexistente (Room.status), así que se compara contra un conteo en Python.
+        """
+        conteos = Counter(Room.objects.values_list('estado', flat=True))
+        total = sum(conteos.values())
+        return {
+            'total_rooms': total,
+            'occupied_rooms': conteos['ocupada'],
+            'available_rooms': conteos['disponible'],
+            'cleaning_rooms': conteos['limpieza'],
+            'occupancy_rate': metricas.tasa_ocupacion(conteos['ocupada'], total),
+        }
+
+    def _anterior_reservaciones(self, fecha):
+        """Cálculo anterior, tal cual: recorre las reservaciones del día en Python y vuelve a contarlas."""
+        day_start = timezone.datetime.combine(fecha, timezone.datetime.min.time())
+        day_end = timezone.datetime.combine(fecha, timezone.datetime.max.time())
+
+        with warnings.catch_warnings():
+            # Límites ingenuos: Django los interpreta en TIME_ZONE y avisa con RuntimeWarning
+            warnings.simplefilter('ignore', RuntimeWarning)
+            daily_reservations = Reservation.objects.filter(
+                created_at__range=[day_start, day_end],
+                status__in=['active', 'completed']
+            )
+            total_revenue = sum(r.paid_amount for r in daily_reservations)
+            total_reservations = daily_reservations.count()
+        return {'total_revenue': total_revenue, 'total_reservations': total_reservations}
+
+    def _medir(self, funcion, *args):
+        t0 = time.perf_counter()
+        resultado = funcion(*args)
+        return resultado, time.perf_counter() - t0
+
+    def _ejecutar(self, options):
+        t0 = time.perf_counter()
+        self._sembrar(options)
+        self.stdout.write(f'Datos: {Reservation.objects.count()} reservaciones ({time.perf_counter() - t0:.1f}s)')
+        hoy = timezone.localdate()
+        # Hoy y días al azar del año sembrado
+        fechas = [hoy] + [
+            hoy - timedelta(days=dias) for dias in random.sample(range(1, 365), max(0, options['dias'] - 1))
+        ]
+
+        fallos = []
+        tiempos_anterior, tiempos_nuevo = [], []
+        esperado = self._conteo_en_python()
+        obtenido = metricas.metricas_habitaciones()
+        if obtenido != esperado:
+            fallos.append(f'habitaciones: {obtenido} != {esperado}')
+
+        for fecha in fechas:
+            esperado, duracion = self._medir(self._anterior_reservaciones, fecha)
+            tiempos_anterior.append(duracion)
+            obtenido, duracion = self._medir(metricas.metricas_reservaciones, fecha)
+            tiempos_nuevo.append(duracion)
+            if obtenido != esperado:
+                fallos.append(f'{fecha}: {obtenido} != {esperado}')
+                self.stdout.write(self.style.ERROR(f'Métricas distintas el {fecha}: {obtenido} != {esperado}'))
+
+        anterior = statistics.median(tiempos_anterior) * 1000
+        nuevo = statistics.median(tiempos_nuevo) * 1000
+        self.stdout.write(f'Cálculo anterior (bucle en Python): mediana {anterior:.2f}ms por día')
+        self.stdout.write(
+            f'Agregación en la base ({connection.vendor}): mediana {nuevo:.2f}ms por día '
+            f'({anterior / nuevo:.0f}x)'
+        )
+        if not fallos:
+            self.stdout.write(self.style.SUCCESS(f'✓ Métricas idénticas en {len(fechas)} días'))
+        return fallos
@@ -0,0 +1,199 @@
+import random
+import re
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from hotel_backend.bench import transaccion_revertida
+from inventory.models import Category, Product, StockMovement
+from reports import metricas
+from reservations.models import Reservation
+from rooms.models import Room, RoomType
+
+User = get_user_model()
+
+# Proporción de estados de la tabla activa: lo completado viejo se va al archivo y
+# lo que queda es sobre todo cancelado, así que status__in('active', 'completed')
+# es selectivo y el reporte diario debe ir por (status, created_at)
+PESOS_ESTADO = {'active': 1, 'completed': 1, 'cancelled': 18}
+
+
+def sembrar(reservaciones, movimientos, productos):
+    """Datos de volumen para los EXPLAIN; devuelve (ahora, room_ids, product_ids)."""
+    usuario = User.objects.create_user(username='verificar_planes', password='x')
+    tipo = RoomType.objects.create(nombre='Verificar planes', precio_base=Decimal('40000'))
+    Room.objects.bulk_create([Room(numero=f'VP{i}', tipo_habitacion=tipo) for i in range(200)])
+    room_ids = list(Room.objects.filter(tipo_habitacion=tipo).values_list('id', flat=True))
+
+    ahora = timezone.now()
+    estados, pesos = zip(*PESOS_ESTADO.items())
+    # Ventanas consecutivas por habitación: en PostgreSQL rige la exclusión de solapamientos
+    por_habitacion = max(1, reservaciones // len(room_ids))
+    lote = []
+    for room_id in room_ids:
+        check_in = ahora - timedelta(days=365)
+        for _ in range(por_habitacion):
+            check_out = check_in + timedelta(hours=random.randint(1, 12))
+            lote.append(Reservation(
+                room_id=room_id, created_by=usuario, guest_name='Huésped',
+                check_in=check_in, check_out=check_out,
+                total_amount=Decimal('40000'), status=random.choices(estados, pesos)[0],
+            ))
+            check_in = check_out + timedelta(minutes=random.randint(0, 120))
+            if len(lote) >= 10000:
+                Reservation.objects.bulk_create(lote)
+                lote = []
+    Reservation.objects.bulk_create(lote)
+    # created_at es auto_now_add: se reparte en el año para que el rango del día sea selectivo
+    _repartir_created_at(Reservation, ahora, len(room_ids) * por_habitacion)
+
+    categoria = Category.objects.create(name='Verificar planes')
+    # ~1% de productos con stock bajo
+    Product.objects.bulk_create([
+        Product(
+            name=f'Producto {i:06d}', category=categoria, price=Decimal('1000'),
+            current_stock=random.randint(0, 4) if random.random() < 0.01 else random.randint(10, 500),
+            minimum_stock=5,
+        )
+        for i in range(productos)
+    ], batch_size=5000)
+    product_ids = list(Product.objects.filter(category=categoria).values_list('id', flat=True))
+
+    lote = []
+    for i in range(movimientos):
+        lote.append(StockMovement(
+            product_id=random.choice(product_ids), movement_type='in', quantity=1,
+            previous_stock=0, new_stock=1, created_by=usuario,
+        ))
+        if len(lote) >= 10000:
+            StockMovement.objects.bulk_create(lote)
+            lote = []
+    StockMovement.objects.bulk_create(lote)
+    _repartir_created_at(StockMovement, ahora, movimientos)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for modelo in (Reservation, Product, StockMovement):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(modelo._meta.db_table)}')
+        else:
+            cursor.execute('ANALYZE')
+    return ahora, room_ids, product_ids
+
+
+def _repartir_created_at(modelo, ahora, total):
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    paso = max(1, 365 * 24 * 3600 // max(1, total))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"UPDATE {tabla} SET created_at = %s - (id %% %s) * %s * interval '1 second'",
+                [ahora, total, paso],
+            )
+        else:
+            cursor.execute(
+                f"UPDATE {tabla} SET created_at = datetime(%s, '-' || ((id %% %s) * %s) || ' seconds')",
+                [connection.ops.adapt_datetimefield_value(ahora), total, paso],
+            )
+
+
+def consultas(ahora, room_ids, product_ids):
+    """[(nombre, queryset, índices aceptados)] de las consultas frecuentes."""
+    inicio, fin = metricas.limites_dia(timezone.localdate(ahora) - timedelta(days=30))
+    room_id = room_ids[0]
+    return [
+        (
+            'reporte diario (status__in + rango de created_at)',
+            # Lo que lee metricas.metricas_reservaciones (la agregación no ordena)
+            Reservation.objects.filter(
+                status__in=metricas.ESTADOS_INGRESO, created_at__gte=inicio, created_at__lt=fin
+            ).order_by().values('paid_amount'),
+            ('reservation_status_created',),
+        ),
+        (
+            'reservaciones de una habitación por horario',
+            Reservation.objects.filter(
+                room_id=room_id, check_in__lt=ahora, check_out__gt=ahora - timedelta(days=2)
+            ).order_by('check_in'),
+            # En PostgreSQL la exclusión GiST también cubre (room_id, rango)
+            ('reservation_room_check_in', 'reservation_room_no_overlap'),
+        ),
+        (
+            'barrido de reservaciones vencidas (índice parcial de activas)',
+            Reservation.objects.filter(status='active', check_out__lte=ahora).order_by('check_out')[:500],
+            ('reservation_active_check_out',),
+        ),
+        (
+            'listado de reservaciones (-created_at)',
+            Reservation.objects.all()[:50],
+            ('reservation_created_desc',),
+        ),
+        (
+            'movimientos de un producto (-created_at)',
+            StockMovement.objects.filter(product_id=product_ids[0])[:50],
+            ('stockmov_product_created',),
+        ),
+        (
+            'listado de movimientos (-created_at)',
+            StockMovement.objects.all()[:50],
+            ('stockmov_created_desc',),
+        ),
+        (
+            'productos con stock bajo',
+            Product.objects.filter(current_stock__lte=F('minimum_stock')),
+            ('product_low_stock_name',),
+        ),
+    ]
+
+
+def indices_usados(plan, indices):
+    """Los ``indices`` que aparecen en el texto de ``plan``."""
+    return [indice for indice in indices if re.search(rf'\b{indice}\b', plan)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra datos de volumen, ejecuta EXPLAIN sobre las consultas frecuentes de '
+        'reservaciones, movimientos de stock y productos y falla si alguna no usa su índice'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservaciones', type=int, default=200000)
+        parser.add_argument('--movimientos', type=int, default=200000)
+        parser.add_argument('--productos', type=int, default=20000)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--mostrar-planes', action='store_true')
+
+    def handle(self, *args, **options):
+        random.seed(options['semilla'])
+        fallos = []
+        with transaccion_revertida():
+            fallos = self._ejecutar(options)
+        if fallos:
+            raise CommandError(f'{len(fallos)} consultas sin el índice esperado: {", ".join(fallos)}')
+
+    def _ejecutar(self, options):
+        t0 = time.perf_counter()
+        datos = sembrar(options['reservaciones'], options['movimientos'], options['productos'])
+        self.stdout.write(
+            f'Datos: {options["reservaciones"]} reservaciones, {options["productos"]} productos, '
+            f'{options["movimientos"]} movimientos ({time.perf_counter() - t0:.1f}s)'
+        )
+        fallos = []
+        for nombre, queryset, indices in consultas(*datos):
+            plan = queryset.explain()
+            usados = indices_usados(plan, indices)
+            if options['mostrar_planes']:
+                self.stdout.write(plan)
+            if usados:
+                self.stdout.write(self.style.SUCCESS(f'✓ {nombre}: {usados[0]}'))
+            else:
+                fallos.append(nombre)
+                self.stdout.write(self.style.ERROR(f'✗ {nombre}: no usa {" / ".join(indices)}'))
+                self.stdout.write(plan)
+        return fallos
@@ -0,0 +1,199 @@
+"""
+Métricas del reporte diario calculadas en la base de datos.
+
+Los días son días locales (``TIME_ZONE``, America/Mexico_City): los límites
+se construyen como datetimes conscientes de la zona y el rango es semiabierto
+[inicio, fin), así que no depende de microsegundos ni de cambios de horario.
+
+Cada tabla se resume en una sola consulta de agregación (``Sum``/``Count``
+con conteos condicionales): nada se recorre en Python. El reporte de un día
+son tres consultas: habitaciones, reservaciones activas y archivadas. Las reservaciones salen del
+índice (status, created_at), uno en la tabla activa y otro en el archivo (ver
+hotel_backend/archivo.py); en PostgreSQL cubre también paid_amount.
+
+Para rangos de días (``reportes_por_dia``, usado por backfill_daily_reports)
+las mismas métricas se agrupan por día local en SQL (``TruncDate`` en la zona
+actual). Los estados de habitación de días pasados se reconstruyen desde el
+historial de estados: al conteo actual se le restan, día por día hacia atrás,
+los cambios registrados (``estado_anterior`` → ``estado_nuevo``) y las
+habitaciones creadas ese día (con su estado inicial). Antes del primer registro
+del historial no hay de dónde reconstruirlos y esas columnas quedan vacías.
+``total_rooms`` sale de ``Room.created_at``; las habitaciones ya borradas no
+dejan rastro y no cuentan en ningún día.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from reservations.models import Reservation, ReservationArchive
+from rooms.models import Room, RoomStatusHistory
+
+# Reservaciones que cuentan como ingreso del día
+ESTADOS_INGRESO = ('active', 'completed')
+
+# Estado de habitación de cada columna del reporte
+COLUMNAS_ESTADO = (
+    ('occupied_rooms', 'ocupada'),
+    ('available_rooms', 'disponible'),
+    ('cleaning_rooms', 'limpieza'),
+)
+
+
+def limites_dia(fecha):
+    """[inicio, fin) del día local ``fecha`` como datetimes conscientes."""
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def metricas_habitaciones():
+    """Conteos por estado y tasa de ocupación en una consulta."""
+    metricas = Room.objects.aggregate(
+        total_rooms=Count('pk'),
+        **{columna: Count('pk', filter=Q(estado=estado)) for columna, estado in COLUMNAS_ESTADO},
+    )
+    metricas['occupancy_rate'] = tasa_ocupacion(metricas['occupied_rooms'], metricas['total_rooms'])
+    return metricas
+
+
+def tasa_ocupacion(ocupadas, total):
+    if not total:
+        return Decimal('0.00')
+    return (Decimal(ocupadas * 100) / total).quantize(Decimal('0.01'))
+
+
+def metricas_reservaciones(fecha):
+    """Ingresos y número de reservaciones creadas el día local ``fecha``."""
+    inicio, fin = limites_dia(fecha)
+    metricas = {'total_revenue': Decimal('0'), 'total_reservations': 0}
+    # Las reservaciones de días antiguos pueden estar ya en el archivo
+    for modelo in (Reservation, ReservationArchive):
+        fila = modelo.objects.filter(
+            status__in=ESTADOS_INGRESO, created_at__gte=inicio, created_at__lt=fin
+        ).aggregate(
+            total_revenue=Sum('paid_amount', default=Decimal('0')),
+            total_reservations=Count('pk'),
+        )
+        metricas['total_revenue'] += fila['total_revenue']
+        metricas['total_reservations'] += fila['total_reservations']
+    # SQLite suma los decimales como REAL: se redondea a los centavos de paid_amount
+    metricas['total_revenue'] = metricas['total_revenue'].quantize(Decimal('0.01'))
+    return metricas
+
+
+def _ingresos_por_dia(inicio, fin):
+    por_dia = {}
+    for modelo in (Reservation, ReservationArchive):
+        filas = (
+            modelo.objects
+            .filter(status__in=ESTADOS_INGRESO, created_at__gte=inicio, created_at__lt=fin)
+            .values(dia=TruncDate('created_at'))
+            .annotate(total_revenue=Sum('paid_amount'), total_reservations=Count('pk'))
+            .order_by()
+        )
+        for fila in filas:
+            ingresos, reservaciones = por_dia.get(fila['dia'], (Decimal('0'), 0))
+            por_dia[fila['dia']] = (ingresos + fila['total_revenue'], reservaciones + fila['total_reservations'])
+    return por_dia
+
+
+def _cambios_de_estado(historial):
+    """{estado: cambio neto} de un queryset del historial (agrupado por el llamador)."""
+    netos = Counter()
+    for fila in historial:
+        netos[fila['estado_nuevo']] += fila['cambios']
+        netos[fila['estado_anterior']] -= fila['cambios']
+    return netos
+
+
+def _creadas_por_dia(inicio):
+    """{fecha de creación: Counter de estados iniciales} de las habitaciones creadas desde ``inicio``."""
+    # Estado inicial: el anterior del primer cambio registrado, o el actual si nunca cambió
+    primer_cambio = (
+        RoomStatusHistory.objects.filter(room=OuterRef('pk'))
+        .order_by('fecha_registro', 'id').values('estado_anterior')[:1]
+    )
+    filas = (
+        Room.objects.filter(created_at__gte=inicio)
+        .values(dia=TruncDate('created_at'), estado_inicial=Coalesce(Subquery(primer_cambio), 'estado'))
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    creadas = {}
+    for fila in filas:
+        creadas.setdefault(fila['dia'], Counter())[fila['estado_inicial']] += fila['n']
+    return creadas
+
+
+def _estados_por_dia(desde, hasta, fin):
+    """
+    {fecha: (total de habitaciones, Counter de estados al cierre del día o None)}
+    para las habitaciones actuales; None en los días anteriores al historial.
+    """
+    historial = RoomStatusHistory.objects.filter(room__isnull=False).order_by()
+    agrupado = ('estado_anterior', 'estado_nuevo')
+    primer_registro = RoomStatusHistory.objects.aggregate(primero=Min('fecha_registro'))['primero']
+    cubierto_desde = timezone.localdate(primer_registro) if primer_registro else None
+
+    estados = Counter(dict(Room.objects.values_list('estado').annotate(n=Count('pk')).order_by()))
+    # Cierre de ``hasta``: el estado actual sin los cambios posteriores ni las habitaciones creadas después
+    posteriores = historial.filter(fecha_registro__gte=fin).values(*agrupado).annotate(cambios=Count('pk'))
+    estados.subtract(_cambios_de_estado(posteriores))
+    creadas = _creadas_por_dia(limites_dia(desde)[0])
+    for fecha, iniciales in creadas.items():
+        if fecha > hasta:
+            estados.subtract(iniciales)
+
+    por_dia = {}
+    filas = (
+        historial.filter(fecha_registro__gte=limites_dia(desde)[0], fecha_registro__lt=fin)
+        .values(*agrupado, dia=TruncDate('fecha_registro'))
+        .annotate(cambios=Count('pk'))
+    )
+    for fila in filas:
+        por_dia.setdefault(fila['dia'], []).append(fila)
+
+    cierres = {}
+    fecha = hasta
+    while fecha >= desde:
+        cubierto = cubierto_desde is not None and fecha >= cubierto_desde
+        cierres[fecha] = (sum(estados.values()), estados.copy() if cubierto else None)
+        # Cierre del día anterior: se deshacen los cambios de este día y se quitan
+        # las habitaciones creadas en él
+        estados.subtract(_cambios_de_estado(por_dia.get(fecha, ())))
+        estados.subtract(creadas.get(fecha, Counter()))
+        fecha -= timedelta(days=1)
+    return cierres
+
+
+def reportes_por_dia(desde, hasta):
+    """
+    Métricas de cada día local de ``desde`` a ``hasta`` (inclusive), con una
+    consulta agrupada por métrica. Devuelve [(fecha, {campo: valor})] en orden.
+    """
+    inicio, _ = limites_dia(desde)
+    _, fin = limites_dia(hasta)
+    ingresos = _ingresos_por_dia(inicio, fin)
+    estados = _estados_por_dia(desde, hasta, fin)
+
+    reportes = []
+    fecha = desde
+    while fecha <= hasta:
+        total_revenue, total_reservations = ingresos.get(fecha, (Decimal('0'), 0))
+        total_rooms, cierre = estados[fecha]
+        metricas = {
+            'total_rooms': total_rooms,
+            **{columna: cierre[estado] if cierre is not None else None for columna, estado in COLUMNAS_ESTADO},
+            'total_revenue': total_revenue.quantize(Decimal('0.01')),
+            'total_reservations': total_reservations,
+        }
+        metricas['occupancy_rate'] = (
+            tasa_ocupacion(metricas['occupied_rooms'], total_rooms) if cierre is not None else None
+        )
+        reportes.append((fecha, metricas))
+        fecha += timedelta(days=1)
+    return reportes
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:34
+
+from django.db import migrations, models
+
+
+# NULL en los conteos por estado y la ocupación significa "sin datos" (días
+# anteriores al historial de estados, ver backfill_daily_reports); las filas
+# existentes conservan sus valores
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyreport',
+            name='available_rooms',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Habitaciones disponibles'),
+        ),
+        migrations.AlterField(
+            model_name='dailyreport',
+            name='cleaning_rooms',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Habitaciones en limpieza'),
+        ),
+        migrations.AlterField(
+            model_name='dailyreport',
+            name='occupancy_rate',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Tasa de ocupación (%)'),
+        ),
+        migrations.AlterField(
+            model_name='dailyreport',
+            name='occupied_rooms',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Habitaciones ocupadas'),
+        ),
+    ]
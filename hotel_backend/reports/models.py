@@ -1,9 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-from reservations.models import Reservation
-from rooms.models import Room
-from inventory.models import Product
+
+from . import metricas
 
 class DailyReport(models.Model):
     """
@@ -16,13 +15,23 @@ class DailyReport(models.Model):
     total_rooms = models.IntegerField(
         verbose_name='Total de habitaciones'
     )
+    # Los conteos por estado y la ocupación quedan vacíos (NULL: sin datos, no
+    # cero) en los reportes reconstruidos de días anteriores al historial de
+    # estados (backfill_daily_reports). generate_daily_report siempre los llena.
+    # Quien los lea debe distinguir None de 0 (p. ej. al promediar la ocupación)
     occupied_rooms = models.IntegerField(
+        null=True,
+        blank=True,
         verbose_name='Habitaciones ocupadas'
     )
     available_rooms = models.IntegerField(
+        null=True,
+        blank=True,
         verbose_name='Habitaciones disponibles'
     )
     cleaning_rooms = models.IntegerField(
+        null=True,
+        blank=True,
         verbose_name='Habitaciones en limpieza'
     )
     total_revenue = models.DecimalField(
@@ -36,6 +45,8 @@ class DailyReport(models.Model):
     occupancy_rate = models.DecimalField(
         max_digits=5,
         decimal_places=2,
+        null=True,
+        blank=True,
         verbose_name='Tasa de ocupación (%)'
     )
     created_by = models.ForeignKey(
@@ -59,43 +70,23 @@ class DailyReport(models.Model):
     @classmethod
     def generate_daily_report(cls, date=None, user=None):
         """
-        Genera un reporte diario automáticamente
+        Genera un reporte diario automáticamente.
+
+        Las métricas salen de tres consultas de agregación (ver
+        reports/metricas.py): una sobre habitaciones y una por tabla de
+        reservaciones (activa y archivo). No se juntan en una sola: son tablas
+        distintas y unirlas con subconsultas o UNION impediría que cada suma
+        salga de su propio índice (status, created_at).
         """
         if date is None:
-            date = timezone.now().date()
-        
-        # Obtener estadísticas de habitaciones
-        total_rooms = Room.objects.count()
-        occupied_rooms = Room.objects.filter(status='occupied').count()
-        available_rooms = Room.objects.filter(status='available').count()
-        cleaning_rooms = Room.objects.filter(status='cleaning').count()
-        
-        # Calcular tasa de ocupación
-        occupancy_rate = (occupied_rooms / total_rooms * 100) if total_rooms > 0 else 0
-        
-        # Calcular ingresos del día
-        day_start = timezone.datetime.combine(date, timezone.datetime.min.time())
-        day_end = timezone.datetime.combine(date, timezone.datetime.max.time())
-        
-        daily_reservations = Reservation.objects.filter(
-            created_at__range=[day_start, day_end],
-            status__in=['active', 'completed']
-        )
-        
-        total_revenue = sum(r.paid_amount for r in daily_reservations)
-        total_reservations = daily_reservations.count()
+            date = timezone.localdate()
         
         # Crear o actualizar el reporte
         report, created = cls.objects.update_or_create(
             date=date,
             defaults={
-                'total_rooms': total_rooms,
-                'occupied_rooms': occupied_rooms,
-                'available_rooms': available_rooms,
-                'cleaning_rooms': cleaning_rooms,
-                'total_revenue': total_revenue,
-                'total_reservations': total_reservations,
-                'occupancy_rate': occupancy_rate,
+                **metricas.metricas_habitaciones(),
+                **metricas.metricas_reservaciones(date),
                 'created_by': user,
             }
         )
@@ -1,3 +1,204 @@
+import random
+import warnings
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.core.exceptions import FieldError
+from django.db.models import Q
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from hotel_backend import archivo
+from reports import metricas
+from reports.management.commands import verificar_planes
+from reports.models import DailyReport
+from reservations.models import Reservation, ReservationArchive
+from rooms.models import Room, RoomStatusHistory, RoomType
+
+LOCAL = ZoneInfo('America/Mexico_City')
+DIA = date(2026, 3, 10)
+
+
+def loop_original(fecha):
+    """
+    Cálculo de ingresos de DailyReport.generate_daily_report antes de la
+    reescritura, tal cual: límites ingenuos y suma en Python sobre Reservation.
+    """
+    day_start = timezone.datetime.combine(fecha, timezone.datetime.min.time())
+    day_end = timezone.datetime.combine(fecha, timezone.datetime.max.time())
+
+    with warnings.catch_warnings():
+        # Los datetimes ingenuos se interpretan en TIME_ZONE (con RuntimeWarning)
+        warnings.simplefilter('ignore', RuntimeWarning)
+        daily_reservations = Reservation.objects.filter(
+            created_at__range=[day_start, day_end],
+            status__in=['active', 'completed']
+        )
+        total_revenue = sum(r.paid_amount for r in daily_reservations)
+        total_reservations = daily_reservations.count()
+    return {'total_revenue': total_revenue, 'total_reservations': total_reservations}
+
+
+class ReporteDiarioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='reportes', password='x')
+        tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        cls.rooms = [
+            Room.objects.create(numero=str(100 + i), tipo_habitacion=tipo, estado=estado)
+            for i, estado in enumerate(['ocupada', 'ocupada', 'disponible', 'limpieza', 'mantenimiento'])
+        ]
+        medianoche = datetime.combine(DIA, time.min, tzinfo=LOCAL)
+        # (hora de creación, estado, pagado): filas a ambos lados de la medianoche local, y
+        # una a las 20:00 locales (02:00 UTC del día siguiente)
+        filas = [
+            (medianoche - timedelta(microseconds=1), 'completed', '1000.10'),
+            (medianoche, 'completed', '2000.20'),
+            (medianoche + timedelta(hours=12), 'active', '3000.30'),
+            (medianoche + timedelta(hours=12, minutes=5), 'cancelled', '9999.99'),
+            (medianoche + timedelta(hours=20), 'completed', '4000.40'),
+            (medianoche + timedelta(days=1) - timedelta(microseconds=1), 'active', '5000.50'),
+            (medianoche + timedelta(days=1), 'completed', '6000.60'),
+        ]
+        for i, (creada, estado, pagado) in enumerate(filas):
+            reserva = Reservation.objects.create(
+                room=cls.rooms[i % len(cls.rooms)], created_by=cls.usuario, guest_name=f'Huésped {i}',
+                check_in=creada, check_out=creada + timedelta(minutes=30),
+                total_amount=Decimal('10000'), paid_amount=Decimal(pagado), status=estado,
+            )
+            # created_at es auto_now_add
+            Reservation.objects.filter(pk=reserva.pk).update(created_at=creada)
+
+    def test_ingresos_iguales_al_loop_original(self):
+        for fecha in (DIA - timedelta(days=1), DIA, DIA + timedelta(days=1), DIA + timedelta(days=2)):
+            with self.subTest(fecha=fecha):
+                self.assertEqual(metricas.metricas_reservaciones(fecha), loop_original(fecha))
+        self.assertEqual(
+            metricas.metricas_reservaciones(DIA),
+            {'total_revenue': Decimal('14001.40'), 'total_reservations': 4},
+        )
+
+    def test_incluye_reservaciones_archivadas(self):
+        # Diferencia intencional: el loop original solo leía la tabla activa
+        antes = loop_original(DIA)
+        archivo.archivar(Reservation, ReservationArchive, Q(status='completed'))
+        self.assertTrue(ReservationArchive.objects.exists())
+
+        self.assertEqual(metricas.metricas_reservaciones(DIA), antes)
+        self.assertEqual(loop_original(DIA), {'total_revenue': Decimal('8000.80'), 'total_reservations': 2})
+
+    def test_conteos_por_estado_real_de_habitacion(self):
+        # Diferencia intencional: el código original filtraba por Room.status, que no existe
+        with self.assertRaises(FieldError):
+            Room.objects.filter(status='occupied').count()
+
+        self.assertEqual(metricas.metricas_habitaciones(), {
+            'total_rooms': 5,
+            'occupied_rooms': 2,
+            'available_rooms': 1,
+            'cleaning_rooms': 1,
+            'occupancy_rate': Decimal('40.00'),
+        })
+
+    def test_generar_siempre_llena_los_conteos(self):
+        # Sin historial de estados el backfill deja NULL; el reporte del día usa el estado actual
+        self.assertFalse(RoomStatusHistory.objects.exists())
+        reporte = DailyReport.generate_daily_report(DIA, self.usuario)
+
+        self.assertEqual(
+            (reporte.occupied_rooms, reporte.available_rooms, reporte.cleaning_rooms, reporte.occupancy_rate),
+            (2, 1, 1, Decimal('40.00')),
+        )
+
+    def test_una_agregacion_por_tabla(self):
+        with self.assertNumQueries(1):
+            metricas.metricas_habitaciones()
+        with self.assertNumQueries(2):
+            metricas.metricas_reservaciones(DIA)
+
+    def test_fecha_por_defecto_es_el_dia_local(self):
+        # Diferencia intencional: el original usaba la fecha UTC (timezone.now().date()).
+        # 01:00 UTC del 11 de marzo son las 19:00 del 10 en Ciudad de México
+        ahora = datetime(2026, 3, 11, 1, 0, tzinfo=ZoneInfo('UTC'))
+        with mock.patch('django.utils.timezone.now', return_value=ahora):
+            reporte = DailyReport.generate_daily_report(user=self.usuario)
+
+        self.assertEqual(reporte.date, DIA)
+        self.assertEqual(reporte.total_revenue, Decimal('14001.40'))
+        self.assertEqual(reporte.total_reservations, 4)
+        self.assertEqual(reporte.occupied_rooms, 2)
+        self.assertEqual(reporte.occupancy_rate, Decimal('40.00'))
+
+
+
+class ReportesPorDiaTests(TestCase):
+    """Reconstrucción de los estados de habitación de días pasados (backfill_daily_reports)."""
+
+    def setUp(self):
+        tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.tipo = tipo
+
+    def _habitacion(self, numero, estado, creada):
+        room = Room.objects.create(numero=numero, tipo_habitacion=self.tipo, estado=estado)
+        # created_at es auto_now_add
+        Room.objects.filter(pk=room.pk).update(created_at=creada)
+        return room
+
+    def _cambio(self, room, anterior, nuevo, fecha):
+        RoomStatusHistory.objects.create(
+            room=room, numero=room.numero, estado_anterior=anterior, estado_nuevo=nuevo,
+            registrado_por='recepcion', fecha_registro=fecha,
+        )
+
+    def test_altas_y_cobertura_del_historial(self):
+        mediodia = datetime.combine(DIA, time(12), tzinfo=LOCAL)
+        antigua = self._habitacion('101', 'ocupada', mediodia - timedelta(days=10))
+        self._cambio(antigua, 'disponible', 'ocupada', mediodia + timedelta(days=1))
+        # Creada el día 2 en limpieza, disponible desde el día 3
+        nueva = self._habitacion('102', 'disponible', mediodia + timedelta(days=2))
+        self._cambio(nueva, 'limpieza', 'disponible', mediodia + timedelta(days=3))
+        # Creada después del rango
+        self._habitacion('103', 'mantenimiento', mediodia + timedelta(days=5))
+
+        reportes = dict(metricas.reportes_por_dia(DIA - timedelta(days=1), DIA + timedelta(days=4)))
+        columnas = ('total_rooms', 'occupied_rooms', 'available_rooms', 'cleaning_rooms', 'occupancy_rate')
+        obtenido = {
+            (fecha - DIA).days: tuple(valores[columna] for columna in columnas)
+            for fecha, valores in reportes.items()
+        }
+        self.assertEqual(obtenido, {
+            # Antes del primer registro del historial no se inventan estados
+            -1: (1, None, None, None, None),
+            0: (1, None, None, None, None),
+            1: (1, 1, 0, 0, Decimal('100.00')),
+            2: (2, 1, 0, 1, Decimal('50.00')),
+            3: (2, 1, 1, 0, Decimal('50.00')),
+            4: (2, 1, 1, 0, Decimal('50.00')),
+        })
+
+
+class PlanesDeConsultaTests(TestCase):
+    """EXPLAIN de las consultas frecuentes sobre datos sembrados: cada una usa su índice."""
+
+    @classmethod
+    def setUpTestData(cls):
+        random.seed(42)
+        cls.datos = verificar_planes.sembrar(reservaciones=20000, movimientos=5000, productos=2000)
+
+    def test_consultas_usan_su_indice(self):
+        for nombre, queryset, indices in verificar_planes.consultas(*self.datos):
+            with self.subTest(nombre):
+                plan = queryset.explain()
+                self.assertTrue(verificar_planes.indices_usados(plan, indices), plan)
 
-# Create your tests here.
+    def test_reporte_diario_usa_el_indice_compuesto(self):
+        # Con pocos estados distintos el rango sobre created_at solo también sería
+        # plausible: la proporción de canceladas hace que el compuesto sea el mejor
+        _, queryset, _ = verificar_planes.consultas(*self.datos)[0]
+        plan = queryset.explain()
+        self.assertIn('reservation_status_created', plan)
+        self.assertNotIn('reservation_created_desc', plan)
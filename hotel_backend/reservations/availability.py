@@ -0,0 +1,214 @@
+"""
+Índice de disponibilidad de habitaciones por intervalos de tiempo.
+
+Por cada habitación se mantienen sus reservaciones activas ordenadas por
+check-in junto con el máximo check-out acumulado, de modo que saber si una
+habitación está libre en una ventana [desde, hasta) es una búsqueda binaria
+en memoria en lugar de una consulta de solapamiento sobre toda la tabla.
+
+El índice se construye de forma perezosa en la primera consulta, se actualiza
+incrementalmente con las señales de Reservation y, antes de responder, aplica
+los cambios hechos por otros procesos leyendo solo las filas con
+``updated_at`` reciente. ``updated_at`` se fija al guardar y no al confirmar,
+así que una transacción lenta de otro proceso puede confirmar detrás de la
+marca ya vista: cada sincronización relee desde la marca menos
+``AVAILABILITY_INDEX_OVERLAP`` segundos (``registrar`` es idempotente).
+
+Los borrados no dejan fila que releer. Los del propio proceso llegan por la
+señal post_delete; los de otros procesos (borrar una reservación activa o su
+habitación) se aplican en la siguiente reconstrucción completa, así que la
+habitación puede figurar ocupada hasta ``AVAILABILITY_INDEX_TTL`` segundos
+(300 por defecto) de más: el índice nunca ofrece una habitación reservada.
+El archivo histórico (archivar_historicos) solo mueve reservaciones
+completadas o canceladas, que no están en el índice.
+"""
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSEGUNDO = timedelta(microseconds=1)
+
+
+def _a_entero(valor):
+    """Convierte un datetime aware a microsegundos desde epoch (entero exacto)."""
+    return (valor - _EPOCH) // _MICROSEGUNDO
+
+
+class _IntervalosHabitacion:
+    """
+    Reservaciones de una habitación ordenadas por (inicio, id).
+
+    ``max_fin[i]`` es el mayor check-out entre las entradas ``0..i``, lo que
+    permite detectar solapamientos aunque existan reservaciones encimadas.
+    """
+    __slots__ = ('claves', 'fines', 'max_fin')
+
+    def __init__(self):
+        self.claves = []
+        self.fines = []
+        self.max_fin = []
+
+    def _recalcular_desde(self, pos):
+        acumulado = self.max_fin[pos - 1] if pos > 0 else None
+        for i in range(pos, len(self.fines)):
+            fin = self.fines[i]
+            acumulado = fin if acumulado is None or fin > acumulado else acumulado
+            self.max_fin[i] = acumulado
+
+    def agregar(self, inicio, fin, reserva_id):
+        clave = (inicio, reserva_id)
+        pos = bisect_left(self.claves, clave)
+        self.claves.insert(pos, clave)
+        self.fines.insert(pos, fin)
+        self.max_fin.insert(pos, fin)
+        self._recalcular_desde(pos)
+
+    def quitar(self, inicio, reserva_id):
+        clave = (inicio, reserva_id)
+        pos = bisect_left(self.claves, clave)
+        if pos < len(self.claves) and self.claves[pos] == clave:
+            del self.claves[pos]
+            del self.fines[pos]
+            del self.max_fin[pos]
+            self._recalcular_desde(pos)
+
+    def esta_libre(self, desde, hasta):
+        # Entradas con inicio < hasta; basta con que alguna termine después de desde
+        pos = bisect_left(self.claves, (hasta,))
+        return pos == 0 or self.max_fin[pos - 1] <= desde
+
+
+class AvailabilityIndex:
+    """
+    Índice en memoria (uno por proceso) de reservaciones activas por habitación.
+    """
+    ESTADOS_INDEXADOS = ('active',)
+
+    def __init__(self, ttl=None):
+        self._lock = threading.RLock()
+        self._habitaciones = {}
+        self._reservas = {}
+        self._marca = None
+        self._construido_en = None
+        self._ttl = ttl
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'AVAILABILITY_INDEX_TTL', 300)
+
+    @property
+    def margen(self):
+        return timedelta(seconds=getattr(settings, 'AVAILABILITY_INDEX_OVERLAP', 5.0))
+
+    @property
+    def construido(self):
+        return self._construido_en is not None
+
+    def _insertar(self, habitaciones, reservas, reserva_id, room_id, inicio, fin):
+        intervalos = habitaciones.get(room_id)
+        if intervalos is None:
+            intervalos = habitaciones[room_id] = _IntervalosHabitacion()
+        intervalos.agregar(inicio, fin, reserva_id)
+        reservas[reserva_id] = (room_id, inicio)
+
+    def _retirar(self, reserva_id):
+        anterior = self._reservas.pop(reserva_id, None)
+        if anterior is not None:
+            room_id, inicio = anterior
+            self._habitaciones[room_id].quitar(inicio, reserva_id)
+
+    def reconstruir(self):
+        """
+        Reconstruye el índice completo desde la base de datos.
+        """
+        from .models import Reservation
+
+        habitaciones = {}
+        reservas = {}
+        marca = None
+        filas = (
+            Reservation.objects
+            .filter(status__in=self.ESTADOS_INDEXADOS)
+            .order_by()
+            .values_list('id', 'room_id', 'check_in', 'check_out', 'updated_at')
+            .iterator(chunk_size=10000)
+        )
+        for reserva_id, room_id, check_in, check_out, updated_at in filas:
+            self._insertar(habitaciones, reservas, reserva_id, room_id,
+                           _a_entero(check_in), _a_entero(check_out))
+            if marca is None or updated_at > marca:
+                marca = updated_at
+
+        # Las reservaciones no activas no están en el índice pero sí mueven la marca
+        ultima = Reservation.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+        if ultima is not None and (marca is None or ultima > marca):
+            marca = ultima
+
+        with self._lock:
+            self._habitaciones = habitaciones
+            self._reservas = reservas
+            self._marca = marca
+            self._construido_en = time.monotonic()
+
+    def registrar(self, reserva_id, room_id, check_in, check_out, status, updated_at=None):
+        """
+        Inserta, mueve o retira una reservación según su estado actual.
+        """
+        with self._lock:
+            self._retirar(reserva_id)
+            if status in self.ESTADOS_INDEXADOS:
+                self._insertar(self._habitaciones, self._reservas, reserva_id, room_id,
+                               _a_entero(check_in), _a_entero(check_out))
+            if updated_at is not None and (self._marca is None or updated_at > self._marca):
+                self._marca = updated_at
+
+    def eliminar(self, reserva_id):
+        with self._lock:
+            self._retirar(reserva_id)
+
+    def sincronizar(self):
+        """
+        Aplica los cambios hechos desde la última marca (incluidos otros procesos),
+        releyendo la ventana de solapamiento anterior a ella.
+
+        Las eliminaciones físicas hechas en otros procesos se recogen en la
+        siguiente reconstrucción completa, al vencer ``AVAILABILITY_INDEX_TTL``.
+        """
+        from .models import Reservation
+
+        if not self.construido or time.monotonic() - self._construido_en > self.ttl:
+            self.reconstruir()
+            return
+
+        if self._marca is None:
+            cambios = Reservation.objects.all()
+        else:
+            # Escrituras confirmadas tarde con updated_at anterior a la marca; registrar es idempotente
+            cambios = Reservation.objects.filter(updated_at__gte=self._marca - self.margen)
+        for fila in cambios.order_by().values_list('id', 'room_id', 'check_in', 'check_out', 'status', 'updated_at'):
+            self.registrar(*fila)
+
+    def habitaciones_libres(self, room_ids, desde, hasta):
+        """
+        Filtra ``room_ids`` dejando las habitaciones sin reservaciones activas
+        que se solapen con la ventana [desde, hasta).
+        """
+        inicio = _a_entero(desde)
+        fin = _a_entero(hasta)
+        with self._lock:
+            habitaciones = self._habitaciones
+            libres = []
+            for room_id in room_ids:
+                intervalos = habitaciones.get(room_id)
+                if intervalos is None or intervalos.esta_libre(inicio, fin):
+                    libres.append(room_id)
+        return libres
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,113 @@
+"""
+Alta y edición de reservaciones sin solapamientos por habitación.
+
+En PostgreSQL la garantía la da la base: la migración 0003 agrega una
+restricción de exclusión GiST sobre (room_id, tstzrange(check_in, check_out))
+para las reservaciones no canceladas, así que dos transacciones concurrentes
+sobre la misma habitación no pueden confirmar ventanas encimadas y las de
+habitaciones distintas no se bloquean entre sí. La violación llega como
+IntegrityError y se traduce a ``ReservaSolapada`` (409).
+
+En otros motores (SQLite en desarrollo) no existe la restricción: se bloquea
+la fila de la habitación y se busca el solapamiento con una consulta antes de
+guardar.
+"""
+from django.db import IntegrityError, connection, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from rooms.models import Room
+from .models import Reservation
+
+RESTRICCION_SOLAPAMIENTO = 'reservation_room_no_overlap'
+
+
+class ReservaSolapada(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'La habitación ya tiene una reservación en ese horario'
+    default_code = 'reserva_solapada'
+
+    def __init__(self, conflictos=()):
+        super().__init__()
+        # Cuerpo con el formato de error de las demás vistas (sin convertir a ErrorDetail)
+        self.detail = {
+            'success': False,
+            'error': self.default_detail,
+            'conflictos': list(conflictos),
+        }
+
+
+def usa_restriccion_exclusion():
+    return connection.vendor == 'postgresql'
+
+
+def conflictos(room_id, check_in, check_out, excluir=None):
+    """
+    Ids de reservaciones no canceladas de la habitación que se solapan con
+    [check_in, check_out), el mismo criterio que la restricción de exclusión.
+    """
+    reservas = Reservation.objects.filter(
+        room_id=room_id, check_in__lt=check_out, check_out__gt=check_in
+    ).exclude(status='cancelled')
+    if excluir is not None:
+        reservas = reservas.exclude(pk=excluir)
+    return list(reservas.order_by('check_in').values_list('id', flat=True))
+
+
+def _es_solapamiento(error):
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None and getattr(diag, 'constraint_name', None):
+        return diag.constraint_name == RESTRICCION_SOLAPAMIENTO
+    return RESTRICCION_SOLAPAMIENTO in str(error)
+
+
+def guardar(serializer, **kwargs):
+    """
+    ``serializer.save(**kwargs)`` con la verificación de solapamiento.
+    Lanza ReservaSolapada si la ventana choca con otra reservación.
+    """
+    instancia = serializer.instance
+    datos = {**serializer.validated_data, **kwargs}
+
+    def valor(campo, defecto=None):
+        if campo in datos:
+            return datos[campo]
+        return getattr(instancia, campo) if instancia is not None else defecto
+
+    room = valor('room')
+    check_in, check_out = valor('check_in'), valor('check_out')
+    excluir = instancia.pk if instancia is not None else None
+    cancelada = valor('status', 'active') == 'cancelled'
+
+    try:
+        with transaction.atomic():
+            if not cancelada and not usa_restriccion_exclusion():
+                # Serializa solo las reservaciones de esta habitación
+                list(Room.objects.select_for_update().filter(pk=room.pk).values_list('pk', flat=True))
+                choques = conflictos(room.pk, check_in, check_out, excluir)
+                if choques:
+                    raise ReservaSolapada(choques)
+            return serializer.save(**kwargs)
+    except IntegrityError as error:
+        if not _es_solapamiento(error):
+            raise
+        raise ReservaSolapada(conflictos(room.pk, check_in, check_out, excluir)) from error
+
+
+def solapamientos(room_ids):
+    """
+    Pares (id, id) de reservaciones no canceladas encimadas en la misma habitación.
+    Verificación de las pruebas de concurrencia: nunca debería devolver nada.
+    """
+    filas = (
+        Reservation.objects.filter(room_id__in=room_ids).exclude(status='cancelled')
+        .order_by('room_id', 'check_in').values_list('id', 'room_id', 'check_in', 'check_out')
+    )
+    solapadas = []
+    anterior = None
+    for fila in filas:
+        if anterior is not None and anterior[1] == fila[1] and fila[2] < anterior[3]:
+            solapadas.append((anterior[0], fila[0]))
+        if anterior is None or anterior[1] != fila[1] or fila[3] > anterior[3]:
+            anterior = fila
+    return solapadas
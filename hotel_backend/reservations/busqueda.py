@@ -0,0 +1,358 @@
+"""
+Búsqueda de huéspedes por nombre o teléfono parcial.
+
+Un resultado contiene la consulta como subcadena (sin distinguir mayúsculas)
+del nombre o del teléfono de la reservación, y se ordena por similitud de
+trigramas (la de ``similarity()`` de ``pg_trgm``) y después por fecha de
+creación, más recientes primero. Solo se puntúan las ``GUEST_SEARCH_CANDIDATES``
+coincidencias más recientes: una subcadena frecuente ("ana") no calcula la
+similitud de decenas de miles de filas.
+
+Se busca en las reservaciones activas y en las archivadas (ver
+hotel_backend/archivo.py): las estadías viejas de un huésped que regresa
+suelen estar ya en el archivo.
+
+En PostgreSQL las migraciones 0006 y 0010 crean índices GIN ``gin_trgm_ops``
+sobre ``UPPER(guest_name::text)`` y ``UPPER(guest_phone::text)`` en ambas
+tablas, la misma expresión que genera ``icontains``, así que el filtro usa el
+índice en lugar de recorrer la tabla.
+
+En otros motores (SQLite en desarrollo) se usa ``GuestSearchIndex``: un índice
+de trigramas en memoria por proceso que se actualiza y sincroniza igual que el
+de disponibilidad (ver reservations/availability.py). Solo la primera
+construcción bloquea la petición; al vencer el TTL se reconstruye en un hilo
+mientras se sigue respondiendo con el índice anterior.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from itertools import repeat
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+MIN_CARACTERES = 3
+LIMITE = 20
+LIMITE_MAXIMO = 100
+
+_PALABRA = re.compile(r'[^\W_]+')
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar(texto):
+    return (texto or '').lower()
+
+
+def trigramas_subcadena(texto):
+    """
+    Trigramas consecutivos de ``texto`` (ya normalizado). Si un texto contiene
+    la consulta, contiene todos los trigramas de la consulta.
+    """
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def trigramas_similitud(texto):
+    """
+    Trigramas como los calcula pg_trgm: por palabra alfanumérica, en
+    minúsculas y con relleno ('  palabra ').
+    """
+    trigramas = set()
+    for palabra in _PALABRA.findall(normalizar(texto)):
+        relleno = f'  {palabra} '
+        trigramas.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return frozenset(trigramas)
+
+
+def similitud(a, b):
+    """``similarity()`` de pg_trgm entre dos conjuntos de trigramas."""
+    if not a or not b:
+        return 0.0
+    comunes = len(a & b)
+    return comunes / (len(a) + len(b) - comunes)
+
+
+def usa_trigramas():
+    return connection.vendor == 'postgresql'
+
+
+def max_candidatos():
+    return getattr(settings, 'GUEST_SEARCH_CANDIDATES', 1000)
+
+
+class _Textos:
+    """
+    Nombres y teléfonos distintos con sus trigramas.
+
+    Cada texto se guarda una sola vez aunque lo compartan miles de
+    reservaciones: ``por_trigrama`` lleva de un trigrama a los textos que lo
+    contienen y ``reservas[t]`` guarda las reservaciones del texto ``t``
+    ordenadas por (created_at, id).
+    """
+    __slots__ = ('ids', 'textos', 'trigramas', 'por_trigrama', 'reservas', 'por_reserva')
+
+    def __init__(self):
+        self.ids = {}
+        self.textos = []
+        self.trigramas = []
+        self.por_trigrama = defaultdict(set)
+        self.reservas = []
+        self.por_reserva = {}
+
+    def _texto_id(self, texto):
+        texto_id = self.ids.get(texto)
+        if texto_id is None:
+            texto_id = self.ids[texto] = len(self.textos)
+            self.textos.append(texto)
+            self.trigramas.append(trigramas_similitud(texto))
+            self.reservas.append([])
+            for trigrama in trigramas_subcadena(texto):
+                self.por_trigrama[trigrama].add(texto_id)
+        return texto_id
+
+    def insertar(self, reserva_id, guest_name, guest_phone, created_at):
+        clave = (created_at, reserva_id)
+        texto_ids = tuple({self._texto_id(normalizar(texto)) for texto in (guest_name, guest_phone) if texto})
+        for texto_id in texto_ids:
+            reservas = self.reservas[texto_id]
+            # Casi siempre la más reciente: se agrega al final
+            if not reservas or reservas[-1] < clave:
+                reservas.append(clave)
+            else:
+                reservas.insert(bisect_left(reservas, clave), clave)
+        self.por_reserva[reserva_id] = (texto_ids, clave)
+
+    def retirar(self, reserva_id):
+        anterior = self.por_reserva.pop(reserva_id, None)
+        if anterior is None:
+            return
+        texto_ids, clave = anterior
+        for texto_id in texto_ids:
+            reservas = self.reservas[texto_id]
+            pos = bisect_left(reservas, clave)
+            if pos < len(reservas) and reservas[pos] == clave:
+                del reservas[pos]
+
+    def textos_con(self, patron):
+        """Ids de los textos que contienen ``patron`` (normalizado, 3+ caracteres)."""
+        listas = []
+        for trigrama in trigramas_subcadena(patron):
+            textos = self.por_trigrama.get(trigrama)
+            if not textos:
+                return []
+            listas.append(textos)
+        listas.sort(key=len)
+        candidatos = set(listas[0]).intersection(*listas[1:])
+        # Tener todos los trigramas no garantiza contener la subcadena
+        return [texto_id for texto_id in candidatos if patron in self.textos[texto_id]]
+
+
+class GuestSearchIndex:
+    """
+    Índice en memoria (uno por proceso) de nombres y teléfonos de huéspedes.
+    """
+
+    def __init__(self, ttl=None):
+        self._lock = threading.RLock()
+        self._textos = _Textos()
+        self._marca = None
+        self._construido_en = None
+        self._ttl = ttl
+        self._reconstruyendo = False
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        # Reconstruir con ~1M reservaciones toma segundos; lo único que se pierde entre
+        # reconstrucciones son los borrados de otros procesos, y la vista descarta esos ids
+        return getattr(settings, 'GUEST_SEARCH_INDEX_TTL', 3600)
+
+    @property
+    def margen(self):
+        return timedelta(seconds=getattr(settings, 'GUEST_SEARCH_INDEX_OVERLAP', 5.0))
+
+    @property
+    def construido(self):
+        return self._construido_en is not None
+
+    def _reconstruir_en_segundo_plano(self):
+        with self._lock:
+            if self._reconstruyendo:
+                return
+            self._reconstruyendo = True
+
+        def trabajar():
+            try:
+                self.reconstruir()
+            except Exception:
+                # Se reintenta en la siguiente búsqueda; mientras, sirve el índice anterior
+                logger.exception('No se pudo reconstruir el índice de búsqueda de huéspedes')
+            finally:
+                connections.close_all()
+                with self._lock:
+                    self._reconstruyendo = False
+
+        threading.Thread(target=trabajar, name='reconstruir-busqueda', daemon=True).start()
+
+    def reconstruir(self):
+        """
+        Reconstruye el índice completo desde la base de datos (tabla activa y archivo).
+        """
+        from .models import Reservation, ReservationArchive
+
+        textos = _Textos()
+        marca = None
+        columnas = ('id', 'guest_name', 'guest_phone', 'created_at', 'updated_at')
+        filas = Reservation.objects.order_by().values_list(*columnas).iterator(chunk_size=10000)
+        for reserva_id, guest_name, guest_phone, created_at, updated_at in filas:
+            textos.insertar(reserva_id, guest_name, guest_phone, created_at)
+            if marca is None or updated_at > marca:
+                marca = updated_at
+        # El archivo conserva los ids: una reservación archivada sigue en el índice con el mismo id
+        archivadas = ReservationArchive.objects.order_by().values_list(*columnas[:4]).iterator(chunk_size=10000)
+        for fila in archivadas:
+            textos.insertar(*fila)
+
+        with self._lock:
+            self._textos = textos
+            self._marca = marca
+            self._construido_en = time.monotonic()
+
+    def registrar(self, reserva_id, guest_name, guest_phone, created_at, updated_at=None):
+        """
+        Inserta o actualiza una reservación.
+        """
+        with self._lock:
+            self._textos.retirar(reserva_id)
+            self._textos.insertar(reserva_id, guest_name, guest_phone, created_at)
+            if updated_at is not None and (self._marca is None or updated_at > self._marca):
+                self._marca = updated_at
+
+    def eliminar(self, reserva_id):
+        with self._lock:
+            self._textos.retirar(reserva_id)
+
+    def sincronizar(self):
+        """
+        Aplica los cambios hechos desde la última marca (incluidos otros procesos),
+        releyendo la ventana de solapamiento anterior a ella.
+
+        Las eliminaciones físicas hechas en otros procesos se recogen en la
+        siguiente reconstrucción completa, al vencer ``GUEST_SEARCH_INDEX_TTL``.
+        El archivo solo se lee al reconstruir: a él pasan reservaciones cerradas
+        hace tiempo, que el índice ya tenía con el mismo id.
+        """
+        from .models import Reservation
+
+        if not self.construido:
+            self.reconstruir()
+            return
+        if time.monotonic() - self._construido_en > self.ttl:
+            self._reconstruir_en_segundo_plano()
+
+        if self._marca is None:
+            cambios = Reservation.objects.all()
+        else:
+            # Escrituras confirmadas tarde (o durante una reconstrucción) con updated_at
+            # anterior a la marca; registrar es idempotente
+            cambios = Reservation.objects.filter(updated_at__gte=self._marca - self.margen)
+        for fila in cambios.order_by().values_list('id', 'guest_name', 'guest_phone', 'created_at', 'updated_at'):
+            self.registrar(*fila)
+
+    def buscar(self, consulta, limite=LIMITE, candidatos=None):
+        """
+        Devuelve hasta ``limite`` pares (reserva_id, similitud) ordenados por
+        similitud y luego por fecha de creación descendente, entre las
+        ``candidatos`` coincidencias más recientes.
+        """
+        if candidatos is None:
+            candidatos = max_candidatos()
+        patron = normalizar(consulta)
+        trigramas = trigramas_similitud(consulta)
+        with self._lock:
+            textos = self._textos
+            # Las listas de cada texto ya están ordenadas: se mezclan desde el final
+            # hasta juntar ``candidatos`` reservaciones distintas
+            listas = []
+            for texto_id in textos.textos_con(patron):
+                if textos.reservas[texto_id]:
+                    valor = similitud(trigramas, textos.trigramas[texto_id])
+                    listas.append(zip(reversed(textos.reservas[texto_id]), repeat(valor)))
+
+            mejores = {}
+            for (created_at, reserva_id), valor in heapq.merge(*listas, key=itemgetter(0), reverse=True):
+                if reserva_id in mejores:
+                    # Coinciden nombre y teléfono: cuenta la mayor similitud
+                    mejores[reserva_id] = max(mejores[reserva_id], (valor, created_at, reserva_id))
+                    continue
+                if len(mejores) >= candidatos:
+                    break
+                mejores[reserva_id] = (valor, created_at, reserva_id)
+
+        ordenados = heapq.nlargest(limite, mejores.values())
+        return [(reserva_id, valor) for valor, _, reserva_id in ordenados]
+
+
+def _buscar_postgres(consulta, limite, candidatos):
+    from django.contrib.postgres.search import TrigramSimilarity
+    from .models import Reservation, ReservationArchive
+
+    en_nombre = Q(guest_name__icontains=consulta)
+    en_telefono = Q(guest_phone__icontains=consulta)
+
+    def similitud_campo(condicion, campo):
+        # Solo cuenta el campo que coincide (o el mayor si coinciden ambos), como el índice en memoria
+        return Case(
+            When(condicion, then=TrigramSimilarity(campo, consulta)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+
+    # Solo se puntúan las coincidencias más recientes entre ambas tablas (índices de
+    # trigramas o de -created_at): hasta ``candidatos`` de cada una y, de ellas, las más nuevas
+    recientes = []
+    for modelo in (Reservation, ReservationArchive):
+        coincidencias = (
+            modelo.objects.filter(en_nombre | en_telefono)
+            .order_by('-created_at', '-id').values_list('created_at', 'id')[:candidatos]
+        )
+        recientes.extend((created_at, reserva_id, modelo) for created_at, reserva_id in coincidencias)
+    por_modelo = defaultdict(list)
+    for _, reserva_id, modelo in heapq.nlargest(candidatos, recientes, key=itemgetter(0, 1)):
+        por_modelo[modelo].append(reserva_id)
+
+    puntuadas = []
+    for modelo, ids in por_modelo.items():
+        puntuadas.extend(
+            modelo.objects
+            .filter(id__in=ids)
+            .annotate(similitud=Greatest(similitud_campo(en_nombre, 'guest_name'),
+                                         similitud_campo(en_telefono, 'guest_phone')))
+            .order_by('-similitud', '-created_at', '-id')
+            .values_list('similitud', 'created_at', 'id')[:limite]
+        )
+    return [(reserva_id, valor) for valor, _, reserva_id in heapq.nlargest(limite, puntuadas)]
+
+
+def buscar(consulta, limite=LIMITE):
+    """
+    Ids de reservaciones (activas o archivadas) cuyo nombre o teléfono contiene
+    ``consulta``, como pares (reserva_id, similitud) en orden de relevancia.
+    """
+    candidatos = max(limite, max_candidatos())
+    if usa_trigramas():
+        return _buscar_postgres(consulta, limite, candidatos)
+    guest_search_index.sincronizar()
+    return guest_search_index.buscar(consulta, limite, candidatos)
+
+
+guest_search_index = GuestSearchIndex()
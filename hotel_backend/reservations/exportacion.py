@@ -0,0 +1,123 @@
+"""
+Exportación de reservaciones en streaming (CSV o NDJSON).
+
+En lugar de paginar (una consulta y un COUNT(*) por página) se recorre una
+sola consulta con ``.iterator(chunk_size=...)``: en PostgreSQL usa un cursor
+del lado del servidor y en SQLite lee del cursor por bloques, así que nunca
+hay más de ``TAMANO_BLOQUE`` filas en memoria. Las filas salen de
+``values_list()`` (sin instanciar modelos) con los mismos formatos de fecha
+y decimal que la API, y se entregan en bloques de bytes a un
+``StreamingHttpResponse``, opcionalmente comprimidos con gzip al vuelo.
+
+Si el rango llega a filas archivadas (ver hotel_backend/archivo.py) la
+consulta es la unión de la tabla activa y la de archivo.
+"""
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+
+from hotel_backend.fast_serializers import formateador_decimal, formateador_fecha
+
+TAMANO_BLOQUE = 2000
+
+# (columna del archivo exportado, columna de values_list)
+CAMPOS = (
+    ('id', 'id'),
+    ('room', 'room_id'),
+    ('room_numero', 'room__numero'),
+    ('guest_name', 'guest_name'),
+    ('guest_phone', 'guest_phone'),
+    ('check_in', 'check_in'),
+    ('check_out', 'check_out'),
+    ('total_amount', 'total_amount'),
+    ('paid_amount', 'paid_amount'),
+    ('status', 'status'),
+    ('notes', 'notes'),
+    ('created_by', 'created_by__username'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def consulta(activas, archivadas=None):
+    """
+    Filas a exportar en orden de creación. ``activas`` y ``archivadas`` ya
+    traen los filtros de la petición; el archivo solo se une si tiene filas.
+    """
+    columnas = [columna for _, columna in CAMPOS]
+    filas = activas.order_by().values_list(*columnas)
+    if archivadas is not None and archivadas.exists():
+        filas = filas.union(archivadas.order_by().values_list(*columnas), all=True)
+    return filas.order_by('created_at', 'id')
+
+
+def _formateadores():
+    fecha = formateador_fecha()
+    decimal = formateador_decimal(2, 10)
+    por_campo = {
+        'check_in': fecha, 'check_out': fecha, 'created_at': fecha, 'updated_at': fecha,
+        'total_amount': decimal, 'paid_amount': decimal,
+    }
+    return [(i, por_campo[nombre]) for i, (nombre, _) in enumerate(CAMPOS) if nombre in por_campo]
+
+
+def _bloques(filas):
+    """Filas formateadas (listas), de ``TAMANO_BLOQUE`` en ``TAMANO_BLOQUE``."""
+    formateadores = _formateadores()
+    iterador = filas.iterator(chunk_size=TAMANO_BLOQUE)
+    while True:
+        bloque = [list(fila) for fila in islice(iterador, TAMANO_BLOQUE)]
+        if not bloque:
+            return
+        for fila in bloque:
+            for i, formatear in formateadores:
+                fila[i] = formatear(fila[i])
+        yield bloque
+
+
+def _csv(filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM: Excel abre el archivo como UTF-8 (acentos en nombres y notas)
+    buffer.write('\ufeff')
+    writer.writerow([nombre for nombre, _ in CAMPOS])
+    for bloque in _bloques(filas):
+        writer.writerows(bloque)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _ndjson(filas):
+    nombres = [nombre for nombre, _ in CAMPOS]
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    for bloque in _bloques(filas):
+        yield ''.join(dumps(dict(zip(nombres, fila))) + '\n' for fila in bloque).encode()
+
+
+def _gzip(partes):
+    # wbits=31: formato gzip (encabezado y CRC), no zlib crudo
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for parte in partes:
+        datos = compresor.compress(parte)
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+
+def exportar(filas, formato, comprimir=False):
+    """
+    Generador de bytes con ``filas`` (ver ``consulta``) en ``formato``
+    ('csv' o 'ndjson'), comprimido con gzip si ``comprimir``.
+    """
+    partes = _csv(filas) if formato == 'csv' else _ndjson(filas)
+    return _gzip(partes) if comprimir else partes
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reservations import vencimientos
+
+
+class Command(BaseCommand):
+    help = (
+        'Cierra las reservaciones activas con check-out vencido y pasa sus habitaciones a limpieza. '
+        'Idempotente y seguro con varios workers; usar desde cron o con --cada'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=vencimientos.TAMANO_LOTE,
+                            help='Reservaciones por transacción')
+        parser.add_argument('--max-segundos', type=float, default=None,
+                            help='Tiempo máximo por barrido; lo pendiente queda para el siguiente')
+        parser.add_argument('--cada', type=float, default=None,
+                            help='Repite el barrido cada N segundos en lugar de terminar')
+
+    def handle(self, *args, **options):
+        while True:
+            t0 = time.perf_counter()
+            resultado = vencimientos.barrer_vencidas(
+                tamano_lote=options['lote'], max_segundos=options['max_segundos']
+            )
+            duracion = time.perf_counter() - t0
+            if resultado['reservaciones'] or options['cada'] is None:
+                pendiente = '' if resultado['completo'] else ' (quedan vencidas para el siguiente barrido)'
+                self.stdout.write(
+                    f"{resultado['reservaciones']} reservaciones cerradas, "
+                    f"{resultado['habitaciones_a_limpieza']} habitaciones a limpieza, "
+                    f"{resultado['lotes']} lotes en {duracion:.2f}s{pendiente}"
+                )
+            if options['cada'] is None:
+                break
+            time.sleep(options['cada'])
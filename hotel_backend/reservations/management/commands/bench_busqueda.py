@@ -0,0 +1,206 @@
+import random
+import re
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from hotel_backend.bench import transaccion_revertida
+from reservations import busqueda
+from reservations.busqueda import GuestSearchIndex
+from reservations.models import Reservation
+from rooms.models import Room, RoomType
+
+User = get_user_model()
+
+NOMBRES = [
+    'Ana', 'Andrés', 'Camila', 'Carlos', 'Carolina', 'Daniel', 'Diana', 'Felipe', 'Gabriela', 'Jorge',
+    'José', 'Juan', 'Julián', 'Laura', 'Luis', 'Manuela', 'María', 'Mateo', 'Natalia', 'Paula',
+    'Pedro', 'Ricardo', 'Santiago', 'Sara', 'Sebastián', 'Sofía', 'Valentina', 'Valeria', 'Andrea', 'David',
+]
+APELLIDOS = [
+    'Gómez', 'Rodríguez', 'Martínez', 'García', 'López', 'González', 'Hernández', 'Pérez', 'Sánchez', 'Ramírez',
+    'Torres', 'Díaz', 'Vargas', 'Castro', 'Rojas', 'Moreno', 'Jiménez', 'Muñoz', 'Romero', 'Álvarez',
+    'Ruiz', 'Suárez', 'Ortiz', 'Restrepo', 'Cardona', 'Osorio', 'Giraldo', 'Zapata', 'Quintero', 'Mejía',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la latencia de /api/reservations/buscar/ (trigramas en PostgreSQL, índice en '
+        'memoria en otros motores) sobre datos de volumen y la compara con icontains sin índice'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservaciones', type=int, default=1000000)
+        parser.add_argument('--huespedes', type=int, default=200000, help='Huéspedes distintos (los demás repiten)')
+        parser.add_argument('--habitaciones', type=int, default=2000)
+        parser.add_argument('--consultas', type=int, default=500)
+        parser.add_argument('--limite', type=int, default=busqueda.LIMITE)
+        parser.add_argument('--objetivo-p95', type=float, default=20.0, help='Milisegundos')
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['semilla'])
+        fallos = []
+        with transaccion_revertida():
+            fallos = self._ejecutar(options)
+        if fallos:
+            raise CommandError('; '.join(fallos))
+
+    def _sembrar(self, options):
+        huespedes = [
+            (f'{random.choice(NOMBRES)} {random.choice(APELLIDOS)} {random.choice(APELLIDOS)}',
+             f'3{random.randint(0, 999999999):09d}')
+            for _ in range(options['huespedes'])
+        ]
+        usuario = User.objects.create_user(username='bench_busqueda', password='x')
+        tipo = RoomType.objects.create(nombre='Bench búsqueda', precio_base=Decimal('40000'))
+        Room.objects.bulk_create(
+            [Room(numero=f'BB{i}', tipo_habitacion=tipo) for i in range(options['habitaciones'])],
+            batch_size=5000,
+        )
+        room_ids = list(Room.objects.filter(tipo_habitacion=tipo).values_list('id', flat=True))
+
+        # Ventanas consecutivas por habitación: en PostgreSQL rige la exclusión de solapamientos
+        inicio = timezone.now() - timedelta(days=365 * 3)
+        por_habitacion = max(1, options['reservaciones'] // len(room_ids))
+        lote = []
+        for room_id in room_ids:
+            check_in = inicio
+            for _ in range(por_habitacion):
+                check_out = check_in + timedelta(hours=random.randint(1, 12))
+                nombre, telefono = random.choice(huespedes)
+                lote.append(Reservation(
+                    room_id=room_id, created_by=usuario, guest_name=nombre,
+                    guest_phone=telefono if random.random() < 0.8 else None,
+                    check_in=check_in, check_out=check_out,
+                    total_amount=Decimal('40000'), status='completed',
+                ))
+                check_in = check_out + timedelta(minutes=random.randint(0, 120))
+                if len(lote) >= 10000:
+                    Reservation.objects.bulk_create(lote)
+                    lote = []
+        Reservation.objects.bulk_create(lote)
+        # created_at/updated_at son automáticos: se reparten como si cada reservación se
+        # hubiera hecho al llegar, así la sincronización relee solo las escrituras recientes
+        Reservation.objects.filter(created_by=usuario).update(created_at=F('check_in'), updated_at=F('check_in'))
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(Reservation._meta.db_table)}')
+        return huespedes
+
+    def _consultas(self, huespedes, n):
+        consultas = []
+        for _ in range(n):
+            nombre, telefono = random.choice(huespedes)
+            # Mitad por un pedazo del nombre, mitad por un pedazo del teléfono
+            texto, largo = (nombre, random.randint(3, 8)) if random.random() < 0.5 else (telefono, random.randint(4, 7))
+            desde = random.randint(0, len(texto) - largo)
+            consultas.append(texto[desde:desde + largo])
+        return consultas
+
+    def _esperado(self, consulta, limite):
+        """
+        Ranking calculado sin índice: icontains sobre toda la tabla y similitud en Python
+        de las coincidencias más recientes.
+        """
+        trigramas = busqueda.trigramas_similitud(consulta)
+        filas = Reservation.objects.filter(
+            Q(guest_name__icontains=consulta) | Q(guest_phone__icontains=consulta)
+        ).order_by('-created_at', '-id').values_list(
+            'id', 'guest_name', 'guest_phone', 'created_at'
+        )[:max(limite, busqueda.max_candidatos())]
+        patron = busqueda.normalizar(consulta)
+        puntajes = []
+        for reserva_id, nombre, telefono, created_at in filas:
+            valor = max(
+                busqueda.similitud(trigramas, busqueda.trigramas_similitud(texto))
+                for texto in (nombre, telefono) if texto and patron in busqueda.normalizar(texto)
+            )
+            puntajes.append((valor, created_at, reserva_id))
+        puntajes.sort(reverse=True)
+        return [reserva_id for _, _, reserva_id in puntajes[:limite]]
+
+    def _percentiles(self, etiqueta, tiempos):
+        tiempos = sorted(tiempos)
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        self.stdout.write(
+            f'{etiqueta}: p50={statistics.median(tiempos) * 1000:.2f}ms '
+            f'p95={p95 * 1000:.2f}ms max={tiempos[-1] * 1000:.2f}ms'
+        )
+        return p95 * 1000
+
+    def _ejecutar(self, options):
+        t0 = time.perf_counter()
+        huespedes = self._sembrar(options)
+        total = Reservation.objects.count()
+        self.stdout.write(f'Datos: {total} reservaciones ({time.perf_counter() - t0:.1f}s)')
+        consultas = self._consultas(huespedes, options['consultas'])
+        limite = options['limite']
+        fallos = []
+
+        if busqueda.usa_trigramas():
+            plan = Reservation.objects.filter(
+                Q(guest_name__icontains=consultas[0]) | Q(guest_phone__icontains=consultas[0])
+            ).explain()
+            if not re.search(r'\breservation_guest_(name|phone)_trgm\b', plan):
+                fallos.append('la búsqueda no usa los índices de trigramas')
+                self.stdout.write(plan)
+
+            def buscar(consulta):
+                return busqueda.buscar(consulta, limite)
+        else:
+            indice = GuestSearchIndex()
+            t0 = time.perf_counter()
+            indice.reconstruir()
+            self.stdout.write(f'Construcción del índice en memoria: {time.perf_counter() - t0:.2f}s')
+
+            def buscar(consulta):
+                # Igual que la vista: primero aplica los cambios de otros procesos
+                indice.sincronizar()
+                return indice.buscar(consulta, limite)
+
+        tiempos = []
+        tiempos_completos = []
+        for consulta in consultas:
+            t0 = time.perf_counter()
+            resultados = buscar(consulta)
+            tiempos.append(time.perf_counter() - t0)
+            # Lo que agrega la vista: leer las filas de la página de resultados
+            list(Reservation.objects.select_related('room', 'created_by')
+                 .filter(id__in=[reserva_id for reserva_id, _ in resultados]))
+            tiempos_completos.append(time.perf_counter() - t0)
+
+        self._percentiles(f'Búsqueda ({connection.vendor})', tiempos)
+        p95 = self._percentiles('Búsqueda + filas de la respuesta', tiempos_completos)
+        if p95 > options['objetivo_p95']:
+            fallos.append(f'p95 {p95:.2f}ms supera el objetivo de {options["objetivo_p95"]:.0f}ms')
+
+        # Línea base y verificación con una muestra: icontains sin índice, ranking en Python
+        muestra = consultas[:20]
+        tiempos_base = []
+        distintas = 0
+        for consulta in muestra:
+            t0 = time.perf_counter()
+            esperado = self._esperado(consulta, limite)
+            tiempos_base.append(time.perf_counter() - t0)
+            # En PostgreSQL similarity() es float4 y los empates pueden ordenarse distinto
+            if not busqueda.usa_trigramas() and [reserva_id for reserva_id, _ in buscar(consulta)] != esperado:
+                distintas += 1
+                self.stdout.write(self.style.ERROR(f'Resultados distintos para {consulta!r}'))
+        self._percentiles('icontains sin índice + ranking en Python', tiempos_base)
+        if distintas:
+            fallos.append(f'{distintas} consultas con resultados distintos a la línea base')
+        elif not busqueda.usa_trigramas():
+            self.stdout.write(self.style.SUCCESS(f'Resultados idénticos a la línea base en {len(muestra)} consultas'))
+        if not fallos:
+            self.stdout.write(self.style.SUCCESS(f'✓ p95 por debajo de {options["objetivo_p95"]:.0f}ms'))
+        return fallos
@@ -0,0 +1,103 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from hotel_backend.bench import transaccion_revertida
+from reservations.availability import AvailabilityIndex
+from reservations.models import Reservation
+from rooms.models import Room, RoomType
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compara el índice de disponibilidad contra la consulta de solapamiento del ORM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitaciones', type=int, default=10000)
+        parser.add_argument('--reservaciones', type=int, default=1000000)
+        parser.add_argument('--consultas', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['semilla'])
+        with transaccion_revertida():
+            self._ejecutar(options)
+
+    def _sembrar(self, n_habitaciones, n_reservaciones):
+        usuario = User.objects.create_user(username='bench_disponibilidad', password='x')
+        tipo = RoomType.objects.create(nombre='Bench disponibilidad', precio_base=Decimal('40000'))
+        Room.objects.bulk_create(
+            [Room(numero=f'B{i}', tipo_habitacion=tipo) for i in range(n_habitaciones)],
+            batch_size=5000,
+        )
+        room_ids = list(Room.objects.filter(tipo_habitacion=tipo).values_list('id', flat=True))
+
+        inicio = timezone.now() - timedelta(days=365)
+        por_habitacion = max(1, n_reservaciones // len(room_ids))
+        lote = []
+        for room_id in room_ids:
+            momento = inicio + timedelta(minutes=random.randint(0, 600))
+            for _ in range(por_habitacion):
+                check_in = momento
+                check_out = check_in + timedelta(hours=random.randint(1, 12))
+                lote.append(Reservation(
+                    room_id=room_id, created_by=usuario, guest_name='Huésped',
+                    check_in=check_in, check_out=check_out, total_amount=Decimal('40000'),
+                ))
+                momento = check_out + timedelta(minutes=random.randint(0, 60 * 72))
+                if len(lote) >= 10000:
+                    Reservation.objects.bulk_create(lote)
+                    lote = []
+        if lote:
+            Reservation.objects.bulk_create(lote)
+        return room_ids, inicio
+
+    def _ejecutar(self, options):
+        t0 = time.perf_counter()
+        room_ids, inicio = self._sembrar(options['habitaciones'], options['reservaciones'])
+        total = Reservation.objects.filter(room_id__in=room_ids).count()
+        self.stdout.write(f'Datos: {len(room_ids)} habitaciones, {total} reservaciones '
+                          f'({time.perf_counter() - t0:.1f}s)')
+
+        indice = AvailabilityIndex()
+        t0 = time.perf_counter()
+        indice.reconstruir()
+        self.stdout.write(f'Construcción del índice: {time.perf_counter() - t0:.2f}s')
+
+        ventanas = []
+        for _ in range(options['consultas']):
+            desde = inicio + timedelta(minutes=random.randint(0, 60 * 24 * 380))
+            ventanas.append((desde, desde + timedelta(hours=random.randint(1, 6))))
+
+        t_indice = 0.0
+        t_orm = 0.0
+        for desde, hasta in ventanas:
+            t0 = time.perf_counter()
+            libres_indice = indice.habitaciones_libres(room_ids, desde, hasta)
+            t_indice += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            ocupadas = Reservation.objects.filter(
+                status='active', check_in__lt=hasta, check_out__gt=desde,
+            ).values('room_id')
+            libres_orm = list(
+                Room.objects.filter(id__in=room_ids).exclude(id__in=ocupadas)
+                .order_by().values_list('id', flat=True)
+            )
+            t_orm += time.perf_counter() - t0
+
+            if set(libres_indice) != set(libres_orm):
+                self.stdout.write(self.style.ERROR(f'Resultados distintos para {desde} - {hasta}'))
+                return
+
+        n = len(ventanas)
+        por_habitacion = t_indice / n / len(room_ids) * 1e6
+        self.stdout.write(f'Índice: {t_indice / n * 1000:.2f} ms/consulta ({por_habitacion:.2f} µs por habitación)')
+        self.stdout.write(f'ORM:    {t_orm / n * 1000:.2f} ms/consulta')
+        self.stdout.write(self.style.SUCCESS(f'Aceleración: {t_orm / t_indice:.1f}x, resultados idénticos'))
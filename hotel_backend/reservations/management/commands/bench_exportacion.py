@@ -0,0 +1,109 @@
+import os
+import random
+import resource
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from hotel_backend.bench import transaccion_revertida
+from reservations import exportacion
+from reservations.models import Reservation, ReservationArchive
+from rooms.models import Room, RoomType
+
+User = get_user_model()
+
+
+def _rss_mb():
+    """RSS actual del proceso; sin /proc (no Linux) se usa el máximo histórico."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta en streaming un volumen grande de reservaciones y mide el RSS del proceso '
+        'durante la exportación (objetivo: memoria constante, por debajo de --max-rss-mb)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservaciones', type=int, default=5000000)
+        parser.add_argument('--habitaciones', type=int, default=2000)
+        parser.add_argument('--formato', choices=list(exportacion.FORMATOS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--max-rss-mb', type=float, default=100.0)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['semilla'])
+        fallos = []
+        with transaccion_revertida():
+            fallos = self._ejecutar(options)
+        if fallos:
+            raise CommandError('; '.join(fallos))
+
+    def _sembrar(self, options):
+        usuario = User.objects.create_user(username='bench_exportacion', password='x')
+        tipo = RoomType.objects.create(nombre='Bench exportación', precio_base=Decimal('40000'))
+        Room.objects.bulk_create(
+            [Room(numero=f'BE{i}', tipo_habitacion=tipo) for i in range(options['habitaciones'])],
+            batch_size=5000,
+        )
+        room_ids = list(Room.objects.filter(tipo_habitacion=tipo).values_list('id', flat=True))
+
+        # Ventanas consecutivas por habitación: en PostgreSQL rige la exclusión de solapamientos
+        inicio = timezone.now() - timedelta(days=365 * 5)
+        por_habitacion = max(1, options['reservaciones'] // len(room_ids))
+        for room_id in room_ids:
+            check_in = inicio
+            lote = []
+            for _ in range(por_habitacion):
+                check_out = check_in + timedelta(hours=random.randint(1, 12))
+                lote.append(Reservation(
+                    room_id=room_id, created_by=usuario, guest_name='Huésped de exportación',
+                    guest_phone='3001234567', check_in=check_in, check_out=check_out,
+                    total_amount=Decimal('40000'), paid_amount=Decimal('40000'), status='completed',
+                ))
+                check_in = check_out + timedelta(minutes=random.randint(0, 120))
+            Reservation.objects.bulk_create(lote, batch_size=5000)
+        return tipo
+
+    def _ejecutar(self, options):
+        t0 = time.perf_counter()
+        tipo = self._sembrar(options)
+        total = Reservation.objects.filter(room__tipo_habitacion=tipo).count()
+        self.stdout.write(f'Datos: {total} reservaciones ({time.perf_counter() - t0:.1f}s)')
+
+        filas = exportacion.consulta(
+            Reservation.objects.filter(room__tipo_habitacion=tipo),
+            ReservationArchive.objects.filter(room__tipo_habitacion=tipo),
+        )
+        rss_inicial = _rss_mb()
+        rss_maximo = rss_inicial
+        bytes_enviados = 0
+        t0 = time.perf_counter()
+        # Se consume igual que lo haría el servidor: parte por parte, sin acumular
+        for parte in exportacion.exportar(filas, options['formato'], options['gzip']):
+            bytes_enviados += len(parte)
+            rss_maximo = max(rss_maximo, _rss_mb())
+        duracion = time.perf_counter() - t0
+
+        self.stdout.write(
+            f'Exportación {options["formato"]}{" + gzip" if options["gzip"] else ""} ({connection.vendor}): '
+            f'{bytes_enviados / 2 ** 20:.1f} MB en {duracion:.1f}s ({total / duracion:,.0f} filas/s)'
+        )
+        self.stdout.write(
+            f'RSS: {rss_inicial:.1f} MB al empezar, máximo {rss_maximo:.1f} MB '
+            f'(+{rss_maximo - rss_inicial:.1f} MB durante la exportación)'
+        )
+        if rss_maximo > options['max_rss_mb']:
+            return [f'el RSS llegó a {rss_maximo:.1f} MB (máximo {options["max_rss_mb"]:.0f} MB)']
+        self.stdout.write(self.style.SUCCESS(f'✓ RSS por debajo de {options["max_rss_mb"]:.0f} MB'))
+        return []
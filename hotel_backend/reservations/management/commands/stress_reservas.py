@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from reservations import booking
+from reservations.models import Reservation
+from reservations.serializers import ReservationSerializer
+from rooms.models import Room, RoomType
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Reserva en paralelo ventanas aleatorias sobre pocas habitaciones y verifica '
+        'que no quede ningún par de reservaciones solapadas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=16)
+        parser.add_argument('--intentos', type=int, default=50, help='Reservas que intenta cada hilo')
+        parser.add_argument('--habitaciones', type=int, default=1)
+        parser.add_argument('--horizonte', type=int, default=48, help='Horas en las que caen las ventanas')
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Los hilos usan conexiones propias: los datos se confirman y se borran al final
+        usuario = User.objects.create_user(username='stress_reservas', password='x')
+        tipo = RoomType.objects.create(nombre='Stress reservas', precio_base=Decimal('40000'))
+        Room.objects.bulk_create([
+            Room(numero=f'SR{i}', tipo_habitacion=tipo) for i in range(options['habitaciones'])
+        ])
+        room_ids = list(Room.objects.filter(tipo_habitacion=tipo).values_list('id', flat=True))
+        try:
+            self._ejecutar(options, usuario, room_ids)
+        finally:
+            Reservation.objects.filter(room_id__in=room_ids).delete()
+            Room.objects.filter(id__in=room_ids).delete()
+            tipo.delete()
+            usuario.delete()
+
+    def _ejecutar(self, options, usuario, room_ids):
+        inicio = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+        resultados = Counter()
+        errores = Counter()
+        lock = threading.Lock()
+
+        def trabajar(numero_hilo):
+            aleatorio = random.Random(options['semilla'] + numero_hilo)
+            locales = Counter()
+            try:
+                for _ in range(options['intentos']):
+                    check_in = inicio + timedelta(hours=aleatorio.randrange(options['horizonte']))
+                    serializer = ReservationSerializer(data={
+                        'room': aleatorio.choice(room_ids),
+                        'guest_name': f'Huésped {numero_hilo}',
+                        'check_in': check_in,
+                        'check_out': check_in + timedelta(hours=aleatorio.randint(1, 4)),
+                        'total_amount': '40000',
+                    })
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        booking.guardar(serializer, created_by=usuario)
+                        locales['creadas'] += 1
+                    except booking.ReservaSolapada:
+                        locales['rechazadas_409'] += 1
+                    except Exception as error:
+                        locales['otros_errores'] += 1
+                        with lock:
+                            errores[f'{type(error).__name__}: {error}'] += 1
+            finally:
+                connection.close()
+            with lock:
+                resultados.update(locales)
+
+        hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(options['hilos'])]
+        t0 = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - t0
+
+        intentos = options['hilos'] * options['intentos']
+        modo = 'restricción de exclusión' if booking.usa_restriccion_exclusion() else 'verificación en Python'
+        self.stdout.write(
+            f'{connection.vendor} ({modo}): {options["hilos"]} hilos, {intentos} intentos sobre '
+            f'{len(room_ids)} habitaciones en {duracion:.2f}s ({intentos / duracion:.0f} intentos/s)'
+        )
+        self.stdout.write(
+            f'  creadas={resultados["creadas"]} rechazadas_409={resultados["rechazadas_409"]} '
+            f'otros_errores={resultados["otros_errores"]}'
+        )
+        for mensaje, veces in errores.most_common(5):
+            self.stdout.write(f'  {veces}x {mensaje}')
+
+        solapadas = booking.solapamientos(room_ids)
+        if solapadas:
+            self.stdout.write(self.style.ERROR(f'✗ {len(solapadas)} pares solapados, p. ej. {solapadas[:5]}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ Ninguna habitación tiene reservaciones solapadas'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reservation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha de actualización'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+RESTRICCION = 'reservation_room_no_overlap'
+
+
+def crear_exclusion(apps, schema_editor):
+    # Solo PostgreSQL tiene rangos y restricciones de exclusión; en otros
+    # motores la verificación la hace reservations.booking en Python
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT a.id, b.id, a.room_id
+            FROM reservations_reservation a
+            JOIN reservations_reservation b
+              ON a.room_id = b.room_id AND a.id < b.id
+             AND tstzrange(a.check_in, a.check_out, '[)') && tstzrange(b.check_in, b.check_out, '[)')
+            WHERE a.status <> 'cancelled' AND b.status <> 'cancelled'
+            LIMIT 20
+            """
+        )
+        solapadas = cursor.fetchall()
+    if solapadas:
+        detalle = ', '.join(f'{a}/{b} (habitación {room})' for a, b, room in solapadas)
+        raise RuntimeError(
+            f'Hay reservaciones no canceladas que se solapan: {detalle}. '
+            'Cancélelas o corrija sus horarios antes de migrar.'
+        )
+
+    schema_editor.execute(
+        f"""
+        ALTER TABLE reservations_reservation
+        ADD CONSTRAINT {RESTRICCION}
+        EXCLUDE USING gist (room_id WITH =, tstzrange(check_in, check_out, '[)') WITH &&)
+        WHERE (status <> 'cancelled')
+        """
+    )
+
+
+def eliminar_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'ALTER TABLE reservations_reservation DROP CONSTRAINT IF EXISTS {RESTRICCION}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0002_reservation_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.CheckConstraint(condition=models.Q(('check_out__gt', models.F('check_in'))), name='reservation_check_out_after_check_in'),
+        ),
+        migrations.RunPython(crear_exclusion, eliminar_exclusion),
+    ]
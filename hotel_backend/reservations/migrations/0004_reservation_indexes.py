@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0003_reservation_no_overlap'),
+        ('rooms', '0013_room_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'created_at'], name='reservation_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'check_in'], name='reservation_room_check_in'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['-created_at'], name='reservation_created_desc'),
+        ),
+    ]
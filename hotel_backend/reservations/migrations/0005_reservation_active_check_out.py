@@ -0,0 +1,20 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_reservation_indexes'),
+        ('rooms', '0013_room_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['check_out'], name='reservation_active_check_out'),
+        ),
+    ]
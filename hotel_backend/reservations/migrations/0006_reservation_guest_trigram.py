@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:10
+
+from django.db import migrations
+
+INDICES = {
+    'reservation_guest_name_trgm': 'guest_name',
+    'reservation_guest_phone_trgm': 'guest_phone',
+}
+
+
+def crear_indices_trigramas(apps, schema_editor):
+    # Solo PostgreSQL tiene pg_trgm; en otros motores la búsqueda usa el
+    # índice en memoria de reservations.busqueda
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Misma expresión que genera icontains: UPPER("campo"::text) LIKE UPPER(%s)
+    for nombre, campo in INDICES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nombre} ON reservations_reservation '
+            f'USING gin ((UPPER({campo}::text)) gin_trgm_ops)'
+        )
+
+
+def eliminar_indices_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_reservation_active_check_out'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices_trigramas, eliminar_indices_trigramas),
+    ]
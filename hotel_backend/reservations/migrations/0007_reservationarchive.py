@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_reservation_guest_trigram'),
+        ('rooms', '0013_room_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationArchive',
+            fields=[
+                ('guest_name', models.CharField(max_length=100, verbose_name='Nombre del huésped')),
+                ('guest_phone', models.CharField(blank=True, max_length=15, null=True, verbose_name='Teléfono del huésped')),
+                ('check_in', models.DateTimeField(verbose_name='Check-in')),
+                ('check_out', models.DateTimeField(verbose_name='Check-out')),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Monto total')),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Monto pagado')),
+                ('status', models.CharField(choices=[('active', 'Activa'), ('completed', 'Completada'), ('cancelled', 'Cancelada')], default='active', max_length=20, verbose_name='Estado')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Notas')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(verbose_name='Fecha de actualización')),
+                ('archivado_en', models.DateTimeField(verbose_name='Fecha de archivo')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rooms.room', verbose_name='Habitación')),
+            ],
+            options={
+                'verbose_name': 'Reservación archivada',
+                'verbose_name_plural': 'Reservaciones archivadas',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='reservation_arch_created'), models.Index(fields=['room', 'check_in'], name='reservation_arch_room_check_in')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def crear_pagos_iniciales(apps, schema_editor):
+    """Un pago de apertura por cada reservación que ya tenía paid_amount: el libro suma lo pagado."""
+    Payment = apps.get_model('reservations', 'Payment')
+    for nombre in ('Reservation', 'ReservationArchive'):
+        modelo = apps.get_model('reservations', nombre)
+        reservas = modelo.objects.filter(paid_amount__gt=0).order_by('pk').values_list('pk', 'paid_amount', 'created_by_id')
+        lote = []
+        for pk, monto, creado_por in reservas.iterator(chunk_size=2000):
+            lote.append(Payment(
+                reservation_id=pk, amount=monto, created_by_id=creado_por,
+                reference='Saldo anterior al libro de pagos',
+            ))
+            if len(lote) >= 2000:
+                Payment.objects.bulk_create(lote)
+                lote = []
+        Payment.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_reservationarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Monto')),
+                ('method', models.CharField(choices=[('cash', 'Efectivo'), ('card', 'Tarjeta'), ('transfer', 'Transferencia')], default='cash', max_length=20, verbose_name='Medio de pago')),
+                ('reference', models.CharField(blank=True, default='', max_length=100, verbose_name='Referencia')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de pago')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Registrado por')),
+                ('reservation', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='payments', to='reservations.reservation', verbose_name='Reservación')),
+            ],
+            options={
+                'verbose_name': 'Pago',
+                'verbose_name_plural': 'Pagos',
+                'ordering': ['created_at', 'id'],
+                'constraints': [models.CheckConstraint(condition=models.Q(('amount__gt', 0)), name='payment_amount_positive')],
+            },
+        ),
+        migrations.RunPython(crear_pagos_iniciales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+INDICES = {
+    'reservation_status_created': 'reservations_reservation',
+    'reservation_arch_status_crtd': 'reservations_reservationarchive',
+}
+
+
+def cubrir_paid_amount(apps, schema_editor):
+    # INCLUDE solo existe en PostgreSQL: ahí el índice del reporte diario cubre también
+    # paid_amount (Index Only Scan); en otros motores queda como (status, created_at)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, tabla in INDICES.items():
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+        schema_editor.execute(f'CREATE INDEX {nombre} ON {tabla} (status, created_at) INCLUDE (paid_amount)')
+
+
+def descubrir_paid_amount(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, tabla in INDICES.items():
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+        schema_editor.execute(f'CREATE INDEX {nombre} ON {tabla} (status, created_at)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0008_payment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservationarchive',
+            index=models.Index(fields=['status', 'created_at'], name='reservation_arch_status_crtd'),
+        ),
+        migrations.RunPython(cubrir_paid_amount, descubrir_paid_amount),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-18 21:40
+
+from django.db import migrations
+
+INDICES = {
+    'reservation_arch_guest_name_trgm': 'guest_name',
+    'reservation_arch_guest_phone_trgm': 'guest_phone',
+}
+
+
+def crear_indices_trigramas(apps, schema_editor):
+    # La búsqueda de huéspedes también recorre el archivo (ver 0006 y reservations.busqueda)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nombre, campo in INDICES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nombre} ON reservations_reservationarchive '
+            f'USING gin ((UPPER({campo}::text)) gin_trgm_ops)'
+        )
+
+
+def eliminar_indices_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0009_reservation_report_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices_trigramas, eliminar_indices_trigramas),
+    ]
@@ -3,9 +3,22 @@ from django.conf import settings
 from rooms.models import Room
 from django.utils import timezone
 
-class Reservation(models.Model):
+
+class ReservationQuerySet(models.QuerySet):
+    def con_saldo(self):
+        """
+        Anota ``saldo_pendiente`` (total_amount - paid_amount) para filtrar y
+        ordenar por saldo en SQL, sin cargar las reservaciones
+        """
+        return self.annotate(saldo_pendiente=models.ExpressionWrapper(
+            models.F('total_amount') - models.F('paid_amount'),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ))
+
+
+class ReservationBase(models.Model):
     """
-    Modelo para reservaciones/ocupaciones de habitaciones
+    Campos comunes de las reservaciones activas y las archivadas
     """
     STATUS_CHOICES = [
         ('active', 'Activa'),
@@ -67,13 +80,14 @@ class Reservation(models.Model):
     )
     updated_at = models.DateTimeField(
         auto_now=True,
+        db_index=True,
         verbose_name='Fecha de actualización'
     )
     
+    objects = ReservationQuerySet.as_manager()
+    
     class Meta:
-        verbose_name = 'Reservación'
-        verbose_name_plural = 'Reservaciones'
-        ordering = ['-created_at']
+        abstract = True
         
     def __str__(self):
         return f"Reservación {self.id} - {self.guest_name} - {self.room}"
@@ -90,3 +104,133 @@ class Reservation(models.Model):
     def duration_hours(self):
         duration = self.check_out - self.check_in
         return duration.total_seconds() / 3600
+
+
+class Reservation(ReservationBase):
+    """
+    Modelo para reservaciones/ocupaciones de habitaciones
+    """
+    
+    class Meta:
+        verbose_name = 'Reservación'
+        verbose_name_plural = 'Reservaciones'
+        ordering = ['-created_at']
+        # En PostgreSQL la migración 0003 agrega además la exclusión GiST
+        # reservation_room_no_overlap (ver reservations/booking.py)
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(check_out__gt=models.F('check_in')),
+                name='reservation_check_out_after_check_in',
+            ),
+        ]
+        # Consultas frecuentes (ver reports/management/commands/verificar_planes.py)
+        indexes = [
+            # Reporte diario: status__in + rango de created_at; en PostgreSQL la migración 0009
+            # le agrega INCLUDE (paid_amount) y la suma sale solo del índice (ver reports/metricas.py)
+            models.Index(fields=['status', 'created_at'], name='reservation_status_created'),
+            # Reservaciones de una habitación por horario (solapamientos, disponibilidad)
+            models.Index(fields=['room', 'check_in'], name='reservation_room_check_in'),
+            # Listado ordenado por -created_at
+            models.Index(fields=['-created_at'], name='reservation_created_desc'),
+            # Barrido de vencidas: solo las activas, por check-out (ver reservations/vencimientos.py)
+            models.Index(
+                fields=['check_out'],
+                condition=models.Q(status='active'),
+                name='reservation_active_check_out',
+            ),
+        ]
+
+
+class ReservationArchive(ReservationBase):
+    """
+    Reservaciones completadas o canceladas movidas fuera de la tabla activa
+    (ver hotel_backend/archivo.py). Conservan su id original.
+    """
+    id = models.BigIntegerField(
+        primary_key=True
+    )
+    # Se copian tal cual: sin auto_now ni auto_now_add
+    created_at = models.DateTimeField(
+        verbose_name='Fecha de creación'
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Fecha de actualización'
+    )
+    archivado_en = models.DateTimeField(
+        verbose_name='Fecha de archivo'
+    )
+    
+    class Meta:
+        verbose_name = 'Reservación archivada'
+        verbose_name_plural = 'Reservaciones archivadas'
+        ordering = ['-created_at']
+        indexes = [
+            # Listados por rango de created_at (y la comprobación de si el rango llega al archivo)
+            models.Index(fields=['-created_at'], name='reservation_arch_created'),
+            models.Index(fields=['room', 'check_in'], name='reservation_arch_room_check_in'),
+            # Reporte diario de días ya archivados (con INCLUDE (paid_amount) en PostgreSQL)
+            models.Index(fields=['status', 'created_at'], name='reservation_arch_status_crtd'),
+        ]
+
+
+class Payment(models.Model):
+    """
+    Pago (abono) registrado sobre una reservación. ``Reservation.paid_amount``
+    es la suma de sus pagos y se actualiza en la misma transacción
+    (ver reservations/pagos.py)
+    """
+    METHOD_CHOICES = [
+        ('cash', 'Efectivo'),
+        ('card', 'Tarjeta'),
+        ('transfer', 'Transferencia'),
+    ]
+    
+    # Sin llave foránea en la base: los pagos se conservan cuando la
+    # reservación pasa al archivo (mismo id en ReservationArchive)
+    reservation = models.ForeignKey(
+        Reservation,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='payments',
+        verbose_name='Reservación'
+    )
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Monto'
+    )
+    method = models.CharField(
+        max_length=20,
+        choices=METHOD_CHOICES,
+        default='cash',
+        verbose_name='Medio de pago'
+    )
+    reference = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name='Referencia'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name='Registrado por'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de pago'
+    )
+    
+    class Meta:
+        verbose_name = 'Pago'
+        verbose_name_plural = 'Pagos'
+        ordering = ['created_at', 'id']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(amount__gt=0),
+                name='payment_amount_positive',
+            ),
+        ]
+        
+    def __str__(self):
+        return f"Pago {self.id} - Reservación {self.reservation_id} - {self.amount}"
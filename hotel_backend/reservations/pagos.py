@@ -0,0 +1,51 @@
+"""
+Registro de pagos sobre reservaciones.
+
+El pago se inserta en el libro (``Payment``) y ``paid_amount`` se incrementa
+con un solo ``UPDATE ... SET paid_amount = paid_amount + %s`` en la misma
+transacción, sin leer el valor antes: dos cajeros que registran abonos a la
+vez no se pisan. El mismo UPDATE exige que la reservación no esté cancelada
+y que el pago no supere el saldo pendiente; si no toca ninguna fila no se
+registra nada.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Payment, Reservation
+
+
+def _rechazo(reserva_id, monto):
+    reserva = Reservation.objects.filter(pk=reserva_id).values('status', 'total_amount', 'paid_amount').first()
+    if reserva is None:
+        mensaje = 'La reservación no existe'
+    elif reserva['status'] == 'cancelled':
+        mensaje = 'No se pueden registrar pagos en una reservación cancelada'
+    else:
+        saldo = reserva['total_amount'] - reserva['paid_amount']
+        mensaje = f'El pago ({monto}) excede el saldo pendiente ({saldo})'
+    return serializers.ValidationError({'amount': [mensaje]})
+
+
+def registrar_pago(reserva_id, registrado_por, amount, **datos):
+    """
+    Registra un pago de ``amount`` y devuelve (pago, {'total_amount',
+    'paid_amount'}) con los montos ya actualizados. Lanza ValidationError si
+    la reservación está cancelada o el pago excede el saldo.
+    """
+    with transaction.atomic():
+        actualizadas = (
+            Reservation.objects
+            .filter(pk=reserva_id, paid_amount__lte=F('total_amount') - amount)
+            .exclude(status='cancelled')
+            .update(paid_amount=F('paid_amount') + amount, updated_at=timezone.now())
+        )
+        if not actualizadas:
+            raise _rechazo(reserva_id, amount)
+        pago = Payment.objects.create(
+            reservation_id=reserva_id, created_by=registrado_por, amount=amount, **datos
+        )
+        # La fila quedó bloqueada por el UPDATE: estos montos son los que dejó este pago
+        montos = Reservation.objects.filter(pk=reserva_id).values('total_amount', 'paid_amount').get()
+    return pago, montos
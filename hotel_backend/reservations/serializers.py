@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+from hotel_backend.sparse_fields import SparseFieldsSerializerMixin
+from .models import Payment, Reservation
+
+class ReservationSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    room_numero = serializers.CharField(source='room.numero', read_only=True)
+    created_by = serializers.CharField(source='created_by.username', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    pending_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    duration_hours = serializers.FloatField(read_only=True)
+
+    sparse_dependencies = {
+        'status_display': ('status',),
+        'pending_amount': ('total_amount', 'paid_amount'),
+        'duration_hours': ('check_in', 'check_out'),
+    }
+
+    class Meta:
+        model = Reservation
+        fields = [
+            'id', 'room', 'room_numero', 'guest_name', 'guest_phone',
+            'check_in', 'check_out', 'duration_hours', 'total_amount', 'paid_amount',
+            'pending_amount', 'status', 'status_display', 'notes',
+            'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Después de crearla, paid_amount solo cambia con pagos (POST /api/reservations/{id}/pagos/)
+        if self.instance is not None:
+            fields['paid_amount'].read_only = True
+        return fields
+
+    def validate(self, data):
+        check_in = data.get('check_in', getattr(self.instance, 'check_in', None))
+        check_out = data.get('check_out', getattr(self.instance, 'check_out', None))
+        if check_in and check_out and check_out <= check_in:
+            raise serializers.ValidationError({'check_out': 'El check-out debe ser posterior al check-in'})
+        enviado = getattr(self, 'initial_data', {}).get('paid_amount')
+        if (self.instance is not None and enviado is not None
+                and self.fields['paid_amount'].to_internal_value(enviado) != self.instance.paid_amount):
+            raise serializers.ValidationError({
+                'paid_amount': 'Registre los abonos con POST /api/reservations/{id}/pagos/'
+            })
+        total_amount = data.get('total_amount', getattr(self.instance, 'total_amount', None))
+        paid_amount = data.get('paid_amount', getattr(self.instance, 'paid_amount', 0))
+        if total_amount is not None and paid_amount > total_amount:
+            raise serializers.ValidationError({'paid_amount': 'El monto pagado no puede superar el monto total'})
+        return data
+
+    def update(self, instance, validated_data):
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        # Solo las columnas enviadas: paid_amount lo incrementa registrar_pago con un UPDATE
+        # en la base y reescribir el valor leído borraría los pagos registrados mientras tanto
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        instance.refresh_from_db(fields=['paid_amount'])
+        return instance
+
+
+class PaymentSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source='created_by.username', read_only=True)
+    method_display = serializers.CharField(source='get_method_display', read_only=True)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+    class Meta:
+        model = Payment
+        fields = ['id', 'reservation', 'amount', 'method', 'method_display', 'reference', 'created_by', 'created_at']
+        read_only_fields = ['id', 'reservation', 'created_at']
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from rooms.models import Room
+from .models import Payment, Reservation, ReservationArchive
+from .availability import availability_index
+from .busqueda import guest_search_index
+
+
+@receiver(post_save, sender=Reservation)
+def actualizar_indice_disponibilidad(sender, instance, **kwargs):
+    """
+    Mantiene el índice de disponibilidad al crear o modificar una reservación
+    """
+    if not availability_index.construido:
+        return
+    datos = (instance.pk, instance.room_id, instance.check_in, instance.check_out,
+             instance.status, instance.updated_at)
+    transaction.on_commit(lambda: availability_index.registrar(*datos))
+
+
+@receiver(post_delete, sender=Reservation)
+def retirar_del_indice_disponibilidad(sender, instance, **kwargs):
+    """
+    Retira la reservación eliminada del índice de disponibilidad
+    """
+    if not availability_index.construido:
+        return
+    reserva_id = instance.pk
+    transaction.on_commit(lambda: availability_index.eliminar(reserva_id))
+
+
+@receiver(post_save, sender=Reservation)
+def actualizar_indice_busqueda(sender, instance, **kwargs):
+    """
+    Mantiene el índice de búsqueda de huéspedes (solo se construye fuera de PostgreSQL)
+    """
+    if not guest_search_index.construido:
+        return
+    datos = (instance.pk, instance.guest_name, instance.guest_phone,
+             instance.created_at, instance.updated_at)
+    transaction.on_commit(lambda: guest_search_index.registrar(*datos))
+
+
+@receiver(post_delete, sender=Reservation)
+def retirar_del_indice_busqueda(sender, instance, **kwargs):
+    """
+    Retira la reservación eliminada del índice de búsqueda de huéspedes
+    """
+    if not guest_search_index.construido:
+        return
+    reserva_id = instance.pk
+    transaction.on_commit(lambda: guest_search_index.eliminar(reserva_id))
+
+
+@receiver(pre_delete, sender=Room)
+def borrar_pagos_de_habitacion(sender, instance, **kwargs):
+    """
+    Borrar una habitación borra en cascada sus reservaciones (activas y
+    archivadas); los pagos no tienen llave foránea en la base y se borran aquí
+    """
+    reservas = [
+        *Reservation.objects.filter(room=instance).values_list('pk', flat=True),
+        *ReservationArchive.objects.filter(room=instance).values_list('pk', flat=True),
+    ]
+    Payment.objects.filter(reservation_id__in=reservas).delete()
@@ -1,3 +1,596 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import importlib
+import json
+import random
+import threading
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from hotel_backend import archivo
+from hotel_backend.response_cache import response_cache
+from reservations import booking, busqueda, exportacion, pagos, vencimientos
+from reservations.availability import AvailabilityIndex
+from reservations.busqueda import GuestSearchIndex
+from reservations.models import Payment, Reservation, ReservationArchive
+from reservations.serializers import ReservationSerializer
+from rooms import events
+from rooms.models import Room, RoomType
+
+
+def crear_habitacion_con_reservacion():
+    """
+    Usuario admin, habitación 101 y una reservación de 3 horas desde ahora.
+
+    Devuelve (usuario, room, reserva).
+    """
+    usuario = User.objects.create_user(username='recepcion', password='x', role='admin')
+    tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+    room = Room.objects.create(numero='101', tipo_habitacion=tipo)
+    ahora = timezone.now()
+    reserva = Reservation.objects.create(
+        room=room, created_by=usuario, guest_name='Ana Gómez',
+        check_in=ahora, check_out=ahora + timedelta(hours=3), total_amount=Decimal('100000'),
+    )
+    return usuario, room, reserva
+
+
+class PagosTestCase(TestCase):
+
+    def setUp(self):
+        self.usuario, self.room, self.reserva = crear_habitacion_con_reservacion()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def _libro(self, reserva_id):
+        return Payment.objects.filter(reservation_id=reserva_id).aggregate(total=Sum('amount'))['total']
+
+
+class ActualizacionConPagosTests(PagosTestCase):
+
+    def test_actualizar_no_reescribe_paid_amount_leido(self):
+        serializer = ReservationSerializer(
+            Reservation.objects.get(pk=self.reserva.pk), data={'notes': 'llega tarde'}, partial=True
+        )
+        # Un pago confirmado entre la lectura y el guardado
+        pagos.registrar_pago(self.reserva.pk, self.usuario, Decimal('50000'))
+        serializer.is_valid(raise_exception=True)
+        reserva = serializer.save()
+
+        self.assertEqual(reserva.paid_amount, Decimal('50000'))
+        self.assertEqual(Reservation.objects.get(pk=self.reserva.pk).paid_amount, Decimal('50000'))
+        self.assertEqual(self._libro(self.reserva.pk), Decimal('50000'))
+        self.assertEqual(Reservation.objects.get(pk=self.reserva.pk).notes, 'llega tarde')
+
+    def test_paid_amount_no_se_edita_por_patch(self):
+        respuesta = self.client.patch(
+            f'/api/reservations/{self.reserva.pk}/', {'paid_amount': '10000'}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('paid_amount', respuesta.json())
+        self.assertEqual(Reservation.objects.get(pk=self.reserva.pk).paid_amount, Decimal('0'))
+
+
+class PagosIniciales0008Tests(PagosTestCase):
+
+    def test_un_pago_de_apertura_por_reservacion_con_saldo(self):
+        Reservation.objects.filter(pk=self.reserva.pk).update(paid_amount=Decimal('30000'))
+        migracion = importlib.import_module('reservations.migrations.0008_payment')
+        migracion.crear_pagos_iniciales(apps, None)
+
+        self.assertEqual(list(Payment.objects.values_list('reservation_id', 'amount')),
+                         [(self.reserva.pk, Decimal('30000'))])
+
+
+class PagosYArchivoTests(PagosTestCase):
+
+    def setUp(self):
+        super().setUp()
+        pagos.registrar_pago(self.reserva.pk, self.usuario, Decimal('20000'))
+        Reservation.objects.filter(pk=self.reserva.pk).update(status='completed')
+        archivo.archivar(Reservation, ReservationArchive, Q(pk=self.reserva.pk))
+
+    def test_pagos_de_reservacion_archivada(self):
+        respuesta = self.client.get(f'/api/reservations/{self.reserva.pk}/pagos/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([pago['amount'] for pago in respuesta.json()], ['20000.00'])
+
+        respuesta = self.client.post(f'/api/reservations/{self.reserva.pk}/pagos/', {'amount': '1000'}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self._libro(self.reserva.pk), Decimal('20000'))
+
+    def test_borrar_habitacion_borra_pagos(self):
+        ahora = timezone.now()
+        activa = Reservation.objects.create(
+            room=self.room, created_by=self.usuario, guest_name='Luis Pérez',
+            check_in=ahora + timedelta(days=1), check_out=ahora + timedelta(days=1, hours=2),
+            total_amount=Decimal('50000'),
+        )
+        pagos.registrar_pago(activa.pk, self.usuario, Decimal('5000'))
+
+        self.room.delete()
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(ReservationArchive.objects.exists())
+
+
+class SincronizacionDisponibilidadTests(TestCase):
+    """Una reservación de otro proceso confirmada detrás de la marca también entra al índice."""
+
+    def setUp(self):
+        self.usuario, self.room, self.reserva = crear_habitacion_con_reservacion()
+
+    def test_escritura_confirmada_tarde(self):
+        indice = AvailabilityIndex(ttl=3600)
+        indice.reconstruir()
+        otra = Room.objects.create(numero='102', tipo_habitacion=self.room.tipo_habitacion)
+        desde, hasta = self.reserva.check_in, self.reserva.check_out
+
+        ahora = timezone.now()
+        nueva = Reservation.objects.create(
+            room=self.room, created_by=self.usuario, guest_name='Luis Pérez',
+            check_in=ahora + timedelta(days=1), check_out=ahora + timedelta(days=1, hours=2),
+            total_amount=Decimal('50000'),
+        )
+        indice.sincronizar()
+        tardia = Reservation.objects.create(
+            room=otra, created_by=self.usuario, guest_name='Eva Ruiz',
+            check_in=desde, check_out=hasta, total_amount=Decimal('50000'),
+        )
+        # Como una transacción lenta: confirma con un updated_at ya superado por la marca
+        Reservation.objects.filter(pk=tardia.pk).update(updated_at=nueva.updated_at - timedelta(seconds=1))
+        indice.sincronizar()
+
+        self.assertEqual(indice.habitaciones_libres([self.room.pk, otra.pk], desde, hasta), [])
+
+
+class BusquedaHuespedesTests(TestCase):
+
+    def setUp(self):
+        self.usuario, self.room, self.reserva = crear_habitacion_con_reservacion()
+
+    def _reservar(self, nombre, dias):
+        inicio = timezone.now() + timedelta(days=dias)
+        reserva = Reservation.objects.create(
+            room=self.room, created_by=self.usuario, guest_name=nombre,
+            check_in=inicio, check_out=inicio + timedelta(hours=2), total_amount=Decimal('50000'),
+        )
+        Reservation.objects.filter(pk=reserva.pk).update(created_at=inicio)
+        return reserva.pk
+
+    def test_solo_puntua_las_coincidencias_mas_recientes(self):
+        exacta = self._reservar('Marta', 1)
+        recientes = [self._reservar(f'Marta Robles Salgado {i}', 2 + i) for i in range(3)]
+        indice = GuestSearchIndex(ttl=3600)
+        indice.reconstruir()
+
+        todas = [reserva_id for reserva_id, _ in indice.buscar('marta', limite=10, candidatos=10)]
+        self.assertEqual(todas[0], exacta)
+        # La coincidencia exacta es la más antigua: queda fuera de los 3 candidatos
+        acotadas = [reserva_id for reserva_id, _ in indice.buscar('marta', limite=10, candidatos=3)]
+        self.assertEqual(acotadas, recientes[::-1])
+
+    def test_reconstruccion_vencida_no_bloquea_la_busqueda(self):
+        indice = GuestSearchIndex(ttl=0)
+        indice.reconstruir()
+        liberar = threading.Event()
+        hilos = []
+
+        def reconstruir_lento():
+            hilos.append(threading.current_thread())
+            liberar.wait(5)
+
+        with mock.patch.object(indice, 'reconstruir', side_effect=reconstruir_lento):
+            indice.sincronizar()
+            indice.sincronizar()
+            # Sigue respondiendo con el índice anterior mientras el hilo trabaja
+            self.assertEqual([reserva_id for reserva_id, _ in indice.buscar('gómez')], [self.reserva.pk])
+            liberar.set()
+            for hilo in hilos:
+                hilo.join()
+        # Una sola reconstrucción en curso, fuera del hilo de la petición
+        self.assertEqual(len(hilos), 1)
+        self.assertIsNot(hilos[0], threading.current_thread())
+
+    def test_encuentra_reservaciones_archivadas(self):
+        vieja = self._reservar('Marta Robles', -400)
+        Reservation.objects.filter(pk=vieja).update(status='completed')
+        archivo.archivar(Reservation, ReservationArchive, Q(pk=vieja))
+        self.assertFalse(Reservation.objects.filter(pk=vieja).exists())
+        indice = GuestSearchIndex(ttl=3600)
+        indice.reconstruir()
+
+        self.assertEqual([reserva_id for reserva_id, _ in indice.buscar('robles')], [vieja])
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        with mock.patch.object(busqueda, 'guest_search_index', indice):
+            response = client.get('/api/reservations/buscar/', {'q': 'robles'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['id'], item['guest_name']) for item in response.data], [(vieja, 'Marta Robles')])
+
+
+class BarridoVencidasTests(TestCase):
+    """El barrido con un corte anterior marca updated_at con la hora real de cada lote."""
+
+    def setUp(self):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        usuario = User.objects.create_user(username='barrido', password='x', role='receptionist')
+        self.client = APIClient()
+        self.client.force_authenticate(usuario)
+        tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='201', tipo_habitacion=tipo, estado='ocupada')
+        ahora = timezone.now()
+        Reservation.objects.create(
+            room=self.room, created_by=usuario, guest_name='Ana Gómez',
+            check_in=ahora - timedelta(hours=5), check_out=ahora - timedelta(hours=2),
+            total_amount=Decimal('100000'),
+        )
+        self.room.refresh_from_db()
+        # Escrituras posteriores: el máximo de updated_at de cada tabla es de otra fila
+        otra = Room.objects.create(numero='202', tipo_habitacion=tipo)
+        Reservation.objects.create(
+            room=otra, created_by=usuario, guest_name='Luis Pérez',
+            check_in=ahora + timedelta(days=1), check_out=ahora + timedelta(days=1, hours=2),
+            total_amount=Decimal('50000'),
+        )
+        # Corte anterior a la última escritura (p. ej. pasado por el llamador)
+        self.corte = ahora - timedelta(hours=1)
+
+    def test_etag_de_los_listados_cambia(self):
+        etags = {url: self.client.get(url)['ETag'] for url in ('/api/rooms/', '/api/reservations/')}
+        resultado = vencimientos.barrer_vencidas(ahora=self.corte)
+        self.assertEqual((resultado['reservaciones'], resultado['habitaciones_a_limpieza']), (1, 1))
+
+        for url, etag in etags.items():
+            with self.subTest(url):
+                respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertNotEqual(respuesta['ETag'], etag)
+
+    @override_settings(ROOM_EVENTS_HEARTBEAT=0.2)
+    def test_habitaciones_aparecen_al_reanudar_eventos(self):
+        # El cliente ya recibió hasta la última escritura
+        ultima = Room.objects.order_by('-updated_at', '-id').values_list('updated_at', 'id').first()
+        ultimo_id = '%d-%d' % events._clave(*ultima)
+        vencimientos.barrer_vencidas(ahora=self.corte)
+
+        async def escenario():
+            stream = events.RoomEventBroker().stream(ultimo_id)
+            self.assertTrue((await stream.__anext__()).startswith('retry: '))
+            recibidos = []
+            try:
+                # La puesta al día llega antes del primer ping
+                while (texto := await asyncio.wait_for(stream.__anext__(), timeout=5)) != ': ping\n\n':
+                    recibidos.append(json.loads(texto.split('data: ', 1)[1]))
+            finally:
+                await stream.aclose()
+            return recibidos
+
+        eventos = async_to_sync(escenario)()
+        self.assertIn(('201', 'limpieza'), [(evento['numero'], evento['estado']) for evento in eventos])
+
+class SolapamientoTests(TestCase):
+    """Una ventana encimada con otra reservación no cancelada de la habitación responde 409."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='solapamiento', password='x', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='301', tipo_habitacion=tipo)
+        self.inicio = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.existente = Reservation.objects.create(
+            room=self.room, created_by=self.usuario, guest_name='Ana Gómez',
+            check_in=self.inicio, check_out=self.inicio + timedelta(hours=3), total_amount=Decimal('40000'),
+        )
+
+    def _datos(self, desde, horas, **extra):
+        check_in = self.inicio + timedelta(hours=desde)
+        return {
+            'room': self.room.pk, 'guest_name': 'Luis Pérez', 'total_amount': '40000',
+            'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(hours=horas)).isoformat(),
+            **extra,
+        }
+
+    def _cuerpo_409(self):
+        return {'success': False, 'error': booking.ReservaSolapada.default_detail, 'conflictos': [self.existente.pk]}
+
+    def test_alta_solapada_responde_409(self):
+        respuesta = self.client.post('/api/reservations/', self._datos(2, 2), format='json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json(), self._cuerpo_409())
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_edicion_solapada_responde_409(self):
+        creada = self.client.post('/api/reservations/', self._datos(5, 2), format='json')
+        self.assertEqual(creada.status_code, 201)
+        reserva_id = creada.json()['id']
+
+        respuesta = self.client.patch(
+            f'/api/reservations/{reserva_id}/', {'check_in': self._datos(2, 2)['check_in']}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json(), self._cuerpo_409())
+        self.assertEqual(Reservation.objects.get(pk=reserva_id).check_in, self.inicio + timedelta(hours=5))
+
+    def test_ventanas_contiguas_y_canceladas_no_chocan(self):
+        # [check_in, check_out) es semiabierto: empezar a la hora de salida no se solapa
+        self.assertEqual(self.client.post('/api/reservations/', self._datos(3, 2), format='json').status_code, 201)
+        cancelada = self._datos(1, 1, status='cancelled')
+        self.assertEqual(self.client.post('/api/reservations/', cancelada, format='json').status_code, 201)
+        self.assertEqual(booking.solapamientos([self.room.pk]), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'La restricción de exclusión solo existe en PostgreSQL')
+    def test_violacion_de_la_restriccion_se_traduce_a_409(self):
+        # La base rechaza el INSERT aunque nadie haya verificado antes
+        with self.assertRaises(IntegrityError) as contexto, transaction.atomic():
+            Reservation.objects.create(
+                room=self.room, created_by=self.usuario, guest_name='Luis Pérez',
+                check_in=self.inicio + timedelta(hours=1), check_out=self.inicio + timedelta(hours=2),
+                total_amount=Decimal('40000'),
+            )
+        self.assertTrue(booking._es_solapamiento(contexto.exception))
+
+        serializer = ReservationSerializer(data=self._datos(2, 2))
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(booking.ReservaSolapada) as contexto:
+            booking.guardar(serializer, created_by=self.usuario)
+        self.assertEqual(contexto.exception.detail, self._cuerpo_409())
+
+
+class ReservasConcurrentesTests(TransactionTestCase):
+    """Varios hilos reservan ventanas encimadas de la misma habitación: nunca quedan dos solapadas."""
+    HILOS = 8
+    INTENTOS = 10
+
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='concurrencia', password='x', role='admin')
+        tipo = RoomType.objects.create(nombre='Concurrencia', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='401', tipo_habitacion=tipo)
+
+    def test_hilos_no_crean_solapamientos(self):
+        inicio = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+        resultados = Counter()
+        errores = []
+        lock = threading.Lock()
+
+        def trabajar(numero_hilo):
+            aleatorio = random.Random(numero_hilo)
+            locales = Counter()
+            try:
+                for _ in range(self.INTENTOS):
+                    check_in = inicio + timedelta(hours=aleatorio.randrange(12))
+                    serializer = ReservationSerializer(data={
+                        'room': self.room.pk, 'guest_name': f'Huésped {numero_hilo}', 'total_amount': '40000',
+                        'check_in': check_in, 'check_out': check_in + timedelta(hours=aleatorio.randint(1, 3)),
+                    })
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        booking.guardar(serializer, created_by=self.usuario)
+                        locales['creadas'] += 1
+                    except booking.ReservaSolapada as error:
+                        self.assertTrue(error.detail['conflictos'])
+                        locales['rechazadas'] += 1
+            except Exception as error:
+                with lock:
+                    errores.append(f'{type(error).__name__}: {error}')
+            finally:
+                connection.close()
+                with lock:
+                    resultados.update(locales)
+
+        hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(resultados['creadas'] + resultados['rechazadas'], self.HILOS * self.INTENTOS)
+        self.assertGreater(resultados['rechazadas'], 0)
+        self.assertEqual(Reservation.objects.filter(room=self.room).count(), resultados['creadas'])
+        self.assertEqual(booking.solapamientos([self.room.pk]), [])
+
+class ArchivoHistoricoTests(TestCase):
+
+    def setUp(self):
+        self.usuario, self.room, self.reciente = crear_habitacion_con_reservacion()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.ahora = timezone.now()
+        self.completada = self._reservar('Completada', 400, 'completed')
+        self.cancelada = self._reservar('Cancelada', 300, 'cancelled')
+        # Activa y vieja: no se archiva aunque pase el horizonte
+        self.vieja_activa = self._reservar('Activa vieja', 250, 'active')
+        self.completada_reciente = self._reservar('Completada reciente', 10, 'completed')
+
+    def _reservar(self, nombre, dias_atras, estado):
+        inicio = self.ahora - timedelta(days=dias_atras)
+        reserva = Reservation.objects.create(
+            room=self.room, created_by=self.usuario, guest_name=nombre, status=estado,
+            check_in=inicio, check_out=inicio + timedelta(hours=3),
+            total_amount=Decimal('100000'), paid_amount=Decimal('40000.50'),
+        )
+        Reservation.objects.filter(pk=reserva.pk).update(created_at=inicio)
+        return reserva.pk
+
+    def _archivar(self):
+        salida = StringIO()
+        call_command('archivar_historicos', '--solo', 'reservaciones', '--lote', '1', '--dias', '180', stdout=salida)
+        return salida.getvalue()
+
+    def test_mueve_solo_cerradas_anteriores_al_horizonte(self):
+        columnas = [campo.attname for campo in Reservation._meta.concrete_fields]
+        antes = {fila['id']: fila for fila in Reservation.objects.values(*columnas)}
+
+        self.assertIn('reservaciones: 2 archivadas en 2 lotes', self._archivar())
+        self.assertEqual(set(ReservationArchive.objects.values_list('id', flat=True)), {self.completada, self.cancelada})
+        self.assertEqual(
+            set(Reservation.objects.values_list('id', flat=True)),
+            {self.reciente.pk, self.vieja_activa, self.completada_reciente},
+        )
+        # Mismos ids y mismos valores en el archivo
+        for fila in ReservationArchive.objects.values(*columnas):
+            self.assertEqual(fila, antes[fila['id']])
+        # Idempotente
+        self.assertIn('reservaciones: 0 archivadas', self._archivar())
+
+    def test_listado_une_el_archivo_solo_si_el_rango_lo_pide(self):
+        self._archivar()
+
+        respuesta = self.client.get('/api/reservations/')
+        self.assertEqual({r['id'] for r in respuesta.data['results']},
+                         {self.reciente.pk, self.vieja_activa, self.completada_reciente})
+
+        desde = (self.ahora - timedelta(days=500)).isoformat()
+        respuesta = self.client.get('/api/reservations/', {'desde': desde})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r['id'] for r in respuesta.data['results']], [
+            self.reciente.pk, self.completada_reciente, self.vieja_activa, self.cancelada, self.completada,
+        ])
+
+        respuesta = self.client.get('/api/reservations/', {
+            'desde': desde, 'hasta': (self.ahora - timedelta(days=350)).isoformat(),
+        })
+        self.assertEqual([r['id'] for r in respuesta.data['results']], [self.completada])
+
+    def test_detalle_de_archivada_es_de_solo_lectura(self):
+        self._archivar()
+
+        respuesta = self.client.get(f'/api/reservations/{self.completada}/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((respuesta.data['guest_name'], respuesta.data['paid_amount']), ('Completada', '40000.50'))
+
+        respuesta = self.client.patch(f'/api/reservations/{self.completada}/', {'notes': 'x'}, format='json')
+        self.assertEqual(respuesta.status_code, 404)
+        self.assertIsNone(ReservationArchive.objects.get(pk=self.completada).notes)
+
+class ExportacionTests(TestCase):
+
+    def setUp(self):
+        self.usuario, self.room, self.reciente = crear_habitacion_con_reservacion()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        inicio = timezone.now() - timedelta(days=400)
+        vieja = Reservation.objects.create(
+            room=self.room, created_by=self.usuario, guest_name='José "Pepe", Núñez', status='completed',
+            check_in=inicio, check_out=inicio + timedelta(hours=3), total_amount=Decimal('100000'),
+            paid_amount=Decimal('40000.5'), notes='Línea 1\nLínea 2',
+        )
+        Reservation.objects.filter(pk=vieja.pk).update(created_at=inicio)
+        archivo.archivar(Reservation, ReservationArchive, Q(pk=vieja.pk))
+        self.vieja = vieja.pk
+        self.rango = {
+            'desde': (inicio - timedelta(days=1)).isoformat(),
+            'hasta': (timezone.now() + timedelta(days=1)).isoformat(),
+        }
+
+    def _exportar(self, **parametros):
+        respuesta = self.client.get('/api/reservations/export/', parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        contenido = b''.join(respuesta.streaming_content)
+        if respuesta['Content-Type'] == 'application/gzip':
+            contenido = gzip.decompress(contenido)
+        return respuesta, contenido
+
+    def test_csv_une_activas_y_archivadas(self):
+        respuesta, contenido = self._exportar(**self.rango)
+
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(contenido.startswith('\ufeff'.encode()))
+        filas = list(csv.DictReader(StringIO(contenido.decode('utf-8-sig'))))
+        self.assertEqual([int(fila['id']) for fila in filas], [self.vieja, self.reciente.pk])
+        archivada = filas[0]
+        self.assertEqual(
+            (archivada['guest_name'], archivada['notes'], archivada['paid_amount'], archivada['room_numero']),
+            ('José "Pepe", Núñez', 'Línea 1\nLínea 2', '40000.50', '101'),
+        )
+        self.assertEqual(archivada['created_by'], 'recepcion')
+
+    def test_ndjson_con_gzip(self):
+        respuesta, contenido = self._exportar(formato='ndjson', gzip='true', **self.rango)
+
+        self.assertEqual(respuesta['Content-Type'], 'application/gzip')
+        self.assertIn('.ndjson.gz"', respuesta['Content-Disposition'])
+        filas = [json.loads(linea) for linea in contenido.decode().splitlines()]
+        self.assertEqual([fila['id'] for fila in filas], [self.vieja, self.reciente.pk])
+        # Mismos formatos que la API
+        detalle = self.client.get(f'/api/reservations/{self.reciente.pk}/').data
+        for campo in ('check_in', 'check_out', 'total_amount', 'paid_amount', 'created_at', 'updated_at'):
+            self.assertEqual(filas[1][campo], detalle[campo])
+
+    def test_rango_vacio(self):
+        vacio = {'desde': '2001-01-01', 'hasta': '2001-02-01'}
+        for formato, comprimir, esperado in (
+            ('csv', '', '\ufeff'.encode() + b','.join(nombre.encode() for nombre, _ in exportacion.CAMPOS) + b'\r\n'),
+            ('csv', 'true', '\ufeff'.encode() + b','.join(nombre.encode() for nombre, _ in exportacion.CAMPOS) + b'\r\n'),
+            ('ndjson', '', b''),
+            ('ndjson', 'true', b''),
+        ):
+            with self.subTest(formato=formato, gzip=comprimir):
+                respuesta, contenido = self._exportar(formato=formato, gzip=comprimir, **vacio)
+                self.assertEqual(contenido, esperado)
+                self.assertIn('reservaciones_2001-01-01_2001-02-01', respuesta['Content-Disposition'])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/reservations/export/', {'formato': 'xlsx'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reservations/export/', {'desde': 'enero'}).status_code, 400)
+
+class IdempotenciaTests(PagosTestCase):
+
+    def _pagar(self, clave, monto):
+        return self.client.post(
+            f'/api/reservations/{self.reserva.pk}/pagos/', {'amount': monto}, format='json',
+            HTTP_IDEMPOTENCY_KEY=clave,
+        )
+
+    def test_reintento_devuelve_la_respuesta_guardada(self):
+        primera = self._pagar('9f1c-pago-1', '1000')
+        self.assertEqual(primera.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', primera)
+
+        reintento = self._pagar('9f1c-pago-1', '1000')
+        self.assertEqual(reintento.status_code, 201)
+        self.assertEqual(reintento['Idempotent-Replayed'], 'true')
+        self.assertEqual(reintento.json(), primera.json())
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(self._libro(self.reserva.pk), Decimal('1000'))
+
+    def test_misma_clave_con_otro_cuerpo_es_conflicto(self):
+        self._pagar('9f1c-pago-2', '1000')
+
+        respuesta = self._pagar('9f1c-pago-2', '2000')
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertIn('Idempotency-Key', respuesta.json()['error'])
+        self.assertEqual(self._libro(self.reserva.pk), Decimal('1000'))
+
+    def test_rechazo_no_se_recuerda(self):
+        self.assertEqual(self._pagar('9f1c-pago-3', '-5').status_code, 400)
+
+        respuesta = self._pagar('9f1c-pago-3', '1000')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', respuesta)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=0)
+    def test_clave_vencida_se_reutiliza(self):
+        self._pagar('9f1c-pago-4', '1000')
+
+        respuesta = self._pagar('9f1c-pago-4', '1000')
+        self.assertNotIn('Idempotent-Replayed', respuesta)
+        self.assertEqual(self._libro(self.reserva.pk), Decimal('2000'))
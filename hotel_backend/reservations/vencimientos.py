@@ -0,0 +1,99 @@
+"""
+Cierre automático de reservaciones activas cuyo check-out ya pasó.
+
+``barrer_vencidas`` procesa las vencidas por lotes, cada uno en su propia
+transacción: toma las filas con ``FOR UPDATE SKIP LOCKED`` sobre el índice
+parcial de reservaciones activas (varios workers pueden barrer a la vez sin
+procesar la misma fila ni esperarse), las marca ``completed`` y pasa a
+``limpieza`` las habitaciones que seguían ``ocupada`` y no tienen otra
+reservación en curso, con su historial de estados. Volver a ejecutarlo no
+cambia nada: una reservación ya cerrada deja de estar en el índice.
+
+``ahora`` es solo el corte de check-out. Las filas tocadas llevan la hora real
+de cada lote en ``updated_at`` (y en el historial): los ETag de los listados,
+el stream de eventos y el índice de disponibilidad solo ven cambios posteriores
+a lo ya leído, y un ``ahora`` del pasado los dejaría atrás.
+"""
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from rooms import counters, versioning
+from rooms.events import room_events
+from rooms.history import HistoryBatch
+from rooms.models import Room
+from .models import Reservation
+
+TAMANO_LOTE = 500
+REGISTRADO_POR = 'sistema (vencimientos)'
+
+
+def _barrer_lote(ahora, tamano_lote):
+    marca = timezone.now()
+    with transaction.atomic(), HistoryBatch(REGISTRADO_POR, marca) as historial:
+        vencidas = list(
+            Reservation.objects.select_for_update(skip_locked=True)
+            .filter(status='active', check_out__lte=ahora)
+            .order_by('check_out')
+            .values_list('id', 'room_id')[:tamano_lote]
+        )
+        if not vencidas:
+            return 0, 0
+
+        Reservation.objects.filter(id__in=[reserva_id for reserva_id, _ in vencidas]).update(
+            status='completed', updated_at=marca
+        )
+
+        # Habitaciones con otra reservación activa en curso siguen ocupadas por el nuevo huésped
+        room_ids = {room_id for _, room_id in vencidas}
+        en_curso = set(Reservation.objects.filter(
+            room_id__in=room_ids, status='active', check_in__lte=ahora, check_out__gt=ahora
+        ).values_list('room_id', flat=True))
+        # Orden por id: dos workers que comparten habitaciones las bloquean en el mismo orden
+        ocupadas = list(
+            Room.objects.select_for_update()
+            .filter(id__in=room_ids - en_curso, estado='ocupada')
+            .order_by('id')
+            .values('id', 'numero', 'tipo_habitacion_id', 'piso')
+        )
+        if ocupadas:
+            Room.objects.filter(id__in=[room['id'] for room in ocupadas]).update(
+                estado='limpieza', version=F('version') + 1, updated_at=marca
+            )
+            deltas = Counter()
+            for room in ocupadas:
+                clave = (room['tipo_habitacion_id'], room['piso'])
+                deltas[('ocupada', *clave)] -= 1
+                deltas[('limpieza', *clave)] += 1
+                historial.agregar(room['id'], room['numero'], 'ocupada', 'limpieza')
+            counters.ajustar(deltas)
+            versioning.incrementar(Room)
+            transaction.on_commit(room_events.notificar)
+        return len(vencidas), len(ocupadas)
+
+
+def barrer_vencidas(ahora=None, tamano_lote=TAMANO_LOTE, max_segundos=None):
+    """
+    Cierra las reservaciones activas con check-out <= ``ahora`` por lotes de
+    ``tamano_lote``. Con ``max_segundos`` se detiene al agotar ese tiempo
+    (el resto queda para la siguiente ejecución).
+
+    Devuelve {'reservaciones': n, 'habitaciones_a_limpieza': n, 'lotes': n, 'completo': bool}.
+    """
+    ahora = ahora or timezone.now()
+    inicio = time.monotonic()
+    resultado = {'reservaciones': 0, 'habitaciones_a_limpieza': 0, 'lotes': 0, 'completo': False}
+    while True:
+        reservaciones, habitaciones = _barrer_lote(ahora, tamano_lote)
+        if not reservaciones:
+            resultado['completo'] = True
+            break
+        resultado['reservaciones'] += reservaciones
+        resultado['habitaciones_a_limpieza'] += habitaciones
+        resultado['lotes'] += 1
+        if max_segundos is not None and time.monotonic() - inicio >= max_segundos:
+            break
+    return resultado
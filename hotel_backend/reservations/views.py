@@ -1,3 +1,179 @@
-from django.shortcuts import render
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from accounts.permissions import IsReceptionistOrHigher
+from hotel_backend.fast_serializers import formateador_decimal
+from hotel_backend.idempotencia import idempotente
+from hotel_backend.mixins import ArchiveUnionMixin, ConditionalGetMixin, SparseFieldsMixin
+from .models import Payment, Reservation, ReservationArchive
+from .serializers import PaymentSerializer, ReservationSerializer
+from . import booking, busqueda, exportacion, pagos
 
-# Create your views here.
+
+class ReservationViewSet(ArchiveUnionMixin, ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
+    """
+    CRUD de reservaciones. Crear o mover una reservación a una ventana que
+    se solapa con otra no cancelada de la misma habitación responde 409.
+    Con ?desde=&hasta= (sobre created_at) el listado incluye las archivadas.
+    ?con_saldo=true deja las que deben dinero y ?ordenar=saldo ordena por
+    saldo pendiente (ambos en SQL, con Reservation.objects.con_saldo()).
+    """
+    queryset = Reservation.objects.select_related('room', 'created_by').all()
+    archive_model = ReservationArchive
+    serializer_class = ReservationSerializer
+    sparse_profiles = {
+        'compacto': ('id', 'room', 'room_numero', 'guest_name', 'check_in', 'check_out', 'status'),
+    }
+    conditional_fields = ('updated_at', 'room__updated_at')
+    permission_classes = [IsReceptionistOrHigher]
+
+    def get_queryset(self):
+        return self._filtrar(super().get_queryset())
+
+    def get_archive_queryset(self):
+        return self._filtrar(ReservationArchive.objects.select_related('room', 'created_by'))
+
+    def _filtrar(self, queryset):
+        room = self.request.query_params.get('room')
+        estado = self.request.query_params.get('status')
+
+        if room:
+            queryset = queryset.filter(room_id=room)
+        if estado:
+            queryset = queryset.filter(status=estado)
+
+        con_saldo = self.request.query_params.get('con_saldo', '').lower() in ('1', 'true', 'si', 'sí')
+        ordenar_por_saldo = self.request.query_params.get('ordenar') == 'saldo'
+        if con_saldo or ordenar_por_saldo:
+            queryset = queryset.con_saldo()
+        if con_saldo:
+            queryset = queryset.filter(saldo_pendiente__gt=0)
+        if ordenar_por_saldo:
+            queryset = queryset.order_by('-saldo_pendiente', '-created_at')
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        """
+        Búsqueda de huéspedes por nombre o teléfono parcial
+        URL: /api/reservations/buscar/?q=garc&limite=20
+        Ordenado por similitud y luego por fecha de creación (más recientes primero)
+        """
+        consulta = request.query_params.get('q', '').strip()
+        if len(consulta) < busqueda.MIN_CARACTERES:
+            return Response({'error': f'El parámetro q debe tener al menos {busqueda.MIN_CARACTERES} caracteres'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limite = request.query_params.get('limite', busqueda.LIMITE)
+        try:
+            limite = int(limite)
+        except (TypeError, ValueError):
+            limite = 0
+        if not 1 <= limite <= busqueda.LIMITE_MAXIMO:
+            return Response({'error': f'El parámetro limite debe estar entre 1 y {busqueda.LIMITE_MAXIMO}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        resultados = busqueda.buscar(consulta, limite)
+        ids = [reserva_id for reserva_id, _ in resultados]
+        reservas = self.queryset.in_bulk(ids)
+        archivadas = [reserva_id for reserva_id in ids if reserva_id not in reservas]
+        if archivadas:
+            reservas.update(ReservationArchive.objects.select_related('room', 'created_by').in_bulk(archivadas))
+        ordenadas = [reservas[reserva_id] for reserva_id, _ in resultados if reserva_id in reservas]
+        data = self.get_serializer(ordenadas, many=True).data
+        similitudes = dict(resultados)
+        for item, reserva in zip(data, ordenadas):
+            item['similitud'] = round(similitudes[reserva.pk], 3)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exportación completa en streaming, sin paginación (incluye las archivadas del rango)
+        URL: /api/reservations/export/?desde=2025-01-01&hasta=2025-02-01&formato=csv|ndjson&gzip=true
+        Acepta también los filtros del listado (?room=, ?status=)
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacion.FORMATOS:
+            return Response({'error': f'El parámetro formato debe ser uno de: {", ".join(exportacion.FORMATOS)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        rango, error = self._rango_archivo()
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        comprimir = request.query_params.get('gzip', '').lower() in ('1', 'true', 'si', 'sí')
+
+        filas = exportacion.consulta(
+            self.get_queryset().filter(**rango), self.get_archive_queryset().filter(**rango)
+        )
+        content_type, extension = exportacion.FORMATOS[formato]
+        nombre = '_'.join(['reservaciones'] + [
+            request.query_params[parametro][:10] for parametro in ('desde', 'hasta')
+            if request.query_params.get(parametro)
+        ]) + f'.{extension}'
+        if comprimir:
+            content_type, nombre = 'application/gzip', f'{nombre}.gz'
+        response = StreamingHttpResponse(exportacion.exportar(filas, formato, comprimir), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=True, methods=['get', 'post'])
+    @idempotente
+    def pagos(self, request, pk=None):
+        """
+        Pagos de una reservación
+        URL: /api/reservations/{id}/pagos/
+        POST body: {"amount": "20000", "method": "cash|card|transfer", "reference": "opcional"}
+        El pago y el aumento de paid_amount van en la misma transacción
+        """
+        try:
+            reserva = self.get_object()
+        except Http404:
+            # Los pagos de una reservación archivada se conservan (mismo id) y se pueden consultar
+            reserva = self.get_archived_object()
+            if request.method != 'GET':
+                return Response({'error': 'La reservación está archivada y es de solo lectura'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if request.method == 'GET':
+            historial = Payment.objects.filter(reservation_id=reserva.pk).select_related('created_by')
+            return Response(PaymentSerializer(historial, many=True).data)
+
+        serializer = PaymentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pago, montos = pagos.registrar_pago(reserva.pk, request.user, **serializer.validated_data)
+        monto = formateador_decimal(2, 10)
+        return Response({
+            'success': True,
+            'message': f'Pago de {pago.amount} registrado en la reservación {reserva.pk}',
+            'pago': PaymentSerializer(pago).data,
+            'reservacion': {
+                'id': reserva.pk,
+                'total_amount': monto(montos['total_amount']),
+                'paid_amount': monto(montos['paid_amount']),
+                'pending_amount': monto(montos['total_amount'] - montos['paid_amount']),
+            },
+        }, status=status.HTTP_201_CREATED)
+
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            reserva = booking.guardar(serializer, created_by=self.request.user)
+            # El abono inicial también queda en el libro de pagos
+            if reserva.paid_amount:
+                Payment.objects.create(
+                    reservation=reserva, amount=reserva.paid_amount, created_by=self.request.user,
+                    reference='Abono al crear la reservación',
+                )
+
+    def perform_update(self, serializer):
+        booking.guardar(serializer)
+
+    def perform_destroy(self, instance):
+        # Los pagos no tienen llave foránea en la base (sobreviven al archivo): se borran aquí
+        with transaction.atomic():
+            Payment.objects.filter(reservation_id=instance.pk).delete()
+            instance.delete()
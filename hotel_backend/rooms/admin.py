@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Room, RoomType
+from django.db import transaction
+from .models import Room, RoomType, RoomStatusHistory
+from .history import HistoryBatch
 
 @admin.register(RoomType)
 class RoomTypeAdmin(admin.ModelAdmin):
@@ -13,7 +15,7 @@ class RoomAdmin(admin.ModelAdmin):
     list_display = ('numero', 'tipo_habitacion', 'estado', 'precio_base', 'piso', 'created_at')
     list_filter = ('estado', 'tipo_habitacion', 'piso', 'created_at')
     search_fields = ('numero', 'descripcion', 'notas')
-    ordering = ('numero',)
+    ordering = ('numero_orden',)
     
     list_editable = ('estado',)
     
@@ -22,7 +24,7 @@ class RoomAdmin(admin.ModelAdmin):
             'fields': ('numero', 'tipo_habitacion', 'piso', 'descripcion')
         }),
         ('Precios y Horas', {
-            'fields': ('precio_base', 'precio_hora_adicional', 'horas_base', 'cobro_adicional')
+            'fields': ('precio_base', 'precio_hora_adicional', 'precio_personalizado', 'horas_base', 'cobro_adicional')
         }),
         ('Estado y Notas', {
             'fields': ('estado', 'notas')
@@ -34,3 +36,27 @@ class RoomAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ('created_at', 'updated_at')
+    
+    def save_model(self, request, obj, form, change):
+        # Los cambios de estado desde el admin (incluido list_editable) también quedan en el historial
+        estado_anterior = form.initial.get('estado') if change else None
+        with transaction.atomic(), HistoryBatch(request.user.username) as historial:
+            super().save_model(request, obj, form, change)
+            if change and 'estado' in form.changed_data:
+                historial.agregar(obj.id, obj.numero, estado_anterior, obj.estado)
+
+@admin.register(RoomStatusHistory)
+class RoomStatusHistoryAdmin(admin.ModelAdmin):
+    list_display = ('numero', 'estado_anterior', 'estado_nuevo', 'registrado_por', 'fecha_registro')
+    list_filter = ('estado_nuevo', 'registrado_por', 'fecha_registro')
+    search_fields = ('numero', 'registrado_por')
+    date_hierarchy = 'fecha_registro'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,165 @@
+"""
+Carga masiva de habitaciones (POST /api/rooms/bulk/ y ``manage.py import_rooms``).
+
+Las filas se procesan por lotes dentro de una sola transacción: por lote se
+validan sin consultar la base, se resuelven los tipos de habitación y los
+números ya existentes con una consulta cada uno y se insertan con
+``bulk_create``. Las filas con errores se informan sin detener el resto.
+"""
+import csv
+import io
+import json
+from collections import Counter
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .events import room_events
+from .models import Room, RoomType
+from .serializers import RoomBulkCreateItemSerializer
+from . import counters, versioning
+
+TAMANO_LOTE = 500
+
+
+def leer_csv(texto):
+    """
+    Filas (dict) de un CSV con encabezado; ``texto`` es un str o un archivo de texto.
+    """
+    if isinstance(texto, str):
+        texto = io.StringIO(texto)
+    yield from csv.DictReader(texto)
+
+
+def leer_json(texto):
+    """
+    Filas de un arreglo JSON o de JSON por líneas (una fila por línea).
+    """
+    if not isinstance(texto, str):
+        texto = texto.read()
+    if texto.lstrip().startswith('['):
+        yield from json.loads(texto)
+        return
+    for linea in texto.splitlines():
+        if linea.strip():
+            yield json.loads(linea)
+
+
+def _limpiar(fila):
+    # Las celdas vacías de un CSV cuentan como campos no enviados
+    if not isinstance(fila, dict):
+        return fila
+    return {clave: valor for clave, valor in fila.items() if clave and valor not in ('', None)}
+
+
+class _Importacion:
+    def __init__(self):
+        self.tipos = {}
+        self.numeros = set()
+        self.deltas = Counter()
+        self.creadas = []
+        self.errores = []
+
+    def error(self, fila, errores):
+        self.errores.append({'fila': fila, 'errores': errores})
+
+    def _resolver_tipos(self, claves):
+        faltantes = {clave for clave in claves if clave not in self.tipos}
+        if not faltantes:
+            return
+        ids = [clave for clave in faltantes if clave.isdigit()]
+        for tipo in RoomType.objects.filter(Q(id__in=ids) | Q(nombre__in=faltantes)):
+            self.tipos[str(tipo.id)] = tipo
+            self.tipos[tipo.nombre] = tipo
+
+    def procesar(self, lote):
+        validas = []
+        for numero_fila, fila in lote:
+            serializer = RoomBulkCreateItemSerializer(data=_limpiar(fila))
+            if not serializer.is_valid():
+                self.error(numero_fila, serializer.errors)
+                continue
+            datos = serializer.validated_data
+            if datos['numero'] in self.numeros:
+                self.error(numero_fila, {'numero': ['Número repetido en la carga']})
+                continue
+            self.numeros.add(datos['numero'])
+            validas.append((numero_fila, datos))
+
+        self._resolver_tipos({datos['tipo_habitacion'] for _, datos in validas})
+        existentes = set(Room.objects.filter(
+            numero__in=[datos['numero'] for _, datos in validas]
+        ).values_list('numero', flat=True))
+
+        nuevas = []
+        for numero_fila, datos in validas:
+            tipo = self.tipos.get(datos['tipo_habitacion'])
+            if tipo is None:
+                self.error(numero_fila, {'tipo_habitacion': ['Tipo de habitación no encontrado']})
+            elif datos['numero'] in existentes:
+                self.error(numero_fila, {'numero': ['Ya existe una habitación con este número']})
+            else:
+                nuevas.append((numero_fila, Room(
+                    numero=datos['numero'],
+                    tipo_habitacion=tipo,
+                    estado=datos['estado'],
+                    piso=datos['piso'],
+                    notas=datos.get('notas'),
+                    **tipo.valores_habitacion()
+                )))
+        self._insertar(nuevas)
+
+    def _insertar(self, nuevas):
+        if not nuevas:
+            return
+        try:
+            with transaction.atomic():
+                Room.objects.bulk_create([room for _, room in nuevas])
+            insertadas = nuevas
+        except IntegrityError:
+            # Otra escritura concurrente ganó algún número: se reintenta fila por fila
+            insertadas = []
+            for numero_fila, room in nuevas:
+                try:
+                    with transaction.atomic():
+                        Room.objects.bulk_create([room])
+                    insertadas.append((numero_fila, room))
+                except IntegrityError as error:
+                    # Solo es un duplicado si el número ya está; otra restricción se informa tal cual
+                    if Room.objects.filter(numero=room.numero).exists():
+                        self.error(numero_fila, {'numero': ['Ya existe una habitación con este número']})
+                    else:
+                        self.error(numero_fila, {'non_field_errors': [str(error)]})
+
+        for numero_fila, room in insertadas:
+            self.deltas[(room.estado, room.tipo_habitacion_id, room.piso)] += 1
+            self.creadas.append({'fila': numero_fila, 'id': room.id, 'numero': room.numero})
+
+
+def importar_habitaciones(filas, tamano_lote=TAMANO_LOTE):
+    """
+    Crea habitaciones a partir de un iterable de filas (dict con numero,
+    tipo_habitacion como id o nombre, y opcionalmente estado, piso y notas).
+    Precios, descripción y política de horas se heredan del tipo como en
+    RoomCreateSerializer. Devuelve {'creadas': [...], 'errores': [...]} con el
+    número de fila (desde 1) de cada resultado.
+    """
+    importacion = _Importacion()
+    filas = enumerate(filas, start=1)
+    with transaction.atomic():
+        while True:
+            lote = list(islice(filas, tamano_lote))
+            if not lote:
+                break
+            importacion.procesar(lote)
+
+        if importacion.creadas:
+            # bulk_create no emite señales: contadores, versión y eventos van explícitos
+            counters.ajustar(importacion.deltas)
+            versioning.incrementar(Room)
+            transaction.on_commit(room_events.notificar)
+    return {
+        'creadas': importacion.creadas,
+        'errores': sorted(importacion.errores, key=lambda error: error['fila']),
+    }
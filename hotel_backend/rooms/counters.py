@@ -0,0 +1,89 @@
+"""
+Mantenimiento de los contadores de habitaciones por (estado, tipo, piso).
+
+Todas las funciones deben llamarse dentro de la transacción que modifica las
+habitaciones para que los contadores nunca queden desfasados respecto a Room.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Room, RoomStatusCounter
+from .dashboard import dashboard
+
+
+def ajustar(deltas):
+    """
+    Aplica incrementos/decrementos a los contadores.
+
+    ``deltas`` es un mapeo {(estado, tipo_habitacion_id, piso): diferencia}.
+    """
+    deltas = {clave: delta for clave, delta in deltas.items() if delta and None not in clave}
+    if not deltas:
+        return
+
+    # Solo se crean filas para incrementos: un decremento sin fila no tiene nada que restar
+    # (y crearla podría revivir un tipo que se está eliminando en cascada)
+    nuevos = [
+        RoomStatusCounter(estado=estado, tipo_habitacion_id=tipo_id, piso=piso)
+        for (estado, tipo_id, piso), delta in deltas.items() if delta > 0
+    ]
+    if nuevos:
+        RoomStatusCounter.objects.bulk_create(nuevos, ignore_conflicts=True)
+
+    for (estado, tipo_id, piso), delta in deltas.items():
+        RoomStatusCounter.objects.filter(
+            estado=estado, tipo_habitacion_id=tipo_id, piso=piso
+        ).update(count=F('count') + delta)
+    # El dashboard se lee de estos contadores: se recalcula al confirmar
+    dashboard.programar_refresco()
+
+
+def mover(anterior, nueva):
+    """
+    Registra que una habitación pasó de la clave ``anterior`` a ``nueva``.
+    Cualquiera de las dos puede ser None (alta o baja).
+    """
+    deltas = Counter()
+    if anterior is not None:
+        deltas[anterior] -= 1
+    if nueva is not None:
+        deltas[nueva] += 1
+    ajustar(deltas)
+
+
+def conteo_real():
+    """
+    Recalcula los contadores directamente desde la tabla de habitaciones.
+    """
+    filas = Room.objects.order_by().values('estado', 'tipo_habitacion', 'piso').annotate(total=Count('id'))
+    return {(fila['estado'], fila['tipo_habitacion'], fila['piso']): fila['total'] for fila in filas}
+
+
+def reconciliar(corregir=True):
+    """
+    Compara los contadores con Room y, si ``corregir``, reescribe los que difieren.
+    Devuelve la lista de desfases como (estado, tipo_id, piso, guardado, real).
+    """
+    with transaction.atomic():
+        guardados = {
+            (c.estado, c.tipo_habitacion_id, c.piso): c
+            for c in RoomStatusCounter.objects.select_for_update()
+        }
+        reales = conteo_real()
+
+        desfases = []
+        for clave in sorted(set(guardados) | set(reales)):
+            guardado = guardados[clave].count if clave in guardados else 0
+            real = reales.get(clave, 0)
+            if guardado != real:
+                desfases.append((*clave, guardado, real))
+
+        if corregir and desfases:
+            for estado, tipo_id, piso, _, real in desfases:
+                RoomStatusCounter.objects.update_or_create(
+                    estado=estado, tipo_habitacion_id=tipo_id, piso=piso, defaults={'count': real}
+                )
+            dashboard.programar_refresco()
+    return desfases
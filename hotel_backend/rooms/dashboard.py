@@ -0,0 +1,139 @@
+"""
+Estadísticas del dashboard de habitaciones (/api/rooms/dashboard_stats/).
+
+``calcular()`` arma el tablero completo con una sola consulta de agregación
+condicional sobre los contadores por (estado, tipo, piso): una fila por
+(tipo, piso) con la suma de cada estado, que luego se pliega en memoria.
+
+``dashboard`` guarda el resultado como instantánea del proceso. Se recalcula
+al confirmarse una transacción que movió contadores en este proceso y, para
+las escrituras de otros procesos, al vencer un TTL corto
+(``DASHBOARD_SNAPSHOT_TTL``). Si vence con muchas peticiones en curso, solo un
+hilo consulta la base; los demás esperan y reutilizan ese resultado.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .models import Room, RoomStatusCounter
+
+ESTADOS = [estado for estado, _ in Room.STATUS_CHOICES]
+
+
+def calcular():
+    """
+    Estadísticas del dashboard en una sola consulta.
+    """
+    sumas = {
+        f'n_{estado}': Sum('count', filter=Q(estado=estado), default=0)
+        for estado in ESTADOS
+    }
+    filas = RoomStatusCounter.objects.filter(count__gt=0).order_by().values(
+        'tipo_habitacion__nombre', 'piso'
+    ).annotate(total=Sum('count'), **sumas)
+
+    status_counts = Counter()
+    type_counts = Counter()
+    floor_counts = Counter()
+    for fila in filas:
+        for estado in ESTADOS:
+            status_counts[estado] += fila[f'n_{estado}']
+        type_counts[fila['tipo_habitacion__nombre']] += fila['total']
+        floor_counts[fila['piso']] += fila['total']
+
+    total_rooms = sum(status_counts.values())
+    occupied_rooms = status_counts['ocupada']
+    occupancy_rate = (occupied_rooms / total_rooms * 100) if total_rooms > 0 else 0
+
+    return {
+        'total_rooms': total_rooms,
+        'available_rooms': status_counts['disponible'],
+        'occupied_rooms': occupied_rooms,
+        'cleaning_rooms': status_counts['limpieza'],
+        'occupancy_rate': round(occupancy_rate, 2),
+        'status_breakdown': {estado: n for estado, n in status_counts.items() if n},
+        'type_breakdown': dict(type_counts),
+        'floor_breakdown': {piso: floor_counts[piso] for piso in sorted(floor_counts)},
+    }
+
+
+class DashboardSnapshot:
+    """
+    Instantánea en memoria de ``calcular()`` con TTL y recálculo coalescido.
+    """
+
+    def __init__(self, calcular):
+        self._calcular = calcular
+        self._datos = None
+        self._vence = 0.0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.recalculos = 0
+        self.esperas = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'DASHBOARD_SNAPSHOT_TTL', 10.0)
+
+    def _vigente(self):
+        return self._datos is not None and time.monotonic() < self._vence
+
+    def _recalcular(self):
+        datos = self._calcular()
+        self._datos = datos
+        self._vence = time.monotonic() + self.ttl
+        self.recalculos += 1
+        return datos
+
+    def obtener(self):
+        """
+        Devuelve la instantánea vigente o la recalcula una sola vez por vencimiento.
+        """
+        datos = self._datos
+        if datos is not None and time.monotonic() < self._vence:
+            self.aciertos += 1
+            return datos
+        with self._lock:
+            # Mientras se esperaba el lock otro hilo pudo haberla recalculado
+            if self._vigente():
+                self.esperas += 1
+                return self._datos
+            return self._recalcular()
+
+    def refrescar(self):
+        """
+        Recalcula la instantánea con los datos ya confirmados.
+        """
+        with self._lock:
+            self._vence = 0.0
+            return self._recalcular()
+
+    def programar_refresco(self):
+        """
+        Programa ``refrescar`` para cuando se confirme la transacción en curso,
+        una sola vez aunque la transacción mueva contadores varias veces.
+        """
+        conexion = transaction.get_connection()
+        if conexion.in_atomic_block and any(
+            funcion == self.refrescar for _, funcion, _ in conexion.run_on_commit
+        ):
+            return
+        # robust: un fallo al recalcular no afecta a la escritura ya confirmada;
+        # la instantánea queda vencida y se recalcula en la próxima lectura
+        transaction.on_commit(self.refrescar, robust=True)
+
+    def metricas(self):
+        return {
+            'ttl': self.ttl,
+            'aciertos': self.aciertos,
+            'recalculos': self.recalculos,
+            'esperas_coalescidas': self.esperas,
+            'vigente': self._vigente(),
+        }
+
+
+dashboard = DashboardSnapshot(calcular)
@@ -0,0 +1,130 @@
+"""
+Cambios de estado de habitaciones con control de concurrencia optimista.
+
+Cada habitación lleva una ``version`` que aumenta en cada escritura. Un cambio
+de estado valida la transición contra el estado leído y se aplica con un solo
+``UPDATE ... WHERE id = %s AND version = %s RETURNING ...``: si otra petición
+cambió la habitación en medio, el UPDATE no toca ninguna fila y se responde 409
+en lugar de pisar el cambio ajeno. No se toma ningún bloqueo de fila antes de
+escribir.
+
+Los guardados normales (``Room.save``) solo comparan la versión si se les pasa
+``version_esperada``; ``RoomSerializer.update`` lo hace con la versión leída.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from .events import room_events
+from .history import HistoryBatch
+from .models import Room
+from . import counters, versioning
+
+COLUMNAS = ('id', 'numero', 'estado', 'version', 'tipo_habitacion_id', 'piso')
+
+# Ciclo de operación normal: ocupada -> limpieza -> disponible -> ocupada ...
+SIGUIENTE = {'disponible': 'ocupada', 'ocupada': 'limpieza', 'limpieza': 'disponible'}
+
+
+class ConflictoVersion(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'La habitación fue modificada por otra solicitud; vuelva a consultarla e intente de nuevo'
+    default_code = 'conflicto_version'
+
+    def __init__(self, actual=None):
+        super().__init__()
+        self.detail = {
+            'success': False,
+            'error': self.default_detail,
+            'habitacion': actual,
+        }
+
+
+def validar_transicion(estado_anterior, estado_nuevo):
+    if not Room.transicion_permitida(estado_anterior, estado_nuevo):
+        permitidos = ', '.join(Room.TRANSICIONES.get(estado_anterior, ())) or 'ninguno'
+        raise serializers.ValidationError({
+            'estado': [f'No se puede pasar de {estado_anterior} a {estado_nuevo}. Permitidos: {permitidos}']
+        })
+
+
+def estado_actual(room_id):
+    return Room.objects.filter(pk=room_id).values('id', 'estado', 'version').first()
+
+
+def comparar_y_cambiar(room_id, version, estado_nuevo, fecha):
+    """
+    Aplica el cambio solo si la habitación sigue en ``version``.
+    Devuelve la fila nueva como dict, o None si la versión ya no coincide.
+    """
+    columnas = ', '.join(connection.ops.quote_name(columna) for columna in COLUMNAS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {connection.ops.quote_name(Room._meta.db_table)} '
+            'SET estado = %s, version = version + 1, updated_at = %s '
+            f'WHERE id = %s AND version = %s RETURNING {columnas}',
+            [estado_nuevo, connection.ops.adapt_datetimefield_value(fecha), room_id, version],
+        )
+        fila = cursor.fetchone()
+    return None if fila is None else dict(zip(COLUMNAS, fila))
+
+
+def cambiar_estado(room, estado_nuevo, registrado_por, fecha_registro, version=None):
+    """
+    Cambia el estado de ``room`` (instancia ya leída) comparando contra
+    ``version`` (la que envió el cliente, o la leída si no envió ninguna).
+
+    Devuelve (estado_anterior, fila) con la fila nueva, o fila None si la
+    habitación ya estaba en ``estado_nuevo``. Lanza ValidationError si la
+    transición no está permitida y ConflictoVersion si la versión no coincide.
+    """
+    esperada = room.version if version is None else version
+    if esperada != room.version:
+        raise ConflictoVersion(estado_actual(room.pk))
+    estado_anterior = room.estado
+    if estado_anterior == estado_nuevo:
+        return estado_anterior, None
+    validar_transicion(estado_anterior, estado_nuevo)
+
+    with transaction.atomic(), HistoryBatch(registrado_por, fecha_registro) as historial:
+        fila = comparar_y_cambiar(room.pk, esperada, estado_nuevo, fecha_registro)
+        if fila is not None:
+            historial.agregar(room.pk, fila['numero'], estado_anterior, estado_nuevo)
+            # El UPDATE directo no emite señales: contadores, versión de tabla y eventos van explícitos
+            tipo_id, piso = fila['tipo_habitacion_id'], fila['piso']
+            counters.mover((estado_anterior, tipo_id, piso), (estado_nuevo, tipo_id, piso))
+            versioning.incrementar(Room)
+            transaction.on_commit(room_events.notificar)
+    if fila is None:
+        raise ConflictoVersion(estado_actual(room.pk))
+    return estado_anterior, fila
+
+
+def avanzar_ciclo(room_id, registrado_por):
+    """
+    Lee la habitación y la pasa al siguiente estado de ``SIGUIENTE`` con
+    compare-and-set; ConflictoVersion si otra escritura se adelantó.
+    """
+    room = Room.objects.only('id', 'estado', 'version').get(pk=room_id)
+    return cambiar_estado(room, SIGUIENTE[room.estado], registrado_por, timezone.now())
+
+
+def avanzar_ciclo_con_bloqueo(room_id, registrado_por):
+    """
+    Lo mismo que ``avanzar_ciclo`` con ``select_for_update`` en lugar de la
+    comparación de versión. Referencia para bench_cambio_estado y las pruebas de
+    concurrencia; la API no lo usa.
+    """
+    fecha = timezone.now()
+    with transaction.atomic(), HistoryBatch(registrado_por, fecha) as historial:
+        room = Room.objects.select_for_update().values(
+            'id', 'numero', 'estado', 'tipo_habitacion_id', 'piso'
+        ).get(pk=room_id)
+        nuevo = SIGUIENTE[room['estado']]
+        Room.objects.filter(pk=room_id).update(estado=nuevo, version=F('version') + 1, updated_at=fecha)
+        historial.agregar(room_id, room['numero'], room['estado'], nuevo)
+        clave = (room['tipo_habitacion_id'], room['piso'])
+        counters.mover((room['estado'], *clave), (nuevo, *clave))
+        versioning.incrementar(Room)
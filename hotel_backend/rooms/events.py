@@ -0,0 +1,292 @@
+"""
+Difusión en tiempo real (server-sent events) de los cambios de habitaciones.
+
+Cada proceso ASGI mantiene un único ``RoomEventBroker``: una sola tarea de
+sondeo consulta las habitaciones con ``updated_at`` reciente (índice sobre
+updated_at) y reparte los eventos a todos los clientes conectados desde un
+buffer circular en memoria, en el orden en que se descubren. Las escrituras
+hechas en el mismo proceso despiertan el sondeo de inmediato; las de otros
+procesos se ven en el siguiente intervalo.
+
+``updated_at`` se fija al guardar, no al confirmar: una transacción más lenta
+puede confirmar una fila con ``updated_at`` anterior a la marca ya leída. Por
+eso cada sondeo relee desde la marca menos ``ROOM_EVENTS_OVERLAP`` segundos
+(duración máxima de una escritura más el desfase de relojes entre workers) y
+descarta las claves ya emitidas dentro de esa ventana.
+
+El id de cada evento se deriva de (updated_at, id de habitación), por lo que un
+cliente puede reanudar con ``Last-Event-ID`` en cualquier proceso. Al reanudar
+se relee la misma ventana de solapamiento: los eventos se entregan al menos una
+vez y el cliente descarta los ids que ya recibió.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSEGUNDO = timedelta(microseconds=1)
+
+
+def _clave(updated_at, room_id):
+    return ((updated_at - _EPOCH) // _MICROSEGUNDO, room_id)
+
+
+def _parse_id(valor):
+    """Convierte un Last-Event-ID ('<microsegundos>-<id>') en clave, o None si no es válido."""
+    try:
+        micros, room_id = str(valor).split('-', 1)
+        return (int(micros), int(room_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def _formatear(clave, fila):
+    data = json.dumps({
+        'id': fila['id'],
+        'numero': fila['numero'],
+        'estado': fila['estado'],
+        'updated_at': fila['updated_at'].isoformat(),
+    })
+    return f"id: {clave[0]}-{clave[1]}\nevent: habitacion\ndata: {data}\n\n"
+
+
+def _retroceder(clave, margen):
+    """Clave desde la que se relee: ``margen`` segundos antes de ``clave``."""
+    return (clave[0] - int(margen * 1000000), 0)
+
+
+def _consultar_cambios(clave, limite):
+    """Hasta ``limite`` eventos con clave posterior a ``clave``, en orden de clave."""
+    from .models import Room
+
+    habitaciones = Room.objects.order_by('updated_at', 'id')
+    if clave is not None:
+        marca = _EPOCH + clave[0] * _MICROSEGUNDO
+        habitaciones = habitaciones.filter(Q(updated_at__gt=marca) | Q(updated_at=marca, id__gt=clave[1]))
+    filas = habitaciones.values('id', 'numero', 'estado', 'updated_at')[:limite]
+    return [(_clave(fila['updated_at'], fila['id']), _formatear(_clave(fila['updated_at'], fila['id']), fila))
+            for fila in filas]
+
+
+def _claves_recientes(margen):
+    """Claves dentro de la ventana de solapamiento de la última (ya emitidas al arrancar)."""
+    from .models import Room
+
+    ultima = Room.objects.order_by('-updated_at', '-id').values_list('updated_at', 'id').first()
+    if ultima is None:
+        return []
+    filas = Room.objects.filter(updated_at__gte=ultima[0] - timedelta(seconds=margen)).values_list('updated_at', 'id')
+    return [_clave(*fila) for fila in filas]
+
+
+class _Vistos:
+    """
+    Claves ya emitidas dentro de la ventana de solapamiento de la mayor de ellas.
+    """
+
+    def __init__(self, margen):
+        self._margen = int(margen * 1000000)
+        self._claves = set()
+        self._poda = 64
+        self.ultima = None
+
+    def nueva(self, clave):
+        """Registra ``clave``; False si ya se había emitido."""
+        if clave in self._claves:
+            return False
+        self._claves.add(clave)
+        if self.ultima is None or clave > self.ultima:
+            self.ultima = clave
+        if len(self._claves) > self._poda:
+            piso = self.ultima[0] - self._margen
+            self._claves = {c for c in self._claves if c[0] >= piso}
+            self._poda = max(64, 2 * len(self._claves))
+        return True
+
+
+class RoomEventBroker:
+    """
+    Reparto en memoria de eventos de habitaciones para un proceso ASGI.
+    """
+    LIMITE_CONSULTA = 500
+
+    def __init__(self, capacidad=1000):
+        self._eventos = deque()  # (secuencia, clave, texto) en orden de llegada
+        self._capacidad = capacidad
+        self._secuencia = None  # número del último evento agregado al buffer
+        self._cobertura = None  # el buffer contiene todos los eventos posteriores a esta secuencia
+        self._vistos = None
+        self._continuar = None
+        self._suscriptores = 0
+        self._loop = None
+        self._condicion = None
+        self._despertar = None
+        self._listo = None
+        self._tarea = None
+        self._lock = threading.Lock()
+
+    @property
+    def intervalo(self):
+        return getattr(settings, 'ROOM_EVENTS_POLL_INTERVAL', 1.0)
+
+    @property
+    def heartbeat(self):
+        return getattr(settings, 'ROOM_EVENTS_HEARTBEAT', 15.0)
+
+    @property
+    def margen(self):
+        return getattr(settings, 'ROOM_EVENTS_OVERLAP', 5.0)
+
+    def notificar(self):
+        """
+        Despierta el sondeo tras una escritura local (seguro desde cualquier hilo).
+        """
+        with self._lock:
+            loop, despertar = self._loop, self._despertar
+        if loop is not None and despertar is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(despertar.set)
+
+    def _agregar(self, eventos):
+        for clave, texto in eventos:
+            self._secuencia += 1
+            self._eventos.append((self._secuencia, clave, texto))
+        while len(self._eventos) > self._capacidad:
+            self._cobertura = self._eventos.popleft()[0]
+
+    def _desde_buffer(self, posicion):
+        """
+        Eventos posteriores a la secuencia ``posicion`` si el buffer los cubre; None si hay que
+        consultar la base.
+        """
+        if posicion < self._cobertura:
+            return None
+        return list(self._eventos)[len(self._eventos) - (self._secuencia - posicion):]
+
+    async def _historial(self, clave, vistos):
+        """
+        Eventos de la base desde la ventana de solapamiento de ``clave``, sin los ya emitidos.
+        """
+        desde = _retroceder(clave, self.margen) if clave is not None else None
+        while True:
+            pagina = await sync_to_async(_consultar_cambios)(desde, self.LIMITE_CONSULTA)
+            for clave_evento, texto in pagina:
+                if vistos.nueva(clave_evento):
+                    yield texto
+            if len(pagina) < self.LIMITE_CONSULTA:
+                return
+            desde = pagina[-1][0]
+
+    async def _iniciar(self):
+        # Sin await entre la comprobación y create_task: un solo sondeo por proceso
+        if self._tarea is None or self._tarea.done():
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                self._loop = loop
+                self._despertar = asyncio.Event()
+            self._condicion = asyncio.Condition()
+            self._listo = asyncio.Event()
+            self._tarea = loop.create_task(self._sondear())
+        await self._listo.wait()
+
+    async def _sondear(self):
+        try:
+            self._eventos.clear()
+            self._secuencia = self._cobertura = 0
+            self._continuar = None
+            vistos = _Vistos(self.margen)
+            for clave in await sync_to_async(_claves_recientes)(self.margen):
+                vistos.nueva(clave)
+            self._vistos = vistos
+            self._listo.set()
+
+            while self._suscriptores > 0:
+                try:
+                    await asyncio.wait_for(self._despertar.wait(), timeout=self.intervalo)
+                except asyncio.TimeoutError:
+                    pass
+                self._despertar.clear()
+                if self._suscriptores == 0:
+                    break
+
+                # Se relee la ventana de solapamiento salvo al seguir paginando una ráfaga
+                if self._continuar is not None:
+                    desde = self._continuar
+                elif self._vistos.ultima is not None:
+                    desde = _retroceder(self._vistos.ultima, self.margen)
+                else:
+                    desde = None
+                eventos = await sync_to_async(_consultar_cambios)(desde, self.LIMITE_CONSULTA)
+                self._continuar = eventos[-1][0] if len(eventos) == self.LIMITE_CONSULTA else None
+                nuevos = [(clave, texto) for clave, texto in eventos if self._vistos.nueva(clave)]
+                if nuevos:
+                    async with self._condicion:
+                        self._agregar(nuevos)
+                        self._condicion.notify_all()
+                if self._continuar is not None:
+                    self._despertar.set()
+        finally:
+            with self._lock:
+                self._loop = None
+                self._despertar = None
+            self._tarea = None
+            self._listo.set()
+
+    async def stream(self, ultimo_id=None):
+        """
+        Generador asíncrono de eventos SSE; reanuda desde ``ultimo_id`` si se indica.
+        """
+        self._suscriptores += 1
+        try:
+            await self._iniciar()
+            if self._vistos is None:
+                return
+            reanudar = _parse_id(ultimo_id) if ultimo_id else None
+            yield f"retry: {int(self.intervalo * 3000)}\n\n"
+
+            # Claves ya enviadas a este cliente: la base y el buffer pueden repetir eventos
+            vistos = _Vistos(self.margen)
+            posicion, inicio = self._secuencia, self._vistos.ultima
+            if reanudar is not None:
+                # En otro proceso el orden de llegada pudo ser distinto: se relee la ventana
+                vistos.nueva(reanudar)
+                async for texto in self._historial(reanudar, vistos):
+                    yield texto
+
+            while True:
+                async with self._condicion:
+                    try:
+                        await asyncio.wait_for(
+                            self._condicion.wait_for(lambda: self._secuencia > posicion),
+                            timeout=self.heartbeat,
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    pendientes = self._desde_buffer(posicion) if self._secuencia > posicion else []
+                    secuencia = self._secuencia
+
+                if pendientes is None:
+                    # El cliente quedó atrás del buffer: se pone al día desde la base y sigue
+                    # con lo que llegue al buffer después de esta secuencia
+                    posicion = secuencia
+                    async for texto in self._historial(vistos.ultima or inicio, vistos):
+                        yield texto
+                    continue
+                if not pendientes:
+                    yield ": ping\n\n"
+                    continue
+                for posicion, clave, texto in pendientes:
+                    if vistos.nueva(clave):
+                        yield texto
+        finally:
+            self._suscriptores -= 1
+            if self._suscriptores == 0 and self._despertar is not None:
+                self._despertar.set()
+
+
+room_events = RoomEventBroker()
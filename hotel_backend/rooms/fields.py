@@ -0,0 +1,50 @@
+"""
+Campos de modelo propios de la app de habitaciones.
+"""
+import re
+
+from django.db import models
+
+_PREFIJO_NUMERICO = re.compile(r'\d+')
+_ANCHO = 10
+
+
+def clave_orden_natural(valor):
+    """
+    Clave de orden natural para un número de habitación: el prefijo numérico
+    rellenado con ceros seguido del valor original ('2' < '10' < '10A').
+    Los valores sin prefijo numérico van después de todos los numéricos.
+    """
+    valor = valor or ''
+    prefijo = _PREFIJO_NUMERICO.match(valor)
+    if prefijo is None:
+        return '9' * _ANCHO + valor
+    return prefijo.group().lstrip('0').rjust(_ANCHO, '0')[-_ANCHO:] + valor
+
+
+class NaturalSortKeyField(models.CharField):
+    """
+    CharField calculado en cada guardado a partir de ``source`` con
+    ``clave_orden_natural``. Se calcula en ``pre_save``, por lo que también se
+    rellena en ``bulk_create``.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('max_length', 2 * _ANCHO)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        if kwargs.get('editable') is False:
+            del kwargs['editable']
+        if kwargs.get('max_length') == 2 * _ANCHO:
+            del kwargs['max_length']
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        valor = clave_orden_natural(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, valor)
+        return valor
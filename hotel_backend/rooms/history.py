@@ -0,0 +1,50 @@
+"""
+Escritura en lote del historial de cambios de estado de habitaciones.
+"""
+from django.utils import timezone
+
+from .models import RoomStatusHistory
+
+
+class HistoryBatch:
+    """
+    Acumula registros de historial y los inserta con un solo ``bulk_create``
+    al cerrar el bloque, dentro de la transacción que cambia los estados.
+
+        with transaction.atomic(), HistoryBatch(request.user.username) as historial:
+            ...
+            historial.agregar(room.id, room.numero, estado_anterior, nuevo_estado)
+
+    Si el bloque termina con una excepción no se escribe nada.
+    """
+    BATCH_SIZE = 500
+
+    def __init__(self, registrado_por, fecha_registro=None):
+        self.registrado_por = registrado_por
+        self.fecha_registro = fecha_registro or timezone.now()
+        self._pendientes = []
+
+    def agregar(self, room_id, numero, estado_anterior, estado_nuevo):
+        if estado_anterior == estado_nuevo:
+            return
+        self._pendientes.append(RoomStatusHistory(
+            room_id=room_id,
+            numero=numero,
+            estado_anterior=estado_anterior,
+            estado_nuevo=estado_nuevo,
+            registrado_por=self.registrado_por,
+            fecha_registro=self.fecha_registro,
+        ))
+
+    def guardar(self):
+        if self._pendientes:
+            RoomStatusHistory.objects.bulk_create(self._pendientes, batch_size=self.BATCH_SIZE)
+            self._pendientes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.guardar()
+        return False
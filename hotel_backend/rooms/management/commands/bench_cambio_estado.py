@@ -0,0 +1,116 @@
+import statistics
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from rooms import counters, estados
+from rooms.models import Room, RoomStatusHistory, RoomType
+
+
+class Command(BaseCommand):
+    help = (
+        'Varios hilos cambian el estado de una misma habitación: verifica que no se pierdan '
+        'transiciones y compara la latencia de compare-and-set contra select_for_update'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--cambios', type=int, default=50, help='Cambios exitosos por hilo')
+        parser.add_argument('--modo', choices=['optimista', 'bloqueo', 'ambos'], default='ambos')
+
+    def handle(self, *args, **options):
+        modos = ['optimista', 'bloqueo'] if options['modo'] == 'ambos' else [options['modo']]
+        # Los hilos usan conexiones propias: los datos se confirman y se borran al final
+        tipo = RoomType.objects.create(nombre='Bench cambio estado', precio_base=Decimal('40000'))
+        try:
+            for modo in modos:
+                room = Room.objects.create(numero=f'BCE-{modo[:3]}', tipo_habitacion=tipo)
+                self._ejecutar(modo, room, options['hilos'], options['cambios'])
+        finally:
+            RoomStatusHistory.objects.filter(room__tipo_habitacion=tipo).delete()
+            for room in Room.objects.filter(tipo_habitacion=tipo):
+                room.delete()
+            tipo.delete()
+
+    def _ejecutar(self, modo, room, n_hilos, cambios):
+        cambiar = estados.avanzar_ciclo if modo == 'optimista' else estados.avanzar_ciclo_con_bloqueo
+        latencias = []
+        resultados = Counter()
+        errores = Counter()
+        lock = threading.Lock()
+
+        def trabajar(numero_hilo):
+            locales = Counter()
+            propias = []
+            try:
+                while locales['exitosos'] < cambios and locales['errores'] < cambios:
+                    t0 = time.perf_counter()
+                    try:
+                        cambiar(room.pk, f'bench-{numero_hilo}')
+                    except estados.ConflictoVersion:
+                        locales['conflictos_409'] += 1
+                        continue
+                    except Exception as error:
+                        locales['errores'] += 1
+                        with lock:
+                            errores[f'{type(error).__name__}: {error}'] += 1
+                        continue
+                    propias.append(time.perf_counter() - t0)
+                    locales['exitosos'] += 1
+            finally:
+                connection.close()
+            with lock:
+                resultados.update(locales)
+                latencias.extend(propias)
+
+        hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(n_hilos)]
+        t0 = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - t0
+
+        exitosos = resultados['exitosos']
+        self.stdout.write(f'{modo} ({connection.vendor}): {n_hilos} hilos, {exitosos} cambios en {duracion:.2f}s')
+        if latencias:
+            latencias.sort()
+            p95 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))]
+            self.stdout.write(
+                f'  latencia por cambio: p50={statistics.median(latencias) * 1000:.2f}ms '
+                f'p95={p95 * 1000:.2f}ms max={latencias[-1] * 1000:.2f}ms'
+            )
+        self.stdout.write(f'  conflictos_409={resultados["conflictos_409"]} errores={resultados["errores"]}')
+        for mensaje, veces in errores.most_common(3):
+            self.stdout.write(f'  {veces}x {mensaje}')
+        self._verificar(room, exitosos)
+
+    def _verificar(self, room, exitosos):
+        final = Room.objects.values('estado', 'version').get(pk=room.pk)
+        historial = list(
+            RoomStatusHistory.objects.filter(room=room).order_by('id').values_list('estado_anterior', 'estado_nuevo')
+        )
+        cadena_rota = sum(
+            1 for anterior, actual in zip(historial, historial[1:]) if actual[0] != anterior[1]
+        )
+        problemas = []
+        if final['version'] - room.version != exitosos:
+            problemas.append(f'versión avanzó {final["version"] - room.version}, cambios exitosos {exitosos}')
+        if len(historial) != exitosos:
+            problemas.append(f'{len(historial)} registros de historial para {exitosos} cambios')
+        if cadena_rota:
+            problemas.append(f'{cadena_rota} registros cuyo estado anterior no es el estado nuevo del previo')
+        if historial and historial[-1][1] != final['estado']:
+            problemas.append(f'el último registro deja {historial[-1][1]} pero la habitación está {final["estado"]}')
+        if counters.reconciliar(corregir=False):
+            problemas.append('los contadores por estado no coinciden con las habitaciones')
+
+        if problemas:
+            for problema in problemas:
+                self.stdout.write(self.style.ERROR(f'  ✗ {problema}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  ✓ Sin transiciones perdidas: versión, historial y contadores coinciden'))
@@ -0,0 +1,69 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from hotel_backend.bench import transaccion_revertida
+from rooms.models import Room, RoomType
+from rooms.views import RoomViewSet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compara N llamadas a cambio-estado contra una llamada a cambio-estado-masivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitaciones', type=int, default=50)
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaccion_revertida():
+            self._ejecutar(options['habitaciones'], options['repeticiones'])
+
+    def _ejecutar(self, n, repeticiones):
+        usuario = User.objects.create_user(username='bench_cambio_estado', password='x', role='admin')
+        tipo = RoomType.objects.create(nombre='Bench cambio estado', precio_base=Decimal('40000'))
+        rooms = [Room.objects.create(numero=f'M{i}', tipo_habitacion=tipo, estado='limpieza') for i in range(n)]
+
+        factory = APIRequestFactory()
+        individual = RoomViewSet.as_view({'post': 'cambio_estado'})
+        masivo = RoomViewSet.as_view({'post': 'cambio_estado_masivo'})
+
+        def cambio_individual(estado):
+            for room in rooms:
+                request = factory.post(f'/api/rooms/{room.id}/cambio-estado/', {'estado': estado}, format='json')
+                force_authenticate(request, user=usuario)
+                individual(request, pk=room.id)
+
+        def cambio_masivo(estado):
+            cambios = [{'id': room.id, 'estado': estado} for room in rooms]
+            request = factory.post('/api/rooms/cambio-estado-masivo/', {'cambios': cambios}, format='json')
+            force_authenticate(request, user=usuario)
+            masivo(request)
+
+        resultados = {}
+        for nombre, funcion in (('individual', cambio_individual), ('masivo', cambio_masivo)):
+            tiempo = 0.0
+            consultas = 0
+            for _ in range(repeticiones):
+                for estado in ('disponible', 'limpieza'):
+                    with CaptureQueriesContext(connection) as capturadas:
+                        t0 = time.perf_counter()
+                        funcion(estado)
+                        tiempo += time.perf_counter() - t0
+                    consultas += len(capturadas)
+            llamadas = repeticiones * 2 * n
+            resultados[nombre] = tiempo / llamadas
+            self.stdout.write(
+                f'{nombre:>10}: {tiempo / llamadas * 1000:.3f} ms por habitación, '
+                f'{consultas / llamadas:.2f} consultas por habitación'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Aceleración por habitación: {resultados["individual"] / resultados["masivo"]:.1f}x ({n} habitaciones)'
+        ))
@@ -0,0 +1,86 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from hotel_backend.bench import transaccion_revertida
+from rooms import pricing
+from rooms.models import Room, RoomType
+
+
+class Command(BaseCommand):
+    help = 'Compara la cotización en lote contra Room.calcular_precio_total y verifica que coincidan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitaciones', type=int, default=200)
+        parser.add_argument('--cotizaciones', type=int, default=100000)
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--semilla', type=int, default=7)
+
+    def handle(self, *args, **options):
+        with transaccion_revertida():
+            self._ejecutar(options['habitaciones'], options['cotizaciones'], options['repeticiones'], options['semilla'])
+
+    def _ejecutar(self, n, cantidad, repeticiones, semilla):
+        azar = random.Random(semilla)
+        tipo = RoomType.objects.create(nombre='Bench cotización', precio_base=Decimal('40000'))
+        Room.objects.bulk_create([
+            Room(
+                numero=f'C{i}',
+                tipo_habitacion=tipo,
+                precio_base=Decimal(azar.randint(2000000, 12000000)).scaleb(-2),
+                precio_hora_adicional=Decimal(azar.randint(0, 2500000)).scaleb(-2),
+                horas_base=azar.randint(1, 12),
+                cobro_adicional=azar.random() < 0.8,
+            )
+            for i in range(n)
+        ])
+        ids = list(Room.objects.filter(tipo_habitacion=tipo).values_list('id', flat=True))
+        habitaciones = [azar.choice(ids) for _ in range(cantidad)]
+        horas = [azar.randint(0, 24) for _ in range(cantidad)]
+
+        def mejor(funcion):
+            duracion = float('inf')
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                resultado = funcion()
+                duracion = min(duracion, time.perf_counter() - t0)
+            return duracion, resultado
+
+        # Con lectura de tarifas incluida y con las tarifas ya cargadas (solo el cálculo)
+        escalar, esperados = mejor(lambda: self._escalar(Room.objects.in_bulk(set(habitaciones)), habitaciones, horas))
+        rooms = Room.objects.in_bulk(set(habitaciones))
+        escalar_calculo, _ = mejor(lambda: self._escalar(rooms, habitaciones, horas))
+        self.stdout.write(
+            f'{"escalar":>8}: {escalar * 1000:.1f} ms total, {escalar_calculo * 1000:.1f} ms cálculo '
+            f'({cantidad} cotizaciones, mejor de {repeticiones})'
+        )
+
+        variantes = [('python', None)]
+        if pricing.np is not None:
+            variantes.insert(0, ('numpy', pricing.np))
+
+        tarifas = pricing.cargar_tarifas(habitaciones)
+        for nombre, modulo in variantes:
+            original = pricing.np
+            pricing.np = modulo
+            try:
+                duracion, centavos = mejor(lambda: pricing.cotizar_centavos(habitaciones, horas))
+                calculo, _ = mejor(lambda: pricing.cotizar_centavos(habitaciones, horas, tarifas))
+            finally:
+                pricing.np = original
+
+            obtenidos = [pricing.centavos_a_decimal(total) for total in centavos]
+            distintos = sum(1 for a, b in zip(esperados, obtenidos) if a != b)
+            if distintos:
+                self.stdout.write(self.style.ERROR(f'{nombre:>8}: {distintos} cotizaciones no coinciden'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'{nombre:>8}: {duracion * 1000:.1f} ms total ({escalar / duracion:.1f}x), '
+                f'{calculo * 1000:.1f} ms cálculo ({escalar_calculo / calculo:.1f}x), resultados idénticos'
+            ))
+
+    @staticmethod
+    def _escalar(rooms, habitaciones, horas):
+        return [rooms[room_id].calcular_precio_total(h) for room_id, h in zip(habitaciones, horas)]
@@ -0,0 +1,91 @@
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from hotel_backend.bench import transaccion_revertida
+from inventory.models import Category, Product
+from inventory.serializers import ProductSerializer
+from inventory.views import ProductViewSet
+from rooms.models import Room, RoomType
+from rooms.serializers import RoomSerializer
+from rooms.views import RoomViewSet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Simula clientes que sondean listados y mide bytes y serializaciones ahorradas con GET condicional'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=20)
+        parser.add_argument('--sondeos', type=int, default=50)
+        parser.add_argument('--escribir-cada', type=int, default=10,
+                            help='Cada cuántos sondeos se modifica una fila')
+        parser.add_argument('--filas', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaccion_revertida():
+            self._ejecutar(options)
+
+    def _sembrar(self, filas):
+        usuario = User.objects.create_user(username='bench_condicional', password='x', role='admin')
+        tipo = RoomType.objects.create(nombre='Bench condicional', precio_base=Decimal('40000'))
+        rooms = [Room.objects.create(numero=f'C{i}', tipo_habitacion=tipo) for i in range(filas)]
+        categoria = Category.objects.create(name='Bench condicional')
+        productos = [Product.objects.create(name=f'Producto {i}', category=categoria, price=Decimal('1000'))
+                     for i in range(filas)]
+        return usuario, rooms, productos
+
+    def _simular(self, usuario, vista, url, filas, condicional, options):
+        factory = APIRequestFactory()
+        etags = {}
+        bytes_enviados = 0
+        respuestas_304 = 0
+        t0 = time.perf_counter()
+        for sondeo in range(options['sondeos']):
+            if sondeo and sondeo % options['escribir_cada'] == 0:
+                fila = filas[sondeo % len(filas)]
+                fila.save()
+            for cliente in range(options['clientes']):
+                headers = {}
+                if condicional and cliente in etags:
+                    headers['HTTP_IF_NONE_MATCH'] = etags[cliente]
+                request = factory.get(url, **headers)
+                force_authenticate(request, user=usuario)
+                response = vista(request)
+                if hasattr(response, 'render'):
+                    response.render()
+                bytes_enviados += len(response.content)
+                if response.status_code == 304:
+                    respuestas_304 += 1
+                if response.has_header('ETag'):
+                    etags[cliente] = response['ETag']
+        return bytes_enviados, respuestas_304, time.perf_counter() - t0
+
+    def _ejecutar(self, options):
+        usuario, rooms, productos = self._sembrar(options['filas'])
+        casos = (
+            ('habitaciones', RoomViewSet.as_view({'get': 'list'}), '/api/rooms/', rooms, RoomSerializer),
+            ('productos', ProductViewSet.as_view({'get': 'list'}), '/api/inventory/productos/', productos,
+             ProductSerializer),
+        )
+        total = options['clientes'] * options['sondeos']
+        for nombre, vista, url, filas, serializer_class in casos:
+            self.stdout.write(f'{nombre}: {options["clientes"]} clientes x {options["sondeos"]} sondeos')
+            original = serializer_class.to_representation
+            for condicional in (False, True):
+                with mock.patch.object(serializer_class, 'to_representation', autospec=True,
+                                       side_effect=original) as espia:
+                    bytes_enviados, respuestas_304, duracion = self._simular(
+                        usuario, vista, url, filas, condicional, options
+                    )
+                etiqueta = 'condicional' if condicional else 'sin ETag'
+                self.stdout.write(
+                    f'  {etiqueta:>12}: {bytes_enviados / 1024:.1f} KiB enviados, '
+                    f'{espia.call_count} serializaciones de fila, {respuestas_304}/{total} respuestas 304, '
+                    f'{duracion / total * 1000:.2f} ms por sondeo'
+                )
@@ -0,0 +1,76 @@
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from hotel_backend.bench import transaccion_revertida
+from rooms.models import Room, RoomType
+from rooms.pagination import RoomCursorPagination
+from rooms.serializers import RoomFastSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compara paginación por número de página (OFFSET + COUNT) contra cursor sobre numero_orden'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitaciones', type=int, default=50000)
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaccion_revertida():
+            self._ejecutar(options['habitaciones'], options['repeticiones'])
+
+    def _ejecutar(self, n, repeticiones):
+        tipo = RoomType.objects.create(nombre='Bench paginación', precio_base=Decimal('40000'))
+        # bulk_create calcula numero_orden en pre_save; los números se insertan desordenados
+        Room.objects.bulk_create(
+            [Room(numero=f'{i}', tipo_habitacion=tipo) for i in range(n, 0, -1)],
+            batch_size=5000,
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE rooms_room')
+
+        factory = APIRequestFactory()
+        host = settings.ALLOWED_HOSTS[0]
+        queryset = RoomFastSerializer.values(Room.objects.select_related('tipo_habitacion'))
+        tamano = RoomCursorPagination.page_size
+        ultima_pagina = (n + tamano - 1) // tamano
+
+        def medir(paginador_clase, url):
+            mejor = float('inf')
+            for _ in range(repeticiones):
+                request = Request(factory.get(url, HTTP_HOST=host))
+                with CaptureQueriesContext(connection) as consultas:
+                    t0 = time.perf_counter()
+                    paginador = paginador_clase()
+                    pagina = paginador.paginate_queryset(queryset, request)
+                    paginador.get_paginated_response(RoomFastSerializer(pagina).data)
+                    mejor = min(mejor, time.perf_counter() - t0)
+            return mejor, len(consultas), [fila['numero'] for fila in pagina]
+
+        def url_cursor(posicion):
+            # Cursor equivalente al que devolvería "next" tras la fila ``posicion``
+            paginador = RoomCursorPagination()
+            paginador.base_url = f'http://{host}/api/rooms/'
+            clave = queryset.order_by('numero_orden').values_list('numero_orden', flat=True)[posicion - 1]
+            return paginador.encode_cursor(Cursor(offset=0, reverse=False, position=clave))
+
+        for etiqueta, pagina in (('primera', 1), ('media', ultima_pagina // 2), ('última', ultima_pagina)):
+            t_pagina, q_pagina, numeros_pagina = medir(PageNumberPagination, f'/api/rooms/?page={pagina}')
+            url = '/api/rooms/' if pagina == 1 else url_cursor((pagina - 1) * tamano)
+            t_cursor, q_cursor, numeros_cursor = medir(RoomCursorPagination, url)
+            self.stdout.write(
+                f'{etiqueta:>8} ({pagina:>5}): página {t_pagina * 1000:7.2f} ms / {q_pagina} consultas, '
+                f'cursor {t_cursor * 1000:7.2f} ms / {q_cursor} consultas'
+                + ('' if numeros_pagina == numeros_cursor else '  ¡RESULTADOS DISTINTOS!')
+            )
+
+        primeros = list(queryset.values_list('numero', flat=True)[:5])
+        self.stdout.write(self.style.SUCCESS(f'Orden natural: {primeros} ... ({n} habitaciones)'))
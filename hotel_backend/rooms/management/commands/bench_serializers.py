@@ -0,0 +1,73 @@
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from hotel_backend.bench import transaccion_revertida
+from inventory.models import Category, Product
+from inventory.serializers import ProductFastSerializer, ProductSerializer
+from rooms.models import Room, RoomType
+from rooms.serializers import RoomFastSerializer, RoomSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compara los serializers DRF de habitaciones y productos con sus versiones rápidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, nargs='+', default=[1000, 10000, 100000])
+
+    def handle(self, *args, **options):
+        with transaccion_revertida():
+            self._ejecutar(sorted(options['filas']))
+
+    def _sembrar(self, n):
+        tipo = RoomType.objects.create(nombre='Bench serializers', description='Tipo de prueba',
+                                       precio_base=Decimal('40000'))
+        Room.objects.bulk_create(
+            [Room(numero=f'S{i}', tipo_habitacion=tipo, estado=Room.STATUS_CHOICES[i % 4][0],
+                  piso=i % 10 + 1, notas='Nota' if i % 3 else None) for i in range(n)],
+            batch_size=5000,
+        )
+        categoria = Category.objects.create(name='Bench serializers')
+        Product.objects.bulk_create(
+            [Product(name=f'Producto {i}', category=categoria, price=Decimal('1500.5'),
+                     current_stock=i % 12, minimum_stock=5) for i in range(n)],
+            batch_size=5000,
+        )
+        return (
+            Room.objects.select_related('tipo_habitacion').filter(tipo_habitacion=tipo),
+            Product.objects.select_related('category').filter(category=categoria),
+        )
+
+    def _medir(self, funcion):
+        # El tiempo se mide sin tracemalloc (que lo distorsiona); la memoria en una segunda pasada
+        t0 = time.perf_counter()
+        datos = funcion()
+        duracion = time.perf_counter() - t0
+        tracemalloc.start()
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return datos, duracion, pico
+
+    def _ejecutar(self, tamanos):
+        rooms, productos = self._sembrar(tamanos[-1])
+        renderer = JSONRenderer()
+        casos = (
+            ('habitaciones', rooms, RoomSerializer, RoomFastSerializer),
+            ('productos', productos, ProductSerializer, ProductFastSerializer),
+        )
+        for nombre, queryset, lento, rapido in casos:
+            for n in tamanos:
+                # Cada pasada parte de un queryset nuevo para incluir la lectura de la base
+                drf, t_drf, m_drf = self._medir(lambda: lento(queryset[:n], many=True).data)
+                fast, t_fast, m_fast = self._medir(lambda: rapido(rapido.values(queryset[:n])).data)
+
+                identico = renderer.render(drf) == renderer.render(fast)
+                self.stdout.write(
+                    f'{nombre} {n:>7}: DRF {n / t_drf:>9.0f} filas/s ({m_drf / 2**20:.1f} MiB pico) | '
+                    f'rápido {n / t_fast:>9.0f} filas/s ({m_fast / 2**20:.1f} MiB pico) | '
+                    f'{t_drf / t_fast:.1f}x | JSON idéntico: {"sí" if identico else "NO"}'
+                )
@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hotel_backend.bench import transaccion_revertida
+from rooms.bulk import TAMANO_LOTE, importar_habitaciones, leer_csv, leer_json
+
+
+class Command(BaseCommand):
+    help = 'Crea habitaciones en lote desde un archivo CSV (con encabezado) o JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo, o '-' para leer de la entrada estándar")
+        parser.add_argument('--formato', choices=['csv', 'json'], help='Por defecto se deduce de la extensión')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por bulk_create')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Valida e inserta dentro de una transacción que se revierte al final',
+        )
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        formato = options['formato'] or ('json' if archivo.lower().endswith(('.json', '.jsonl', '.ndjson')) else 'csv')
+        leer = leer_json if formato == 'json' else leer_csv
+
+        try:
+            if archivo == '-':
+                resultado = self._importar(leer(sys.stdin), options)
+            else:
+                with open(archivo, encoding='utf-8-sig', newline='') as entrada:
+                    resultado = self._importar(leer(entrada), options)
+        except OSError as exc:
+            raise CommandError(f'No se pudo leer {archivo}: {exc}')
+        except ValueError as exc:
+            raise CommandError(f'{formato.upper()} inválido: {exc}')
+
+        for error in resultado['errores']:
+            detalle = '; '.join(
+                f'{campo}: {", ".join(str(m) for m in mensajes)}' for campo, mensajes in error['errores'].items()
+            ) if isinstance(error['errores'], dict) else str(error['errores'])
+            self.stdout.write(self.style.WARNING(f'Fila {error["fila"]}: {detalle}'))
+
+        prefijo = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefijo}✓ {len(resultado["creadas"])} habitaciones creadas, {len(resultado["errores"])} filas con errores'
+        ))
+
+    def _importar(self, filas, options):
+        if not options['dry_run']:
+            return importar_habitaciones(filas, tamano_lote=options['lote'])
+        with transaccion_revertida():
+            resultado = importar_habitaciones(filas, tamano_lote=options['lote'])
+        return resultado
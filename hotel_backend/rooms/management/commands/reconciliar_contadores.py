@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from rooms import counters
+from rooms.models import RoomType
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de estado de habitaciones desde Room y reporta desfases'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-reportar',
+            action='store_true',
+            help='Solo muestra los desfases sin corregirlos',
+        )
+
+    def handle(self, *args, **options):
+        corregir = not options['solo_reportar']
+        desfases = counters.reconciliar(corregir=corregir)
+
+        if not desfases:
+            self.stdout.write(self.style.SUCCESS('✓ Contadores sincronizados, sin desfases'))
+            return
+
+        tipos = dict(RoomType.objects.values_list('id', 'nombre'))
+        for estado, tipo_id, piso, guardado, real in desfases:
+            self.stdout.write(
+                f'{tipos.get(tipo_id, tipo_id)} / piso {piso} / {estado}: contador={guardado} real={real} '
+                f'(desfase {guardado - real:+d})'
+            )
+
+        if corregir:
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(desfases)} contadores corregidos'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(desfases)} contadores con desfase (sin corregir)'))
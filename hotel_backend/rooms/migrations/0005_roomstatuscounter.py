@@ -0,0 +1,45 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def poblar_contadores(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    RoomStatusCounter = apps.get_model('rooms', 'RoomStatusCounter')
+    filas = Room.objects.order_by().values('estado', 'tipo_habitacion').annotate(total=Count('id'))
+    RoomStatusCounter.objects.bulk_create([
+        RoomStatusCounter(estado=fila['estado'], tipo_habitacion_id=fila['tipo_habitacion'], count=fila['total'])
+        for fila in filas
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_rename_name_to_nombre'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='estado',
+            field=models.CharField(choices=[('disponible', 'Disponible'), ('ocupada', 'Ocupada'), ('limpieza', 'En limpieza'), ('mantenimiento', 'Mantenimiento')], default='disponible', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.CreateModel(
+            name='RoomStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('disponible', 'Disponible'), ('ocupada', 'Ocupada'), ('limpieza', 'En limpieza'), ('mantenimiento', 'Mantenimiento')], max_length=20, verbose_name='Estado')),
+                ('count', models.IntegerField(default=0, verbose_name='Cantidad')),
+                ('tipo_habitacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rooms.roomtype', verbose_name='Tipo de habitación')),
+            ],
+            options={
+                'verbose_name': 'Contador de estado de habitaciones',
+                'verbose_name_plural': 'Contadores de estado de habitaciones',
+                'constraints': [models.UniqueConstraint(fields=('estado', 'tipo_habitacion'), name='unique_room_status_counter')],
+            },
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0005_roomstatuscounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.CharField(max_length=10, verbose_name='Número de habitación')),
+                ('estado_anterior', models.CharField(choices=[('disponible', 'Disponible'), ('ocupada', 'Ocupada'), ('limpieza', 'En limpieza'), ('mantenimiento', 'Mantenimiento')], max_length=20, verbose_name='Estado anterior')),
+                ('estado_nuevo', models.CharField(choices=[('disponible', 'Disponible'), ('ocupada', 'Ocupada'), ('limpieza', 'En limpieza'), ('mantenimiento', 'Mantenimiento')], max_length=20, verbose_name='Estado nuevo')),
+                ('registrado_por', models.CharField(max_length=150, verbose_name='Registrado por')),
+                ('fecha_registro', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de registro')),
+                ('room', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historial_estados', to='rooms.room', verbose_name='Habitación')),
+            ],
+            options={
+                'verbose_name': 'Historial de estado',
+                'verbose_name_plural': 'Historial de estados',
+                'ordering': ['-fecha_registro', '-id'],
+                'indexes': [models.Index(fields=['room', 'fecha_registro'], name='room_hist_room_fecha_idx'), models.Index(fields=['registrado_por', 'fecha_registro'], name='room_hist_usuario_fecha_idx')],
+            },
+        ),
+    ]
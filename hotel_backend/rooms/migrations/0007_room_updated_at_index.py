@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0006_roomstatushistory'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha de actualización'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+def crear_versiones(apps, schema_editor):
+    TableVersion = apps.get_model('rooms', 'TableVersion')
+    TableVersion.objects.bulk_create([
+        TableVersion(tabla='rooms.room'),
+        TableVersion(tabla='rooms.roomtype'),
+    ])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0008_roomtype_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabla', models.CharField(max_length=100, unique=True, verbose_name='Tabla')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de tabla',
+                'verbose_name_plural': 'Versiones de tablas',
+            },
+        ),
+        migrations.RunPython(crear_versiones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:40
+
+from django.db import migrations
+
+import rooms.fields
+
+TAMANO_LOTE = 2000
+
+
+def rellenar_numero_orden(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    ultimo_id = 0
+    while True:
+        lote = list(Room.objects.filter(id__gt=ultimo_id).order_by('id').only('id', 'numero')[:TAMANO_LOTE])
+        if not lote:
+            break
+        for room in lote:
+            room.numero_orden = rooms.fields.clave_orden_natural(room.numero)
+        Room.objects.bulk_update(lote, ['numero_orden'])
+        ultimo_id = lote[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0009_tableversion'),
+    ]
+
+    operations = [
+        # Primero sin índice: se crea una sola vez después de rellenar la columna
+        migrations.AddField(
+            model_name='room',
+            name='numero_orden',
+            field=rooms.fields.NaturalSortKeyField(default='', source='numero', verbose_name='Clave de orden del número'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(rellenar_numero_orden, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='room',
+            name='numero_orden',
+            field=rooms.fields.NaturalSortKeyField(db_index=True, source='numero', verbose_name='Clave de orden del número'),
+        ),
+        migrations.AlterModelOptions(
+            name='room',
+            options={'ordering': ['numero_orden'], 'verbose_name': 'Habitación', 'verbose_name_plural': 'Habitaciones'},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0010_room_numero_orden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='precio_personalizado',
+            field=models.BooleanField(default=False, help_text='Si está activo, los cambios de precio y descripción del tipo no se propagan a esta habitación', verbose_name='Precio personalizado'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def reconstruir_contadores(apps, schema_editor):
+    # Los contadores existentes no distinguen piso: se recalculan desde Room
+    Room = apps.get_model('rooms', 'Room')
+    RoomStatusCounter = apps.get_model('rooms', 'RoomStatusCounter')
+    RoomStatusCounter.objects.all().delete()
+    filas = Room.objects.order_by().values('estado', 'tipo_habitacion', 'piso').annotate(total=Count('id'))
+    RoomStatusCounter.objects.bulk_create([
+        RoomStatusCounter(
+            estado=fila['estado'],
+            tipo_habitacion_id=fila['tipo_habitacion'],
+            piso=fila['piso'],
+            count=fila['total'],
+        )
+        for fila in filas
+    ])
+
+
+def agrupar_sin_piso(apps, schema_editor):
+    RoomStatusCounter = apps.get_model('rooms', 'RoomStatusCounter')
+    totales = (
+        RoomStatusCounter.objects.order_by().values('estado', 'tipo_habitacion')
+        .annotate(total=models.Sum('count'))
+    )
+    filas = [
+        RoomStatusCounter(estado=fila['estado'], tipo_habitacion_id=fila['tipo_habitacion'], count=fila['total'])
+        for fila in totales
+    ]
+    RoomStatusCounter.objects.all().delete()
+    RoomStatusCounter.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0011_room_precio_personalizado'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='roomstatuscounter',
+            name='unique_room_status_counter',
+        ),
+        migrations.AddField(
+            model_name='roomstatuscounter',
+            name='piso',
+            field=models.IntegerField(default=1, verbose_name='Piso'),
+        ),
+        migrations.RunPython(reconstruir_contadores, agrupar_sin_piso),
+        migrations.AddConstraint(
+            model_name='roomstatuscounter',
+            constraint=models.UniqueConstraint(fields=('estado', 'tipo_habitacion', 'piso'), name='unique_room_status_counter_piso'),
+        ),
+    ]
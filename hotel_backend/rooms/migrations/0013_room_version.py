@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0012_roomstatuscounter_piso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Aumenta en cada escritura; los cambios de estado la comparan para no pisar cambios concurrentes', verbose_name='Versión'),
+        ),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+from .fields import NaturalSortKeyField
 
 class RoomType(models.Model):
     """
@@ -36,6 +38,10 @@ class RoomType(models.Model):
         auto_now_add=True,
         verbose_name='Fecha de creación'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de actualización'
+    )
     
     class Meta:
         verbose_name = 'Tipo de Habitación'
@@ -43,6 +49,36 @@ class RoomType(models.Model):
         
     def __str__(self):
         return self.nombre
+    
+    def valores_heredados(self):
+        """
+        Campos de Room que se copian de este tipo (al crear y al propagar cambios)
+        """
+        return {
+            'precio_base': self.precio_base,
+            'precio_hora_adicional': self.precio_hora_adicional,
+            'descripcion': self.description,
+        }
+    
+    def valores_habitacion(self):
+        """
+        Valores que hereda una habitación nueva de este tipo
+        """
+        return {
+            **self.valores_heredados(),
+            # Valores por defecto
+            'horas_base': 3,
+            'cobro_adicional': True,
+        }
+
+class VersionDesactualizada(Exception):
+    """
+    Un guardado con ``version_esperada`` encontró la habitación en otra versión:
+    otra escritura la cambió desde que se leyó.
+    """
+    def __init__(self, room_id):
+        super().__init__(f'La habitación {room_id} fue modificada desde que se leyó')
+        self.room_id = room_id
 
 class Room(models.Model):
     """
@@ -55,11 +91,24 @@ class Room(models.Model):
         ('mantenimiento', 'Mantenimiento'),
     ]
     
+    # Estados a los que se puede pasar desde cada estado
+    TRANSICIONES = {
+        'disponible': ('ocupada', 'limpieza', 'mantenimiento'),
+        'ocupada': ('limpieza', 'mantenimiento'),
+        'limpieza': ('disponible', 'mantenimiento'),
+        'mantenimiento': ('disponible', 'limpieza'),
+    }
+    
     numero = models.CharField(
         max_length=10, 
         unique=True,
         verbose_name='Número de habitación'
     )
+    numero_orden = NaturalSortKeyField(
+        source='numero',
+        db_index=True,
+        verbose_name='Clave de orden del número'
+    )
     tipo_habitacion = models.ForeignKey(
         RoomType, 
         on_delete=models.CASCADE,
@@ -71,6 +120,12 @@ class Room(models.Model):
         default='disponible',
         verbose_name='Estado'
     )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name='Versión',
+        help_text='Aumenta en cada escritura; los cambios de estado la comparan para no pisar cambios concurrentes'
+    )
     precio_base = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -97,6 +152,11 @@ class Room(models.Model):
         default=True,
         verbose_name='Cobrar horas adicionales'
     )
+    precio_personalizado = models.BooleanField(
+        default=False,
+        verbose_name='Precio personalizado',
+        help_text='Si está activo, los cambios de precio y descripción del tipo no se propagan a esta habitación'
+    )
     piso = models.IntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(10)],
         default=1,
@@ -113,17 +173,88 @@ class Room(models.Model):
     )
     updated_at = models.DateTimeField(
         auto_now=True,
+        db_index=True,
         verbose_name='Fecha de actualización'
     )
     
     class Meta:
         verbose_name = 'Habitación'
         verbose_name_plural = 'Habitaciones'
-        ordering = ['numero']
+        ordering = ['numero_orden']
         
     def __str__(self):
         return f"Habitación {self.numero} - {self.tipo_habitacion}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordar la clave (estado, tipo, piso) guardada para ajustar los contadores al guardar
+        instance._clave_contador = (
+            instance.__dict__.get('estado'),
+            instance.__dict__.get('tipo_habitacion_id'),
+            instance.__dict__.get('piso'),
+        )
+        return instance
+    
+    def save(self, *args, version_esperada=None, **kwargs):
+        """
+        Con ``version_esperada`` el UPDATE es compare-and-set: solo se aplica si la
+        fila sigue en esa versión y, si no, lanza ``VersionDesactualizada`` sin
+        pisar la otra escritura (RoomSerializer.update pasa la versión leída). Sin
+        ella es un guardado normal que incrementa la versión en la base.
+        """
+        # Los contadores de estado se ajustan en post_save dentro de esta misma transacción
+        with transaction.atomic():
+            clave = getattr(self, '_clave_contador', None)
+            if self.pk is not None and (clave is None or None in clave):
+                self._clave_contador = Room.objects.filter(pk=self.pk).values_list(
+                    'estado', 'tipo_habitacion_id', 'piso'
+                ).first()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'numero' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'numero_orden'}
+            incrementar_version = not self._state.adding and self.pk is not None
+            version_leida = self.__dict__.get('version')
+            if incrementar_version:
+                if version_esperada is not None:
+                    # Ver _do_update; el número nuevo se conoce sin releer la fila
+                    self._version_esperada = version_esperada
+                    self.version = version_esperada + 1
+                else:
+                    # Incremento en la base: una instancia leída antes no puede reusar un número ya usado
+                    self.version = models.F('version') + 1
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+            try:
+                super().save(*args, **kwargs)
+            except Exception:
+                if incrementar_version:
+                    # Vuelve a la versión leída, o a diferida si no se había cargado
+                    del self.__dict__['version']
+                    if version_leida is not None:
+                        self.version = version_leida
+                raise
+            finally:
+                self._version_esperada = None
+            if incrementar_version and version_esperada is None:
+                # Queda diferida: solo se relee si alguien la consulta
+                del self.__dict__['version']
+    
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        esperada = getattr(self, '_version_esperada', None)
+        if esperada is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if super()._do_update(base_qs.filter(version=esperada), using, pk_val, values, update_fields, forced_update):
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            # Otra escritura cambió la habitación desde que se leyó: no se pisan sus columnas
+            raise VersionDesactualizada(pk_val)
+        return False
+    
+    @classmethod
+    def transicion_permitida(cls, estado_anterior, estado_nuevo):
+        return estado_anterior == estado_nuevo or estado_nuevo in cls.TRANSICIONES.get(estado_anterior, ())
+    
     @property
     def is_available(self):
         return self.estado == 'disponible'
@@ -140,3 +271,117 @@ class Room(models.Model):
             return self.precio_base + (horas_extras * self.precio_hora_adicional)
         
         return self.precio_base
+
+class RoomStatusCounter(models.Model):
+    """
+    Contador de habitaciones por (estado, tipo de habitación, piso).
+
+    Se mantiene incrementalmente en cada alta, baja o cambio de estado para que
+    el dashboard no tenga que agrupar la tabla de habitaciones en cada consulta.
+    """
+    estado = models.CharField(
+        max_length=20,
+        choices=Room.STATUS_CHOICES,
+        verbose_name='Estado'
+    )
+    tipo_habitacion = models.ForeignKey(
+        RoomType,
+        on_delete=models.CASCADE,
+        verbose_name='Tipo de habitación'
+    )
+    piso = models.IntegerField(
+        default=1,
+        verbose_name='Piso'
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name='Cantidad'
+    )
+    
+    class Meta:
+        verbose_name = 'Contador de estado de habitaciones'
+        verbose_name_plural = 'Contadores de estado de habitaciones'
+        constraints = [
+            models.UniqueConstraint(fields=['estado', 'tipo_habitacion', 'piso'], name='unique_room_status_counter_piso'),
+        ]
+        
+    def __str__(self):
+        return f"{self.tipo_habitacion} - piso {self.piso} - {self.estado}: {self.count}"
+
+class RoomStatusHistory(models.Model):
+    """
+    Registro de solo inserción de los cambios de estado de habitaciones
+    """
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='historial_estados',
+        verbose_name='Habitación'
+    )
+    numero = models.CharField(
+        max_length=10,
+        verbose_name='Número de habitación'
+    )
+    estado_anterior = models.CharField(
+        max_length=20,
+        choices=Room.STATUS_CHOICES,
+        verbose_name='Estado anterior'
+    )
+    estado_nuevo = models.CharField(
+        max_length=20,
+        choices=Room.STATUS_CHOICES,
+        verbose_name='Estado nuevo'
+    )
+    registrado_por = models.CharField(
+        max_length=150,
+        verbose_name='Registrado por'
+    )
+    fecha_registro = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha de registro'
+    )
+    
+    class Meta:
+        verbose_name = 'Historial de estado'
+        verbose_name_plural = 'Historial de estados'
+        ordering = ['-fecha_registro', '-id']
+        indexes = [
+            models.Index(fields=['room', 'fecha_registro'], name='room_hist_room_fecha_idx'),
+            models.Index(fields=['registrado_por', 'fecha_registro'], name='room_hist_usuario_fecha_idx'),
+        ]
+        
+    def __str__(self):
+        return f"Habitación {self.numero}: {self.estado_anterior} → {self.estado_nuevo} ({self.registrado_por})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('El historial de estados es de solo inserción')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('El historial de estados es de solo inserción')
+
+class TableVersion(models.Model):
+    """
+    Versión de una tabla, incrementada en la misma transacción que cada escritura.
+
+    Es el punto de invalidación compartido por todos los workers: las cachés en
+    memoria de cada proceso incluyen la versión en su clave.
+    """
+    tabla = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Tabla'
+    )
+    version = models.BigIntegerField(
+        default=0,
+        verbose_name='Versión'
+    )
+    
+    class Meta:
+        verbose_name = 'Versión de tabla'
+        verbose_name_plural = 'Versiones de tablas'
+        
+    def __str__(self):
+        return f"{self.tabla} v{self.version}"
@@ -0,0 +1,48 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.settings import api_settings
+
+
+class HistorialCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para el historial de estados: cada página
+    continúa desde la última fecha vista en lugar de usar OFFSET.
+    """
+    ordering = ('-fecha_registro', '-id')
+    page_size = 50
+    page_size_query_param = 'limite'
+    max_page_size = 500
+
+
+class RoomCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para el listado de habitaciones en orden natural de
+    número (``numero_orden``, indexado): cada página es una búsqueda por índice
+    a partir del último número visto, sin OFFSET ni COUNT(*).
+
+    Si la petición trae ``?page=`` se conserva la paginación por número de
+    página para los clientes existentes.
+    """
+    ordering = ('numero_orden',)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'limite'
+    max_page_size = 500
+    legacy_pagination_class = PageNumberPagination
+
+    def __init__(self):
+        self._legacy = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.legacy_pagination_class.page_query_param in request.query_params:
+            self._legacy = self.legacy_pagination_class()
+            return self._legacy.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self._legacy is not None:
+            return self._legacy.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self._legacy is not None:
+            return self._legacy.to_html()
+        return super().to_html()
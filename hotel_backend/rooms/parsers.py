@@ -0,0 +1,22 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .bulk import leer_csv
+
+
+class CSVParser(BaseParser):
+    """
+    Interpreta un cuerpo text/csv con encabezado como una lista de filas (dict).
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return []
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            texto = stream.read().decode('utf-8-sig' if encoding.lower() in ('utf-8', 'utf8') else encoding)
+            return list(leer_csv(texto))
+        except (UnicodeDecodeError, ValueError) as exc:
+            raise ParseError(f'CSV inválido: {exc}')
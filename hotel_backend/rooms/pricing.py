@@ -0,0 +1,132 @@
+"""
+Tarifas de habitaciones: cotización en lote y propagación de cambios del tipo.
+
+La cotización aplica las mismas reglas que ``Room.calcular_precio_total`` (precio base que
+cubre ``horas_base`` y, si ``cobro_adicional``, ``precio_hora_adicional`` por
+cada hora extra) sobre arreglos de centavos enteros en una sola pasada
+vectorizada. La aritmética entera da exactamente el mismo resultado que el
+cálculo con Decimal del método escalar mientras quepa en int64: las horas se
+limitan a ``MAX_HORAS`` y los precios a ``max_digits=10``, así que el mayor
+total posible (~10^14 centavos) queda muy lejos del desbordamiento.
+"""
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa el recorrido en Python puro
+    np = None
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .events import room_events
+from .models import Room
+from . import versioning
+
+# Un año bisiesto de estadía
+MAX_HORAS = 366 * 24
+
+
+def _a_centavos(valor):
+    return int((Decimal(valor) * 100).to_integral_value())
+
+
+def centavos_a_decimal(centavos):
+    """Convierte centavos enteros en Decimal con dos decimales."""
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def cargar_tarifas(room_ids):
+    """
+    Lee en una sola consulta las tarifas de las habitaciones indicadas.
+    Devuelve {room_id: (base_centavos, hora_adicional_centavos, horas_base, cobro_adicional)}.
+    """
+    filas = Room.objects.filter(id__in=set(room_ids)).order_by().values_list(
+        'id', 'precio_base', 'precio_hora_adicional', 'horas_base', 'cobro_adicional'
+    )
+    return {
+        room_id: (_a_centavos(base), _a_centavos(adicional), horas_base, cobro)
+        for room_id, base, adicional, horas_base, cobro in filas
+    }
+
+
+def _cotizar_numpy(room_ids, horas, tarifas):
+    ids = np.fromiter(tarifas.keys(), dtype=np.int64, count=len(tarifas))
+    base, adicional, horas_base, cobro = (
+        np.array(columna, dtype=np.int64) for columna in zip(*tarifas.values())
+    )
+    orden = np.argsort(ids)
+    ids = ids[orden]
+
+    consultadas = np.asarray(room_ids, dtype=np.int64)
+    posiciones = np.minimum(np.searchsorted(ids, consultadas), len(ids) - 1)
+    encontradas = ids[posiciones] == consultadas
+    posiciones = orden[posiciones]
+
+    extras = np.maximum(np.asarray(horas, dtype=np.int64) - horas_base[posiciones], 0) * cobro[posiciones]
+    totales = (base[posiciones] + extras * adicional[posiciones]).tolist()
+    if not encontradas.all():
+        for i in np.flatnonzero(~encontradas).tolist():
+            totales[i] = None
+    return totales
+
+
+def _cotizar_python(room_ids, horas, tarifas):
+    totales = []
+    for room_id, horas_uso in zip(room_ids, horas):
+        tarifa = tarifas.get(room_id)
+        if tarifa is None:
+            totales.append(None)
+            continue
+        base, adicional, horas_base, cobro = tarifa
+        if cobro and horas_uso > horas_base:
+            totales.append(base + (horas_uso - horas_base) * adicional)
+        else:
+            totales.append(base)
+    return totales
+
+
+def cotizar_centavos(room_ids, horas, tarifas=None):
+    """
+    Cotiza cada par (room_ids[i], horas[i]) y devuelve el total en centavos,
+    o None en las posiciones cuya habitación no existe. ``ValueError`` si alguna
+    cantidad de horas está fuera de [0, MAX_HORAS].
+    """
+    if horas and (min(horas) < 0 or max(horas) > MAX_HORAS):
+        raise ValueError(f'Las horas deben estar entre 0 y {MAX_HORAS}')
+    if tarifas is None:
+        tarifas = cargar_tarifas(room_ids)
+    if not tarifas:
+        return [None] * len(room_ids)
+    if np is not None:
+        return _cotizar_numpy(room_ids, horas, tarifas)
+    return _cotizar_python(room_ids, horas, tarifas)
+
+
+def cotizar(room_ids, horas, tarifas=None):
+    """
+    Igual que ``cotizar_centavos`` pero devolviendo Decimal con dos decimales,
+    comparable con ``Room.calcular_precio_total``.
+    """
+    return [
+        None if total is None else centavos_a_decimal(total)
+        for total in cotizar_centavos(room_ids, horas, tarifas)
+    ]
+
+
+def propagar_tarifas(tipo):
+    """
+    Copia precios y descripción de ``tipo`` a sus habitaciones sin precio
+    personalizado con un solo UPDATE, y devuelve cuántas filas cambiaron.
+    Invalida las cachés de listados en la misma transacción.
+    """
+    valores = tipo.valores_heredados()
+    with transaction.atomic():
+        actualizadas = Room.objects.filter(
+            tipo_habitacion=tipo, precio_personalizado=False
+        ).exclude(Q(**valores)).update(version=F('version') + 1, updated_at=timezone.now(), **valores)
+        if actualizadas:
+            versioning.incrementar(Room)
+            transaction.on_commit(room_events.notificar)
+    return actualizadas
@@ -1,7 +1,11 @@
+from collections import Counter
 from rest_framework import serializers
-from .models import Room, RoomType
+from hotel_backend.fast_serializers import FastReadSerializer, columna, formateador_decimal, formateador_fecha
+from hotel_backend.sparse_fields import SparseFieldsSerializerMixin
+from .models import Room, RoomType, RoomStatusHistory
+from .pricing import MAX_HORAS
 
-class RoomTypeSerializer(serializers.ModelSerializer):
+class RoomTypeSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = RoomType
         fields = ['id', 'nombre', 'description', 'precio_base', 'precio_hora_adicional', 'created_at']
@@ -23,21 +27,42 @@ class RoomTypeCreateSerializer(serializers.ModelSerializer):
             'created_at': instance.created_at
         }
 
-class RoomSerializer(serializers.ModelSerializer):
+class RoomSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     tipo_habitacion_detail = RoomTypeSerializer(source='tipo_habitacion', read_only=True)
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
     is_available = serializers.BooleanField(read_only=True)
     politica_horas = serializers.SerializerMethodField()
     
+    sparse_dependencies = {
+        'estado_display': ('estado',),
+        'is_available': ('estado',),
+        'politica_horas': ('horas_base', 'cobro_adicional'),
+    }
+    
     class Meta:
         model = Room
         fields = [
             'id', 'numero', 'tipo_habitacion', 'tipo_habitacion_detail', 'estado', 
-            'estado_display', 'precio_base', 'precio_hora_adicional', 'descripcion',
+            'estado_display', 'precio_base', 'precio_hora_adicional', 'precio_personalizado', 'descripcion',
             'horas_base', 'cobro_adicional', 'politica_horas', 'piso', 'notas', 
-            'is_available', 'created_at', 'updated_at'
+            'is_available', 'version', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'version', 'created_at', 'updated_at']
+    
+    def update(self, instance, validated_data):
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        # Compare-and-set contra la versión leída: no pisa un cambio de estado concurrente
+        instance.save(version_esperada=instance.version)
+        return instance
+    
+    def validate_estado(self, value):
+        if self.instance is not None and not Room.transicion_permitida(self.instance.estado, value):
+            permitidos = ', '.join(Room.TRANSICIONES.get(self.instance.estado, ())) or 'ninguno'
+            raise serializers.ValidationError(
+                f'No se puede pasar de {self.instance.estado} a {value}. Permitidos: {permitidos}'
+            )
+        return value
     
     def get_politica_horas(self, obj):
         return {
@@ -45,6 +70,73 @@ class RoomSerializer(serializers.ModelSerializer):
             'cobro_adicional': obj.cobro_adicional
         }
 
+class RoomFastSerializer(FastReadSerializer):
+    """
+    Versión rápida de solo lectura de RoomSerializer para listados (mismo JSON)
+    """
+    columns = ('numero_orden',)  # no se publica: lo usa el cursor de paginación
+    field_columns = {
+        'id': ('id',),
+        'numero': ('numero',),
+        'tipo_habitacion': ('tipo_habitacion',),
+        'tipo_habitacion_detail': (
+            'tipo_habitacion', 'tipo_habitacion__nombre', 'tipo_habitacion__description',
+            'tipo_habitacion__precio_base', 'tipo_habitacion__precio_hora_adicional', 'tipo_habitacion__created_at',
+        ),
+        'estado': ('estado',),
+        'estado_display': ('estado',),
+        'precio_base': ('precio_base',),
+        'precio_hora_adicional': ('precio_hora_adicional',),
+        'precio_personalizado': ('precio_personalizado',),
+        'descripcion': ('descripcion',),
+        'horas_base': ('horas_base',),
+        'cobro_adicional': ('cobro_adicional',),
+        'politica_horas': ('horas_base', 'cobro_adicional'),
+        'piso': ('piso',),
+        'notas': ('notas',),
+        'is_available': ('estado',),
+        'version': ('version',),
+        'created_at': ('created_at',),
+        'updated_at': ('updated_at',),
+    }
+    estados = dict(Room.STATUS_CHOICES)
+    
+    def representaciones(self):
+        precio = formateador_decimal(2, 10)
+        fecha = formateador_fecha()
+        estados = self.estados
+        return {
+            'id': columna('id'),
+            'numero': columna('numero'),
+            'tipo_habitacion': columna('tipo_habitacion'),
+            'tipo_habitacion_detail': lambda row: {
+                'id': row['tipo_habitacion'],
+                'nombre': row['tipo_habitacion__nombre'],
+                'description': row['tipo_habitacion__description'],
+                'precio_base': precio(row['tipo_habitacion__precio_base']),
+                'precio_hora_adicional': precio(row['tipo_habitacion__precio_hora_adicional']),
+                'created_at': fecha(row['tipo_habitacion__created_at']),
+            },
+            'estado': columna('estado'),
+            'estado_display': lambda row: estados.get(row['estado'], row['estado']),
+            'precio_base': columna('precio_base', precio),
+            'precio_hora_adicional': columna('precio_hora_adicional', precio),
+            'precio_personalizado': columna('precio_personalizado'),
+            'descripcion': columna('descripcion'),
+            'horas_base': columna('horas_base'),
+            'cobro_adicional': columna('cobro_adicional'),
+            'politica_horas': lambda row: {
+                'horas_base': row['horas_base'],
+                'cobro_adicional': row['cobro_adicional'],
+            },
+            'piso': columna('piso'),
+            'notas': columna('notas'),
+            'is_available': lambda row: row['estado'] == 'disponible',
+            'version': columna('version'),
+            'created_at': columna('created_at', fecha),
+            'updated_at': columna('updated_at', fecha),
+        }
+
 class RoomCreateSerializer(serializers.ModelSerializer):
     
     class Meta:
@@ -52,21 +144,8 @@ class RoomCreateSerializer(serializers.ModelSerializer):
         fields = ['numero', 'tipo_habitacion', 'estado', 'piso', 'notas']
     
     def create(self, validated_data):
-        # Auto-cargar datos del tipo de habitación
-        room_type = validated_data['tipo_habitacion']
-        
-        # Auto-cargar precio base del tipo de habitación
-        validated_data['precio_base'] = room_type.precio_base
-        
-        # Auto-cargar precio hora adicional del tipo de habitación  
-        validated_data['precio_hora_adicional'] = room_type.precio_hora_adicional
-        
-        # Auto-cargar descripción del tipo de habitación
-        validated_data['descripcion'] = room_type.description
-        
-        # Valores por defecto
-        validated_data['horas_base'] = 3
-        validated_data['cobro_adicional'] = True
+        # Auto-cargar precios, descripción y política de horas del tipo de habitación
+        validated_data.update(validated_data['tipo_habitacion'].valores_habitacion())
         
         return super().create(validated_data)
     
@@ -80,6 +159,63 @@ class RoomCreateSerializer(serializers.ModelSerializer):
         
         return super().update(instance, validated_data)
 
+class RoomBulkCreateItemSerializer(serializers.Serializer):
+    """
+    Fila de una carga masiva de habitaciones. Se valida sin consultar la base:
+    el tipo (id o nombre) y los números repetidos se resuelven por lote.
+    """
+    numero = serializers.CharField(max_length=10)
+    tipo_habitacion = serializers.CharField(max_length=100)
+    estado = serializers.ChoiceField(choices=Room.STATUS_CHOICES, default='disponible')
+    piso = serializers.IntegerField(min_value=1, max_value=10, default=1)
+    notas = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
 class RoomStatusChangeSerializer(serializers.Serializer):
     estado = serializers.ChoiceField(choices=Room.STATUS_CHOICES)
+    # Versión leída por el cliente; si cambió en la base se responde 409
+    version = serializers.IntegerField(required=False, min_value=1)
     # Los campos registrado_por y fecha_registro se capturarán automáticamente
+
+class RoomStatusHistorySerializer(serializers.ModelSerializer):
+    estado_anterior_display = serializers.CharField(source='get_estado_anterior_display', read_only=True)
+    estado_nuevo_display = serializers.CharField(source='get_estado_nuevo_display', read_only=True)
+    
+    class Meta:
+        model = RoomStatusHistory
+        fields = [
+            'id', 'room', 'numero', 'estado_anterior', 'estado_anterior_display',
+            'estado_nuevo', 'estado_nuevo_display', 'registrado_por', 'fecha_registro'
+        ]
+        read_only_fields = fields
+
+class RoomBulkStatusItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    estado = serializers.ChoiceField(choices=Room.STATUS_CHOICES)
+    version = serializers.IntegerField(required=False, min_value=1)
+
+class RoomBulkStatusChangeSerializer(serializers.Serializer):
+    cambios = RoomBulkStatusItemSerializer(many=True, allow_empty=False, max_length=500)
+    
+    def validate_cambios(self, value):
+        ids = Counter(cambio['id'] for cambio in value)
+        repetidos = sorted(room_id for room_id, veces in ids.items() if veces > 1)
+        if repetidos:
+            raise serializers.ValidationError(f"Habitaciones repetidas en la solicitud: {repetidos}")
+        return value
+
+
+class RoomQuoteSerializer(serializers.Serializer):
+    """
+    Cotización en lote en formato columnar: habitaciones[i] por horas[i].
+    """
+    habitaciones = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1), allow_empty=False, max_length=100000
+    )
+    horas = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=MAX_HORAS), allow_empty=False, max_length=100000
+    )
+    
+    def validate(self, attrs):
+        if len(attrs['habitaciones']) != len(attrs['horas']):
+            raise serializers.ValidationError("Las listas habitaciones y horas deben tener la misma longitud")
+        return attrs
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Room, RoomType
+from .events import room_events
+from .dashboard import dashboard
+from . import counters, versioning
+
+
+@receiver(post_save, sender=Room)
+def actualizar_contadores_estado(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mueve la habitación entre contadores (estado, tipo, piso) al crearla o modificarla
+    """
+    if update_fields is not None and not {'estado', 'tipo_habitacion', 'piso'} & set(update_fields):
+        return
+    anterior = None if created else getattr(instance, '_clave_contador', None)
+    nueva = (instance.estado, instance.tipo_habitacion_id, instance.piso)
+    if created or anterior != nueva:
+        counters.mover(anterior, nueva)
+    instance._clave_contador = nueva
+
+
+@receiver(post_delete, sender=Room)
+def descontar_habitacion_eliminada(sender, instance, **kwargs):
+    """
+    Descuenta la habitación eliminada de su contador
+    """
+    clave = getattr(instance, '_clave_contador', None) or (instance.estado, instance.tipo_habitacion_id, instance.piso)
+    counters.mover(clave, None)
+
+
+@receiver(post_save, sender=Room)
+def notificar_eventos_habitacion(sender, instance, **kwargs):
+    """
+    Despierta el stream de eventos de este proceso cuando se confirma el cambio
+    """
+    transaction.on_commit(room_events.notificar)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+def incrementar_version_tabla(sender, **kwargs):
+    """
+    Invalida las cachés de listados de todos los workers en la misma transacción
+    """
+    versioning.incrementar(sender)
+
+
+@receiver(post_save, sender=RoomType)
+def refrescar_dashboard_tipo(sender, **kwargs):
+    """
+    El desglose por tipo del dashboard usa el nombre: se recalcula al renombrarlo
+    """
+    dashboard.programar_refresco()
@@ -1,3 +1,849 @@
-from django.test import TestCase
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from hotel_backend.response_cache import response_cache
+from hotel_backend.sparse_fields import resolver_campos
+from rooms import bulk, counters, estados, pricing
+from rooms.dashboard import DashboardSnapshot, dashboard
+from rooms.events import RoomEventBroker
+from rooms.history import HistoryBatch
+from rooms.models import Room, RoomStatusCounter, RoomStatusHistory, RoomType, VersionDesactualizada
+from rooms.serializers import RoomFastSerializer, RoomSerializer
+
+
+class CambioEstadoConcurrenteTests(TransactionTestCase):
+    """Varios hilos cambian el estado de la misma habitación: no se pierde ninguna transición."""
+    HILOS = 4
+    CAMBIOS = 15
+
+    def setUp(self):
+        tipo = RoomType.objects.create(nombre='Concurrencia', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='C-1', tipo_habitacion=tipo)
+
+    def _ejecutar(self, cambiar):
+        resultados = Counter()
+        errores = []
+        lock = threading.Lock()
+
+        def trabajar(numero_hilo):
+            locales = Counter()
+            try:
+                while locales['exitosos'] < self.CAMBIOS and locales['intentos'] < self.CAMBIOS * 50:
+                    locales['intentos'] += 1
+                    try:
+                        cambiar(self.room.pk, f'hilo-{numero_hilo}')
+                    except estados.ConflictoVersion:
+                        locales['conflictos'] += 1
+                        continue
+                    except Exception as error:
+                        with lock:
+                            errores.append(f'{type(error).__name__}: {error}')
+                        return
+                    locales['exitosos'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    resultados.update(locales)
+
+        hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        return resultados['exitosos']
+
+    def _verificar(self, exitosos):
+        self.assertEqual(exitosos, self.HILOS * self.CAMBIOS)
+        final = Room.objects.values('estado', 'version').get(pk=self.room.pk)
+        self.assertEqual(final['version'] - self.room.version, exitosos)
+
+        historial = list(
+            RoomStatusHistory.objects.filter(room=self.room).order_by('id').values_list('estado_anterior', 'estado_nuevo')
+        )
+        self.assertEqual(len(historial), exitosos)
+        # Cadena continua: cada registro parte del estado en que dejó la habitación el anterior
+        self.assertEqual(historial[0][0], self.room.estado)
+        for anterior, actual in zip(historial, historial[1:]):
+            self.assertEqual(actual[0], anterior[1])
+            self.assertEqual(estados.SIGUIENTE[actual[0]], actual[1])
+        self.assertEqual(historial[-1][1], final['estado'])
+        self.assertEqual(counters.reconciliar(corregir=False), [])
+
+    def test_compare_and_set(self):
+        self._verificar(self._ejecutar(estados.avanzar_ciclo))
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_select_for_update(self):
+        self._verificar(self._ejecutar(estados.avanzar_ciclo_con_bloqueo))
+
+
+class GuardadoConVersionTests(TestCase):
+    """RoomSerializer.update compara la versión leída: una instancia vieja no pisa un cambio de estado."""
+
+    def setUp(self):
+        tipo = RoomType.objects.create(nombre='Versiones', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='V-1', tipo_habitacion=tipo, estado='ocupada')
+
+    def test_guardado_con_instancia_vieja_no_pisa_el_cambio(self):
+        leida = Room.objects.get(pk=self.room.pk)
+        estados.cambiar_estado(Room.objects.get(pk=self.room.pk), 'limpieza', 'recepcion', timezone.now())
+
+        serializer = RoomSerializer(leida, data={'notas': 'x'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(VersionDesactualizada):
+            serializer.save()
+
+        final = Room.objects.get(pk=self.room.pk)
+        self.assertEqual(final.estado, 'limpieza')
+        self.assertEqual(final.version, self.room.version + 1)
+        self.assertEqual(
+            list(RoomStatusHistory.objects.filter(room=self.room).values_list('estado_anterior', 'estado_nuevo')),
+            [('ocupada', 'limpieza')],
+        )
+        self.assertEqual(counters.reconciliar(corregir=False), [])
+
+    def test_patch_con_instancia_vieja_responde_409(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='versiones', password='x', role='receptionist'))
+        leida = Room.objects.get(pk=self.room.pk)
+        estados.cambiar_estado(Room.objects.get(pk=self.room.pk), 'limpieza', 'recepcion', timezone.now())
+
+        with mock.patch('rooms.views.RoomViewSet.get_object', return_value=leida):
+            respuesta = client.patch(f'/api/rooms/{self.room.pk}/', {'notas': 'x'}, format='json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['habitacion']['estado'], 'limpieza')
+        self.assertEqual(Room.objects.get(pk=self.room.pk).notas, None)
+
+    def test_guardado_normal_no_compara_ni_relee(self):
+        # Admin, comandos, load_initial_data: guardado normal, el último gana sin excepción
+        leida = Room.objects.get(pk=self.room.pk)
+        estados.cambiar_estado(Room.objects.get(pk=self.room.pk), 'limpieza', 'recepcion', timezone.now())
+        leida.notas = 'x'
+        with CaptureQueriesContext(connection) as consultas:
+            leida.save(update_fields=['notas'])
+        tabla = connection.ops.quote_name(Room._meta.db_table)
+        lecturas = [c['sql'] for c in consultas.captured_queries
+                    if c['sql'].startswith('SELECT') and tabla in c['sql'].split('WHERE')[0]]
+        self.assertEqual(lecturas, [])
+        self.assertEqual(leida.version, self.room.version + 2)
+        self.assertEqual(Room.objects.get(pk=self.room.pk).estado, 'limpieza')
+
+    def test_guardado_sin_cambios_ajenos_incrementa_version(self):
+        room = Room.objects.get(pk=self.room.pk)
+        room.notas = 'x'
+        room.save()
+        room.notas = 'y'
+        room.save(update_fields=['notas'])
+        self.assertEqual(room.version, self.room.version + 2)
+        self.assertEqual(Room.objects.get(pk=self.room.pk).version, room.version)
+
+
+@override_settings(ROOM_EVENTS_POLL_INTERVAL=0.05, ROOM_EVENTS_HEARTBEAT=0.2, ROOM_EVENTS_OVERLAP=5.0)
+class EventosConfirmadosTardeTests(TestCase):
+    """Una fila confirmada con updated_at anterior a la marca también se emite, una sola vez."""
+
+    def setUp(self):
+        tipo = RoomType.objects.create(nombre='Eventos', precio_base=Decimal('40000'))
+        self.primera = Room.objects.create(numero='E-1', tipo_habitacion=tipo)
+        self.segunda = Room.objects.create(numero='E-2', tipo_habitacion=tipo)
+
+    async def _siguientes(self, stream, cantidad):
+        eventos = []
+
+        async def leer():
+            while len(eventos) < cantidad:
+                texto = await stream.__anext__()
+                if texto.startswith('id: '):
+                    eventos.append(texto)
+
+        try:
+            await asyncio.wait_for(leer(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        return eventos
+
+    async def _sin_mas_eventos(self, stream):
+        # Hasta el heartbeat no llega nada más que el ping
+        texto = await asyncio.wait_for(stream.__anext__(), timeout=5)
+        self.assertEqual(texto, ': ping\n\n')
+
+    def _numeros(self, eventos):
+        return [json.loads(evento.split('data: ', 1)[1])['numero'] for evento in eventos]
+
+    def _escribir(self, room, updated_at=None):
+        if updated_at is None:
+            room.notas = 'cambio'
+            room.save()
+        else:
+            # Como una transacción lenta: confirma con un updated_at ya superado por la marca
+            Room.objects.filter(pk=room.pk).update(updated_at=updated_at)
+
+    def test_escritura_confirmada_tarde(self):
+        broker = RoomEventBroker()
+
+        async def escenario():
+            stream = broker.stream()
+            self.assertTrue((await stream.__anext__()).startswith('retry: '))
+            await sync_to_async(self._escribir)(self.primera)
+            broker.notificar()
+            primero = await self._siguientes(stream, 1)
+            self.assertEqual(self._numeros(primero), ['E-1'])
+
+            marca = (await sync_to_async(Room.objects.get)(pk=self.primera.pk)).updated_at
+            await sync_to_async(self._escribir)(self.segunda, marca - timedelta(seconds=1))
+            broker.notificar()
+            tarde = await self._siguientes(stream, 1)
+            self.assertEqual(self._numeros(tarde), ['E-2'])
+            await self._sin_mas_eventos(stream)
+            await stream.aclose()
+
+            # Al reanudar se relee la ventana: el evento tardío llega aunque su id sea menor
+            ultimo_id = primero[0].split('\n', 1)[0][len('id: '):]
+            reanudado = broker.stream(ultimo_id)
+            await reanudado.__anext__()
+            self.assertEqual(await self._siguientes(reanudado, 1), tarde)
+            await self._sin_mas_eventos(reanudado)
+            await reanudado.aclose()
+
+        async_to_sync(escenario)()
+
+
+class StreamEventosTests(TestCase):
+    """/api/rooms/eventos/ solo transmite bajo ASGI."""
+
+    def setUp(self):
+        usuario = User.objects.create_user(username='eventos', password='x', role='receptionist')
+        self.url = f'/api/rooms/eventos/?token={AccessToken.for_user(usuario)}'
+
+    def test_bajo_wsgi_responde_503(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertFalse(respuesta.streaming)
+
+    async def test_bajo_asgi_transmite(self):
+        respuesta = await self.async_client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        contenido = aiter(respuesta.streaming_content)
+        primero = await asyncio.wait_for(anext(contenido), timeout=5)
+        self.assertTrue(primero.startswith(b'retry: '))
+        await contenido.aclose()
+
+
+class GetCondicionalTests(TestCase):
+    """ConditionalGetMixin en el detalle y el listado de habitaciones."""
+
+    def setUp(self):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        usuario = User.objects.create_user(username='recepcion', password='x', role='receptionist')
+        self.client = APIClient()
+        self.client.force_authenticate(usuario)
+        self.tipo = RoomType.objects.create(nombre='Condicional', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='C-1', tipo_habitacion=self.tipo)
+        Room.objects.create(numero='C-2', tipo_habitacion=self.tipo)
+
+    def _serializers(self):
+        """Cuenta las llamadas a los serializers del detalle y del listado rápido."""
+        detalle = mock.patch.object(
+            RoomSerializer, 'to_representation', autospec=True, side_effect=RoomSerializer.to_representation
+        )
+        # El serializer rápido arma sus representaciones una vez por respuesta
+        listado = mock.patch.object(
+            RoomFastSerializer, 'representaciones', autospec=True, side_effect=RoomFastSerializer.representaciones
+        )
+        return detalle, listado
+
+    def test_detalle_responde_304_sin_serializar(self):
+        url = f'/api/rooms/{self.room.pk}/'
+        primera = self.client.get(url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertTrue(primera['ETag'])
+        self.assertTrue(primera['Last-Modified'])
+
+        detalle, listado = self._serializers()
+        with detalle as llamadas, listado:
+            segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(segunda.status_code, 304)
+        self.assertEqual(segunda['ETag'], primera['ETag'])
+        self.assertEqual(segunda.content, b'')
+        self.assertEqual(llamadas.call_count, 0)
+
+    def test_pk_invalido_responde_404(self):
+        self.client.force_authenticate(User.objects.create_user(username='admin-cg', password='x', role='admin'))
+        for url in ('/api/rooms/habitaciones/', '/api/rooms/tipos/abc/', '/api/reservations/abc/',
+                    '/api/inventory/productos/abc/'):
+            with self.subTest(url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_detalle_cambia_tras_una_escritura(self):
+        url = f'/api/rooms/{self.room.pk}/'
+        etag = self.client.get(url)['ETag']
+        respuesta = self.client.patch(url, {'notas': 'Ventana rota'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+
+        detalle, listado = self._serializers()
+        with detalle as llamadas, listado:
+            despues = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(despues.status_code, 200)
+        self.assertNotEqual(despues['ETag'], etag)
+        self.assertEqual(despues.json()['notas'], 'Ventana rota')
+        self.assertEqual(llamadas.call_count, 1)
+
+        # El detalle anida el tipo: editar el tipo también invalida el ETag
+        etag = despues['ETag']
+        self.tipo.description = 'Renovada'
+        self.tipo.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listado_responde_304_sin_serializar(self):
+        url = '/api/rooms/'
+        primera = self.client.get(url)
+        self.assertEqual(primera.status_code, 200)
+        etag = primera['ETag']
+
+        detalle, listado = self._serializers()
+        with detalle, listado as llamadas:
+            # Desde los bytes cacheados y, vaciada la caché, desde ConditionalGetMixin
+            desde_cache = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            response_cache.clear()
+            sin_cache = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        for respuesta in (desde_cache, sin_cache):
+            self.assertEqual(respuesta.status_code, 304)
+            self.assertEqual(respuesta['ETag'], etag)
+        self.assertEqual(llamadas.call_count, 0)
+
+    def test_listado_cambia_tras_una_escritura(self):
+        url = '/api/rooms/'
+        etag = self.client.get(url)['ETag']
+        respuesta = self.client.patch(f'/api/rooms/{self.room.pk}/', {'piso': 3}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+
+        detalle, listado = self._serializers()
+        with detalle, listado as llamadas:
+            despues = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(despues.status_code, 200)
+        self.assertNotEqual(despues['ETag'], etag)
+        self.assertEqual(llamadas.call_count, 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=despues['ETag']).status_code, 304)
+
+class CotizacionTests(TestCase):
+    """pricing.cotizar da lo mismo que Room.calcular_precio_total, con y sin NumPy."""
+
+    def setUp(self):
+        azar = random.Random(8)
+        tipo = RoomType.objects.create(nombre='Cotización', precio_base=Decimal('40000'))
+        Room.objects.bulk_create([
+            Room(
+                numero=f'Q{i}',
+                tipo_habitacion=tipo,
+                precio_base=Decimal(azar.randint(0, 9999999999)).scaleb(-2),
+                precio_hora_adicional=Decimal(azar.randint(0, 9999999999)).scaleb(-2),
+                horas_base=azar.randint(1, 24),
+                cobro_adicional=azar.random() < 0.8,
+            )
+            for i in range(50)
+        ])
+        self.rooms = Room.objects.in_bulk()
+        ids = list(self.rooms)
+        self.habitaciones = [azar.choice(ids) for _ in range(2000)] + [max(ids) + 1]
+        self.horas = [azar.choice([0, 1, pricing.MAX_HORAS, azar.randint(0, pricing.MAX_HORAS)]) for _ in range(2001)]
+        self.usuario = User.objects.create_user(username='cotizacion', password='x', role='receptionist')
+
+    def _esperados(self):
+        return [
+            self.rooms[room_id].calcular_precio_total(horas) if room_id in self.rooms else None
+            for room_id, horas in zip(self.habitaciones, self.horas)
+        ]
+
+    @skipUnless(pricing.np is not None, 'NumPy no está instalado')
+    def test_igual_al_metodo_escalar_con_numpy(self):
+        self.assertEqual(pricing.cotizar(self.habitaciones, self.horas), self._esperados())
+
+    def test_igual_al_metodo_escalar_sin_numpy(self):
+        with mock.patch.object(pricing, 'np', None):
+            self.assertEqual(pricing.cotizar(self.habitaciones, self.horas), self._esperados())
+
+    def test_horas_fuera_de_rango(self):
+        with self.assertRaises(ValueError):
+            pricing.cotizar_centavos(self.habitaciones[:1], [pricing.MAX_HORAS + 1])
+        with self.assertRaises(ValueError):
+            pricing.cotizar_centavos(self.habitaciones[:1], [-1])
+
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        for datos in ({'horas': [10 ** 15]}, {'horas': [10 ** 30]}, {'horas': [pricing.MAX_HORAS + 1]},
+                      {'habitaciones': [10 ** 30]}):
+            with self.subTest(datos):
+                cuerpo = {'habitaciones': self.habitaciones[:1], 'horas': [3], **datos}
+                respuesta = client.post('/api/rooms/cotizar/', cuerpo, format='json')
+                self.assertEqual(respuesta.status_code, 400)
+
+class ImportacionMasivaTests(TestCase):
+
+    def setUp(self):
+        RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.filas = [
+            {'numero': '301', 'tipo_habitacion': 'Estándar', 'piso': 3},
+            {'numero': '302', 'tipo_habitacion': 'Estándar', 'piso': 3},
+        ]
+
+    def test_reintento_por_fila_marca_duplicado_solo_si_el_numero_existe(self):
+        original = Room.objects.bulk_create
+        llamadas = []
+
+        def bulk_create(rooms, *args, **kwargs):
+            llamadas.append(len(rooms))
+            if len(llamadas) == 1:
+                raise IntegrityError('UNIQUE constraint failed: rooms_room.numero')
+            if len(llamadas) == 2:
+                # Otra escritura concurrente inserta la 302 después de la consulta de existentes
+                Room.objects.create(numero='302', tipo_habitacion=rooms[0].tipo_habitacion)
+            return original(rooms, *args, **kwargs)
+
+        with mock.patch.object(Room.objects, 'bulk_create', side_effect=bulk_create):
+            resultado = bulk.importar_habitaciones(self.filas)
+
+        self.assertEqual(llamadas, [2, 1, 1])
+        self.assertEqual([room['numero'] for room in resultado['creadas']], ['301'])
+        self.assertEqual(resultado['errores'], [
+            {'fila': 2, 'errores': {'numero': ['Ya existe una habitación con este número']}},
+        ])
+
+    def test_reintento_por_fila_informa_otra_restriccion(self):
+        error = IntegrityError('CHECK constraint failed: piso')
+        with mock.patch.object(Room.objects, 'bulk_create', side_effect=error):
+            resultado = bulk.importar_habitaciones(self.filas)
+
+        self.assertEqual(resultado['creadas'], [])
+        self.assertEqual(resultado['errores'], [
+            {'fila': 1, 'errores': {'non_field_errors': ['CHECK constraint failed: piso']}},
+            {'fila': 2, 'errores': {'non_field_errors': ['CHECK constraint failed: piso']}},
+        ])
+
+class PropagarTarifasTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='tarifas', password='x', role='admin'))
+        self.tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.heredada = Room.objects.create(numero='401', tipo_habitacion=self.tipo, precio_base=Decimal('40000'))
+        self.personalizada = Room.objects.create(
+            numero='402', tipo_habitacion=self.tipo, precio_base=Decimal('55000'), precio_personalizado=True,
+        )
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def test_omite_habitaciones_con_precio_personalizado(self):
+        respuesta = self.client.patch(
+            f'/api/rooms/tipos/{self.tipo.pk}/?propagar=true', {'precio_base': '42000'}, format='json',
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['propagacion'], {
+            'habitaciones_actualizadas': 1,
+            'omitidas_por_precio_personalizado': 1,
+        })
+        self.heredada.refresh_from_db()
+        self.personalizada.refresh_from_db()
+        self.assertEqual(self.heredada.precio_base, Decimal('42000'))
+        self.assertEqual(self.personalizada.precio_base, Decimal('55000'))
+
+class ContadoresEstadoTests(TestCase):
+    """Los contadores por (estado, tipo, piso) siguen las altas, los cambios y las bajas de habitaciones."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='contadores', password='x', role='admin'))
+        self.estandar = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.suite = RoomType.objects.create(nombre='Suite', precio_base=Decimal('60000'))
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def _guardados(self):
+        return {
+            (c.estado, c.tipo_habitacion_id, c.piso): c.count
+            for c in RoomStatusCounter.objects.filter(count__gt=0)
+        }
+
+    def test_altas_cambios_y_bajas(self):
+        r1 = Room.objects.create(numero='501', tipo_habitacion=self.estandar, piso=1)
+        r2 = Room.objects.create(numero='502', tipo_habitacion=self.estandar, piso=1)
+        r3 = Room.objects.create(numero='503', tipo_habitacion=self.suite, piso=2)
+
+        respuesta = self.client.post(f'/api/rooms/{r1.pk}/cambio-estado/', {'estado': 'ocupada'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        respuesta = self.client.patch(f'/api/rooms/{r2.pk}/', {'piso': 2}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        respuesta = self.client.delete(f'/api/rooms/{r3.pk}/')
+        self.assertEqual(respuesta.status_code, 204)
+
+        self.assertEqual(self._guardados(), {
+            ('ocupada', self.estandar.pk, 1): 1,
+            ('disponible', self.estandar.pk, 2): 1,
+        })
+        self.assertEqual(self._guardados(), counters.conteo_real())
+        self.assertEqual(counters.reconciliar(corregir=False), [])
+
+    def test_reconciliar_reporta_y_corrige_desfases(self):
+        Room.objects.create(numero='501', tipo_habitacion=self.estandar, piso=1)
+        RoomStatusCounter.objects.filter(estado='disponible').update(count=5)
+
+        salida = StringIO()
+        call_command('reconciliar_contadores', '--solo-reportar', stdout=salida)
+        self.assertIn('contador=5 real=1 (desfase +4)', salida.getvalue())
+        self.assertEqual(self._guardados(), {('disponible', self.estandar.pk, 1): 5})
+
+        call_command('reconciliar_contadores', stdout=StringIO())
+        self.assertEqual(self._guardados(), {('disponible', self.estandar.pk, 1): 1})
+
+class CambioEstadoMasivoTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='masivo', password='x', role='receptionist'))
+        self.tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.rooms = [Room.objects.create(numero=str(600 + i), tipo_habitacion=self.tipo, piso=6) for i in range(4)]
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def test_resultados_por_habitacion_y_contadores(self):
+        r1, r2, r3, r4 = self.rooms
+        cambios = [
+            {'id': r1.pk, 'estado': 'ocupada'},
+            {'id': r2.pk, 'estado': 'ocupada'},
+            {'id': r3.pk, 'estado': 'limpieza'},
+            {'id': 999999, 'estado': 'limpieza'},
+            {'id': r4.pk, 'estado': 'disponible'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/rooms/cambio-estado-masivo/', {'cambios': cambios}, format='json')
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['actualizadas'], 3)
+        resultados = {resultado['id']: resultado for resultado in respuesta.data['resultados']}
+        self.assertEqual(resultados[999999], {'id': 999999, 'error': 'Habitación no encontrada'})
+        self.assertEqual(resultados[r4.pk]['version'], r4.version)
+        self.assertEqual(resultados[r1.pk]['version'], r1.version + 1)
+
+        self.assertEqual(counters.reconciliar(corregir=False), [])
+        self.assertEqual(
+            dict(RoomStatusCounter.objects.filter(count__gt=0).values_list('estado', 'count')),
+            {'ocupada': 2, 'limpieza': 1, 'disponible': 1},
+        )
+        # Un registro de historial por habitación que cambió, ninguno para la que no
+        self.assertEqual(
+            sorted(RoomStatusHistory.objects.values_list('numero', 'estado_nuevo')),
+            [('600', 'ocupada'), ('601', 'ocupada'), ('602', 'limpieza')],
+        )
+        estadisticas = self.client.get('/api/rooms/dashboard_stats/').data
+        self.assertEqual(
+            (estadisticas['occupied_rooms'], estadisticas['cleaning_rooms'], estadisticas['available_rooms']),
+            (2, 1, 1),
+        )
+
+    def test_transicion_no_permitida_no_aplica_nada_a_esa_habitacion(self):
+        r1 = self.rooms[0]
+        Room.objects.filter(pk=r1.pk).update(estado='ocupada')
+        counters.reconciliar()
+        respuesta = self.client.post(
+            '/api/rooms/cambio-estado-masivo/', [{'id': r1.pk, 'estado': 'disponible'}], format='json'
+        )
+
+        self.assertEqual(respuesta.data['actualizadas'], 0)
+        self.assertEqual(respuesta.data['resultados'], [
+            {'id': r1.pk, 'error': 'No se puede pasar de ocupada a disponible'},
+        ])
+        self.assertEqual(counters.reconciliar(corregir=False), [])
+
+class HistorialEstadosTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='historial', password='x', role='receptionist'))
+        tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='701', tipo_habitacion=tipo)
+        self.otra = Room.objects.create(numero='702', tipo_habitacion=tipo)
+        self.base = timezone.now() - timedelta(days=1)
+
+    def _registrar(self, room, minutos):
+        return RoomStatusHistory.objects.create(
+            room=room, numero=room.numero, estado_anterior='disponible', estado_nuevo='ocupada',
+            registrado_por='historial', fecha_registro=self.base + timedelta(minutes=minutos),
+        )
+
+    def test_solo_insercion(self):
+        registro = self._registrar(self.room, 0)
+        registro.estado_nuevo = 'limpieza'
+        with self.assertRaises(ValueError):
+            registro.save()
+        with self.assertRaises(ValueError):
+            registro.delete()
+        self.assertEqual(RoomStatusHistory.objects.get(pk=registro.pk).estado_nuevo, 'ocupada')
+
+    def test_lote_no_escribe_si_el_bloque_falla(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic(), HistoryBatch('historial') as historial:
+                historial.agregar(self.room.pk, self.room.numero, 'disponible', 'ocupada')
+                raise RuntimeError
+        self.assertFalse(RoomStatusHistory.objects.exists())
+
+        with transaction.atomic(), HistoryBatch('historial') as historial:
+            historial.agregar(self.room.pk, self.room.numero, 'disponible', 'ocupada')
+            # Sin cambio real no hay registro
+            historial.agregar(self.otra.pk, self.otra.numero, 'disponible', 'disponible')
+        self.assertEqual(list(RoomStatusHistory.objects.values_list('numero', flat=True)), ['701'])
+
+    def test_paginacion_por_cursor(self):
+        # Dos registros con la misma fecha: el desempate es por id, también descendente
+        esperados = [self._registrar(self.room, minutos).pk for minutos in (0, 1, 2, 2, 3, 4, 5)][::-1]
+        self._registrar(self.otra, 3)
+
+        vistos = []
+        url, parametros = f'/api/rooms/{self.room.pk}/historial/', {'limite': 3}
+        while url:
+            respuesta = self.client.get(url, parametros)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertLessEqual(len(respuesta.data['results']), 3)
+            vistos.extend(registro['id'] for registro in respuesta.data['results'])
+            url, parametros = respuesta.data['next'], None
+        self.assertEqual(vistos, esperados)
+
+        respuesta = self.client.get(f'/api/rooms/{self.room.pk}/historial/', {
+            'desde': (self.base + timedelta(minutes=2)).isoformat(),
+            'hasta': (self.base + timedelta(minutes=4)).isoformat(),
+        })
+        self.assertEqual([registro['id'] for registro in respuesta.data['results']], esperados[2:5])
+
+        respuesta = self.client.get(f'/api/rooms/{self.room.pk}/historial/', {'desde': 'ayer'})
+        self.assertEqual(respuesta.status_code, 400)
+
+class SerializadorRapidoTests(TestCase):
+    """RoomFastSerializer produce el mismo JSON, byte por byte, que RoomSerializer."""
+
+    def setUp(self):
+        sin_descripcion = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        suite = RoomType.objects.create(
+            nombre='Suite ñandú', description='Jacuzzi "grande"', precio_base=Decimal('60000.5'),
+            precio_hora_adicional=Decimal('0.01'),
+        )
+        Room.objects.create(numero='2', tipo_habitacion=sin_descripcion)
+        Room.objects.create(
+            numero='10A', tipo_habitacion=suite, estado='mantenimiento', piso=3, notas='Ducha\nrota — revisar',
+            precio_base=Decimal('99999999.99'), precio_personalizado=True, descripcion='Vista al mar',
+            horas_base=12, cobro_adicional=False,
+        )
+        Room.objects.create(numero='011', tipo_habitacion=suite, estado='limpieza', precio_base=Decimal('0'))
+        self.queryset = Room.objects.select_related('tipo_habitacion').order_by('numero_orden')
+        self.renderer = JSONRenderer()
+
+    def test_json_identico(self):
+        lento = self.renderer.render(RoomSerializer(self.queryset, many=True).data)
+        rapido = self.renderer.render(RoomFastSerializer(RoomFastSerializer.values(self.queryset)).data)
+        self.assertEqual(rapido, lento)
+
+    def test_json_identico_con_seleccion_de_campos(self):
+        disponibles = tuple(RoomFastSerializer.field_columns)
+        for fields in ('id,numero', 'tipo_habitacion_detail,politica_horas,estado_display',
+                       'updated_at,is_available,precio_base'):
+            with self.subTest(fields=fields):
+                # Como en SparseFieldsMixin: la selección sale en el orden declarado
+                campos = resolver_campos({'fields': fields}, disponibles)
+                lento = RoomSerializer(self.queryset, many=True, context={'campos': campos}).data
+                rapido = RoomFastSerializer(RoomFastSerializer.values(self.queryset, campos), campos).data
+                self.assertEqual(self.renderer.render(rapido), self.renderer.render(lento))
+
+class CacheListadosTests(TestCase):
+    """La caché del listado de habitaciones se invalida con escrituras en cualquiera de sus tablas."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='cache', password='x', role='admin'))
+        self.tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='801', tipo_habitacion=self.tipo)
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def _listar(self):
+        antes = response_cache.metricas()
+        respuesta = self.client.get('/api/rooms/')
+        self.assertEqual(respuesta.status_code, 200)
+        despues = response_cache.metricas()
+        return respuesta.content, despues['aciertos'] - antes['aciertos'], despues['fallos'] - antes['fallos']
+
+    def test_editar_el_tipo_invalida_el_listado_de_habitaciones(self):
+        primero, aciertos, fallos = self._listar()
+        self.assertEqual((aciertos, fallos), (0, 1))
+        segundo, aciertos, fallos = self._listar()
+        self.assertEqual((aciertos, fallos), (1, 0))
+        self.assertEqual(segundo, primero)
+
+        respuesta = self.client.patch(f'/api/rooms/tipos/{self.tipo.pk}/', {'nombre': 'Estándar Plus'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+
+        tercero, aciertos, fallos = self._listar()
+        self.assertEqual((aciertos, fallos), (0, 1))
+        self.assertIn('"nombre":"Estándar Plus"', tercero.decode())
+
+    def test_escrituras_con_update_tambien_invalidan(self):
+        self._listar()
+        # cambio-estado-masivo escribe con queryset.update(), sin señales
+        respuesta = self.client.post(
+            '/api/rooms/cambio-estado-masivo/', [{'id': self.room.pk, 'estado': 'limpieza'}], format='json'
+        )
+        self.assertEqual(respuesta.data['actualizadas'], 1)
+
+        contenido, aciertos, fallos = self._listar()
+        self.assertEqual((aciertos, fallos), (0, 1))
+        self.assertIn('"estado":"limpieza"', contenido.decode())
+
+class PaginacionPorCursorTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='cursor', password='x', role='receptionist'))
+        tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        for numero in ('10', '2', 'B1', '1A', '02', '10A', '3', '100', '9'):
+            Room.objects.create(numero=numero, tipo_habitacion=tipo)
+        self.esperados = ['1A', '02', '2', '3', '9', '10', '10A', '100', 'B1']
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def test_paginas_en_orden_natural(self):
+        vistos, paginas = [], []
+        url, parametros = '/api/rooms/', {'limite': 2}
+        while url:
+            respuesta = self.client.get(url, parametros)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertNotIn('count', respuesta.data)
+            paginas.append(respuesta.data)
+            vistos.extend(room['numero'] for room in respuesta.data['results'])
+            url, parametros = respuesta.data['next'], None
+        self.assertEqual(vistos, self.esperados)
+
+        # Hacia atrás desde la última página se recorre el mismo orden
+        atras = []
+        url = paginas[-1]['previous']
+        while url:
+            respuesta = self.client.get(url)
+            atras[:0] = [room['numero'] for room in respuesta.data['results']]
+            url = respuesta.data['previous']
+        self.assertEqual(atras, self.esperados[:-1])
+
+    def test_page_conserva_la_paginacion_por_numero(self):
+        respuesta = self.client.get('/api/rooms/', {'page': 1})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['count'], len(self.esperados))
+        self.assertEqual([room['numero'] for room in respuesta.data['results']], self.esperados)
+
+class CamposDispersosTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='campos', password='x', role='receptionist'))
+        tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+        self.room = Room.objects.create(numero='901', tipo_habitacion=tipo)
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def test_seleccion_y_perfil(self):
+        respuesta = self.client.get('/api/rooms/', {'fields': 'numero,id'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['results'], [{'id': self.room.pk, 'numero': '901'}])
+
+        respuesta = self.client.get(f'/api/rooms/{self.room.pk}/', {'perfil': 'compacto', 'expand': 'politica_horas'})
+        self.assertEqual(respuesta.status_code, 200)
+        # En el orden declarado en RoomSerializer
+        self.assertEqual(list(respuesta.data), ['id', 'numero', 'tipo_habitacion', 'estado', 'politica_horas', 'piso'])
+
+    def test_campos_desconocidos_responden_400(self):
+        casos = (
+            ({'fields': 'numero,precio_secreto'}, 'fields'),
+            ({'perfil': 'completo'}, 'perfil'),
+            ({'fields': 'numero', 'expand': 'notas'}, 'expand'),
+        )
+        for url in ('/api/rooms/', f'/api/rooms/{self.room.pk}/'):
+            for parametros, campo in casos:
+                with self.subTest(url=url, parametros=parametros):
+                    respuesta = self.client.get(url, parametros)
+                    self.assertEqual(respuesta.status_code, 400)
+                    self.assertEqual(list(respuesta.data), [campo])
+        self.assertIn('precio_secreto', str(self.client.get('/api/rooms/', casos[0][0]).data['fields']))
+
+@override_settings(DASHBOARD_SNAPSHOT_TTL=60)
+class InstantaneaDashboardTests(TestCase):
+
+    def setUp(self):
+        self.tipo = RoomType.objects.create(nombre='Estándar', precio_base=Decimal('40000'))
+
+    def test_ttl(self):
+        calculos = []
+        instantanea = DashboardSnapshot(lambda: calculos.append(1) or len(calculos))
+        with mock.patch('rooms.dashboard.time.monotonic', return_value=1000.0) as reloj:
+            self.assertEqual(instantanea.obtener(), 1)
+            reloj.return_value = 1059.0
+            self.assertEqual(instantanea.obtener(), 1)
+            reloj.return_value = 1060.0
+            self.assertEqual(instantanea.obtener(), 2)
+        self.assertEqual((instantanea.aciertos, instantanea.recalculos), (1, 2))
+
+    def test_se_refresca_al_confirmar_una_vez_por_transaccion(self):
+        dashboard.refrescar()
+        self.assertEqual(dashboard.obtener()['total_rooms'], 0)
+
+        with mock.patch.object(dashboard, 'refrescar', wraps=dashboard.refrescar) as refrescar:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    Room.objects.create(numero='1001', tipo_habitacion=self.tipo)
+                    Room.objects.create(numero='1002', tipo_habitacion=self.tipo, estado='ocupada')
+                # Sin confirmar todavía, la instantánea vigente no cambia
+                self.assertEqual(dashboard.obtener()['total_rooms'], 0)
+        self.assertEqual(refrescar.call_count, 1)
+
+        datos = dashboard.obtener()
+        self.assertEqual((datos['total_rooms'], datos['occupied_rooms'], datos['occupancy_rate']), (2, 1, 50.0))
+
+    def test_vencimiento_concurrente_recalcula_una_vez(self):
+        liberar = threading.Event()
+        calculos = []
+
+        def calcular_lento():
+            calculos.append(1)
+            liberar.wait(5)
+            return len(calculos)
+
+        instantanea = DashboardSnapshot(calcular_lento)
+        resultados = []
+        hilos = [threading.Thread(target=lambda: resultados.append(instantanea.obtener())) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        # Da tiempo a que todos los hilos lleguen al lock antes de terminar el cálculo
+        time.sleep(0.2)
+        liberar.set()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(resultados, [1] * 8)
+        self.assertEqual((instantanea.recalculos, instantanea.esperas), (1, 7))
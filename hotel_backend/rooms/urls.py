@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RoomViewSet, RoomTypeViewSet
+from .views import RoomViewSet, RoomTypeViewSet, eventos_habitaciones
 
 # Router principal
 router = DefaultRouter()
@@ -8,6 +8,8 @@ router.register(r'tipos', RoomTypeViewSet, basename='tipos-habitacion')
 router.register(r'', RoomViewSet, basename='habitaciones')  # Registrar habitaciones en la raíz
 
 urlpatterns = [
+    # Stream de eventos (antes del router para no confundirse con /{id}/)
+    path('eventos/', eventos_habitaciones, name='habitaciones-eventos'),
     # Incluir todas las rutas del router
     path('', include(router.urls)),
 ]
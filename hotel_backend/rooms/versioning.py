@@ -0,0 +1,33 @@
+"""
+Versiones de las tablas de habitaciones para invalidar cachés entre workers.
+
+Cada escritura a Room o RoomType incrementa la versión de su tabla dentro de la
+misma transacción (señales para save/delete, llamada explícita en los caminos
+que usan ``update()``). Las lecturas consultan las versiones con una sola
+consulta por clave única antes de leer los datos, por lo que una entrada de caché
+nunca queda asociada a una versión más nueva que su contenido.
+"""
+from django.db.models import F
+
+from .models import Room, RoomType, TableVersion
+
+TABLAS = (Room._meta.label_lower, RoomType._meta.label_lower)
+
+
+def incrementar(*modelos):
+    """
+    Incrementa la versión de las tablas de los modelos indicados.
+    """
+    for modelo in modelos:
+        filas = TableVersion.objects.filter(tabla=modelo._meta.label_lower)
+        if not filas.update(version=F('version') + 1):
+            TableVersion.objects.bulk_create([TableVersion(tabla=modelo._meta.label_lower)], ignore_conflicts=True)
+            filas.update(version=F('version') + 1)
+
+
+def versiones(tablas=TABLAS):
+    """
+    Devuelve la tupla de versiones actuales de ``tablas`` (0 si aún no existe la fila).
+    """
+    actuales = dict(TableVersion.objects.filter(tabla__in=tablas).values_list('tabla', 'version'))
+    return tuple(actuales.get(tabla, 0) for tabla in tablas)
@@ -1,35 +1,93 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import JSONParser
+from asgiref.sync import sync_to_async
+import os
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from .models import Room, RoomType
-from .serializers import RoomSerializer, RoomTypeSerializer, RoomCreateSerializer, RoomTypeCreateSerializer, RoomStatusChangeSerializer
+from reservations.availability import availability_index
+from .models import Room, RoomType, RoomStatusHistory, VersionDesactualizada
+from .serializers import (
+    RoomSerializer, RoomTypeSerializer, RoomCreateSerializer, RoomTypeCreateSerializer,
+    RoomStatusChangeSerializer, RoomBulkStatusChangeSerializer, RoomStatusHistorySerializer,
+    RoomFastSerializer, RoomQuoteSerializer
+)
+from .events import room_events
+from .history import HistoryBatch
+from .pagination import HistorialCursorPagination, RoomCursorPagination
+from . import pricing
+from .bulk import importar_habitaciones
+from .dashboard import dashboard
+from .parsers import CSVParser
+from . import counters, estados, versioning
 from accounts.permissions import IsReceptionistOrHigher, IsAdminOrSuperAdmin
+from hotel_backend.fechas import parse_fecha
+from hotel_backend.idempotencia import idempotente
+from hotel_backend.mixins import CachedListMixin, ConditionalGetMixin, FastListMixin, SparseFieldsMixin
 
-class RoomTypeViewSet(viewsets.ModelViewSet):
+class RoomTypeViewSet(CachedListMixin, ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = RoomType.objects.all()
     serializer_class = RoomTypeSerializer
+    sparse_profiles = {'compacto': ('id', 'nombre', 'precio_base', 'precio_hora_adicional')}
     permission_classes = [IsAdminOrSuperAdmin]  # Solo Admin y Super Admin pueden gestionar tipos
     
+    def get_cache_version(self):
+        return versioning.versiones((RoomType._meta.label_lower,))
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return RoomTypeCreateSerializer
         return RoomTypeSerializer
+    
+    def update(self, request, *args, **kwargs):
+        """
+        Con ?propagar=true copia precios y descripción del tipo a sus habitaciones
+        sin precio personalizado, en la misma transacción que la edición del tipo
+        """
+        if request.query_params.get('propagar', '').lower() not in ('1', 'true', 'si', 'sí'):
+            return super().update(request, *args, **kwargs)
+        
+        with transaction.atomic():
+            response = super().update(request, *args, **kwargs)
+            # El tipo sale del objeto y no de response.data, cuyos campos dependen del serializer
+            tipo = self.get_object()
+            actualizadas = pricing.propagar_tarifas(tipo)
+        response.data['propagacion'] = {
+            'habitaciones_actualizadas': actualizadas,
+            'omitidas_por_precio_personalizado': Room.objects.filter(
+                tipo_habitacion=tipo, precio_personalizado=True
+            ).count()
+        }
+        return response
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(CachedListMixin, ConditionalGetMixin, SparseFieldsMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Room.objects.select_related('tipo_habitacion').all()
     serializer_class = RoomSerializer
+    fast_list_serializer_class = RoomFastSerializer
+    # Perfil para las tablets de recepción: sin el tipo anidado ni campos repetidos
+    sparse_profiles = {'compacto': ('id', 'numero', 'tipo_habitacion', 'estado', 'piso')}
+    sparse_expandable = ('tipo_habitacion_detail', 'politica_horas')
+    pagination_class = RoomCursorPagination
+    conditional_fields = ('updated_at', 'tipo_habitacion__updated_at')
     permission_classes = [IsReceptionistOrHigher]  # Recepcionistas y superiores pueden gestionar habitaciones
+    MAX_FILAS_BULK = 5000
     
     def get_permissions(self):
         """
         Permisos específicos por acción
         """
-        if self.action in ['create', 'destroy']:
-            # Solo Admin y Super Admin pueden crear/eliminar habitaciones
+        if self.action in ['create', 'destroy', 'bulk', 'cache_stats']:
+            # Solo Admin y Super Admin pueden crear/eliminar habitaciones y ver métricas de caché
             permission_classes = [IsAdminOrSuperAdmin]
-        elif self.action in ['update', 'partial_update', 'cambio_estado']:
+        elif self.action in ['update', 'partial_update', 'cambio_estado', 'cambio_estado_masivo']:
             # Recepcionistas y superiores pueden actualizar y cambiar estado
             permission_classes = [IsReceptionistOrHigher]
         else:
@@ -38,11 +96,17 @@ class RoomViewSet(viewsets.ModelViewSet):
         
         return [permission() for permission in permission_classes]
     
+    def get_cache_version(self):
+        # El listado anida el tipo de habitación: depende de ambas tablas
+        return versioning.versiones()
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return RoomCreateSerializer
         elif self.action == 'cambio_estado':
             return RoomStatusChangeSerializer
+        elif self.action == 'cambio_estado_masivo':
+            return RoomBulkStatusChangeSerializer
         return RoomSerializer
     
     def create(self, request, *args, **kwargs):
@@ -83,53 +147,77 @@ class RoomViewSet(viewsets.ModelViewSet):
         print(f"📤 Enviando respuesta personalizada")  # Debug temporal
         return Response(response_data, status=status.HTTP_201_CREATED)
     
-    @action(detail=False, methods=['get'], permission_classes=[IsReceptionistOrHigher])
-    def disponibles(self, request):
-        """
-        Endpoint para obtener solo habitaciones disponibles
-        """
-        available_rooms = self.queryset.filter(estado='disponible')
-        serializer = self.get_serializer(available_rooms, many=True)
-        return Response(serializer.data)
-
+    def perform_update(self, serializer):
+        estado_anterior = serializer.instance.estado
+        try:
+            with transaction.atomic(), HistoryBatch(self.request.user.username) as historial:
+                room = serializer.save()
+                historial.agregar(room.id, room.numero, estado_anterior, room.estado)
+        except VersionDesactualizada as error:
+            raise estados.ConflictoVersion(estados.estado_actual(error.room_id))
+    
     @action(detail=False, methods=['get'], permission_classes=[IsReceptionistOrHigher])
     def dashboard_stats(self, request):
         """
         Endpoint para obtener estadísticas del dashboard
         """
-        # Contar habitaciones por estado
-        stats = Room.objects.values('estado').annotate(count=Count('estado'))
-        status_counts = {item['estado']: item['count'] for item in stats}
-        
-        # Contar por tipo de habitación
-        type_stats = Room.objects.values('tipo_habitacion__nombre').annotate(count=Count('tipo_habitacion'))
-        type_counts = {item['tipo_habitacion__nombre']: item['count'] for item in type_stats}
-        
-        # Totales
-        total_rooms = Room.objects.count()
-        available_rooms = status_counts.get('disponible', 0)
-        occupied_rooms = status_counts.get('ocupada', 0)
-        cleaning_rooms = status_counts.get('limpieza', 0)
-        
-        # Tasa de ocupación
-        occupancy_rate = (occupied_rooms / total_rooms * 100) if total_rooms > 0 else 0
+        # Instantánea del proceso: una consulta de agregación por escritura o vencimiento
+        return Response(dashboard.obtener())
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminOrSuperAdmin],
+            parser_classes=[JSONParser, CSVParser])
+    def bulk(self, request):
+        """
+        Carga masiva de habitaciones (JSON o CSV con encabezado)
+        URL: /api/rooms/bulk/
+        Body JSON: [{"numero": "101", "tipo_habitacion": "Suite", "piso": 1}, ...]
+                   o {"habitaciones": [...]}
+        Body CSV (Content-Type: text/csv): numero,tipo_habitacion,estado,piso,notas
+        """
+        filas = request.data.get('habitaciones') if isinstance(request.data, dict) else request.data
+        if not isinstance(filas, list) or not filas:
+            return Response({
+                'success': False,
+                'error': 'Se esperaba una lista de habitaciones'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(filas) > self.MAX_FILAS_BULK:
+            return Response({
+                'success': False,
+                'error': f'Máximo {self.MAX_FILAS_BULK} habitaciones por solicitud; use import_rooms para cargas mayores'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
+        resultado = importar_habitaciones(filas)
+        creadas, errores = resultado['creadas'], resultado['errores']
         return Response({
-            'total_rooms': total_rooms,
-            'available_rooms': available_rooms,
-            'occupied_rooms': occupied_rooms,
-            'cleaning_rooms': cleaning_rooms,
-            'occupancy_rate': round(occupancy_rate, 2),
-            'status_breakdown': status_counts,
-            'type_breakdown': type_counts
+            'success': not errores,
+            'message': f'{len(creadas)} habitaciones creadas, {len(errores)} filas con errores',
+            'creadas': len(creadas),
+            'habitaciones': creadas,
+            'errores': errores
+        }, status=status.HTTP_201_CREATED if creadas else status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminOrSuperAdmin], url_path='cache-stats')
+    def cache_stats(self, request):
+        """
+        Métricas de la caché de listados de este worker
+        URL: /api/rooms/cache-stats/
+        """
+        return Response({
+            'pid': os.getpid(),
+            'versiones': dict(zip(versioning.TABLAS, versioning.versiones())),
+            **self.response_cache.metricas(),
+            'dashboard': dashboard.metricas()
         })
     
     @action(detail=True, methods=['post'], permission_classes=[IsReceptionistOrHigher], url_path='cambio-estado')
+    @idempotente
     def cambio_estado(self, request, pk=None):
         """
         Endpoint para cambiar el estado de una habitación
         URL: /api/rooms/{id}/cambio-estado/
-        Body: {"estado": "ocupada"}
+        Body: {"estado": "ocupada", "version": 3}  (version opcional: la leída por el cliente)
+        Transiciones permitidas en Room.TRANSICIONES; si la habitación cambió
+        desde la versión leída responde 409 sin aplicar el cambio.
         """
         room = self.get_object()
         serializer = RoomStatusChangeSerializer(data=request.data)
@@ -139,20 +227,14 @@ class RoomViewSet(viewsets.ModelViewSet):
             new_status = serializer.validated_data['estado']
             registrado_por = request.user.username  # Del token JWT
             fecha_registro = timezone.now()  # Fecha actual
-            estado_anterior = room.estado  # Para el log
             
-            # Cambiar el estado
-            room.estado = new_status
-            room.save()
-            
-            # Aquí podrías registrar el historial de cambios en una tabla separada
-            # RoomStatusHistory.objects.create(
-            #     room=room,
-            #     estado_anterior=estado_anterior,
-            #     estado_nuevo=new_status,
-            #     registrado_por=registrado_por,
-            #     fecha_registro=fecha_registro
-            # )
+            # UPDATE condicional por versión; historial y contadores en la misma transacción
+            estado_anterior, fila = estados.cambiar_estado(
+                room, new_status, registrado_por, fecha_registro,
+                version=serializer.validated_data.get('version')
+            )
+            if fila is not None:
+                room.estado, room.version = fila['estado'], fila['version']
             
             return Response({
                 'success': True,
@@ -168,6 +250,7 @@ class RoomViewSet(viewsets.ModelViewSet):
                     'id': room.id,
                     'numero': room.numero,
                     'estado': room.estado,
+                    'version': room.version,
                     'disponible': room.is_available,
                     'tipo_habitacion': {
                         'id': room.tipo_habitacion.id,
@@ -185,11 +268,219 @@ class RoomViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], permission_classes=[IsReceptionistOrHigher], url_path='cambio-estado-masivo')
+    def cambio_estado_masivo(self, request):
+        """
+        Endpoint para cambiar el estado de varias habitaciones a la vez
+        URL: /api/rooms/cambio-estado-masivo/
+        Body: {"cambios": [{"id": 1, "estado": "disponible"}, {"id": 2, "estado": "limpieza"}]}
+        """
+        data = {'cambios': request.data} if isinstance(request.data, list) else request.data
+        serializer = RoomBulkStatusChangeSerializer(data=data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        cambios = serializer.validated_data['cambios']
+        registrado_por = request.user.username
+        fecha_registro = timezone.now()
+        
+        with transaction.atomic(), HistoryBatch(registrado_por, fecha_registro) as historial:
+            actuales = {
+                room['id']: room
+                for room in Room.objects.select_for_update().filter(
+                    id__in=[cambio['id'] for cambio in cambios]
+                ).values('id', 'numero', 'estado', 'version', 'tipo_habitacion_id', 'piso')
+            }
+            
+            por_estado = defaultdict(list)
+            deltas = Counter()
+            resultados = []
+            for cambio in cambios:
+                room = actuales.get(cambio['id'])
+                if room is None:
+                    resultados.append({'id': cambio['id'], 'error': 'Habitación no encontrada'})
+                    continue
+                
+                estado_anterior = room['estado']
+                new_status = cambio['estado']
+                if cambio.get('version') not in (None, room['version']):
+                    resultados.append({
+                        'id': room['id'],
+                        'error': 'La habitación fue modificada por otra solicitud',
+                        'version': room['version']
+                    })
+                    continue
+                if not Room.transicion_permitida(estado_anterior, new_status):
+                    resultados.append({
+                        'id': room['id'],
+                        'error': f'No se puede pasar de {estado_anterior} a {new_status}'
+                    })
+                    continue
+                if estado_anterior != new_status:
+                    por_estado[new_status].append(room['id'])
+                    deltas[(estado_anterior, room['tipo_habitacion_id'], room['piso'])] -= 1
+                    deltas[(new_status, room['tipo_habitacion_id'], room['piso'])] += 1
+                    historial.agregar(room['id'], room['numero'], estado_anterior, new_status)
+                
+                resultados.append({
+                    'id': room['id'],
+                    'numero': room['numero'],
+                    'estado_anterior': estado_anterior,
+                    'estado_nuevo': new_status,
+                    'version': room['version'] + (estado_anterior != new_status)
+                })
+            
+            # Un solo UPDATE por estado destino
+            for new_status, ids in por_estado.items():
+                Room.objects.filter(id__in=ids).update(
+                    estado=new_status, version=F('version') + 1, updated_at=fecha_registro
+                )
+            counters.ajustar(deltas)
+            if por_estado:
+                versioning.incrementar(Room)
+            transaction.on_commit(room_events.notificar)
+        
+        actualizadas = sum(len(ids) for ids in por_estado.values())
+        return Response({
+            'success': True,
+            'message': f'{actualizadas} habitaciones cambiaron de estado',
+            'registrado_por': registrado_por,
+            'fecha_cambio': fecha_registro,
+            'actualizadas': actualizadas,
+            'resultados': resultados
+        })
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsReceptionistOrHigher])
+    def cotizar(self, request):
+        """
+        Cotización en lote de estadías
+        URL: /api/rooms/cotizar/
+        Body: {"habitaciones": [1, 2, 1], "horas": [3, 5, 12]}
+        """
+        serializer = RoomQuoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        habitaciones = serializer.validated_data['habitaciones']
+        horas = serializer.validated_data['horas']
+        totales = pricing.cotizar_centavos(habitaciones, horas)
+        
+        no_encontradas = sorted({room_id for room_id, total in zip(habitaciones, totales) if total is None})
+        total_general = sum(total for total in totales if total is not None)
+        return Response({
+            'success': True,
+            'cantidad': len(totales),
+            'totales': [None if total is None else str(pricing.centavos_a_decimal(total)) for total in totales],
+            'total_general': str(pricing.centavos_a_decimal(total_general)),
+            'no_encontradas': no_encontradas
+        })
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsReceptionistOrHigher])
+    def historial(self, request, pk=None):
+        """
+        Historial de cambios de estado de una habitación, paginado por cursor
+        URL: /api/rooms/{id}/historial/?desde=2025-01-01&hasta=2025-02-01&cursor=...
+        """
+        room = self.get_object()
+        historial = RoomStatusHistory.objects.filter(room=room)
+        
+        for parametro, lookup in (('desde', 'fecha_registro__gte'), ('hasta', 'fecha_registro__lt')):
+            valor = request.query_params.get(parametro)
+            if valor:
+                fecha = parse_fecha(valor)
+                if fecha is None:
+                    return Response({'error': f'El parámetro {parametro} debe ser una fecha ISO 8601 válida'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                historial = historial.filter(**{lookup: fecha})
+        
+        paginator = HistorialCursorPagination()
+        page = paginator.paginate_queryset(historial, request, view=self)
+        serializer = RoomStatusHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
     @action(detail=False, methods=['get'], permission_classes=[IsReceptionistOrHigher])
     def disponibles(self, request):
         """
         Endpoint para obtener solo habitaciones disponibles
+        URL: /api/rooms/disponibles/
+        Con ventana de tiempo: /api/rooms/disponibles/?desde=2025-09-01T22:00&hasta=2025-09-02T01:00&tipo=1
         """
-        available_rooms = self.queryset.filter(estado='disponible')
+        desde = request.query_params.get('desde')
+        hasta = request.query_params.get('hasta')
+
+        if not desde and not hasta:
+            available_rooms = self.queryset.filter(estado='disponible')
+            serializer = self.get_serializer(available_rooms, many=True)
+            return Response(serializer.data)
+
+        desde = parse_fecha(desde)
+        hasta = parse_fecha(hasta)
+        if desde is None or hasta is None:
+            return Response({'error': 'Los parámetros desde y hasta deben ser fechas ISO 8601 válidas'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if desde >= hasta:
+            return Response({'error': 'El parámetro desde debe ser anterior a hasta'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Las habitaciones en mantenimiento no se ofrecen en ninguna ventana
+        rooms = self.queryset.exclude(estado='mantenimiento')
+        tipo = request.query_params.get('tipo')
+        if tipo:
+            if tipo.isdigit():
+                rooms = rooms.filter(tipo_habitacion_id=tipo)
+            else:
+                rooms = rooms.filter(tipo_habitacion__nombre__iexact=tipo)
+        rooms = list(rooms)
+
+        availability_index.sincronizar()
+        libres = set(availability_index.habitaciones_libres([room.id for room in rooms], desde, hasta))
+        available_rooms = [room for room in rooms if room.id in libres]
+
         serializer = self.get_serializer(available_rooms, many=True)
         return Response(serializer.data)
+
+
+def _autenticar_stream(request):
+    """
+    Autentica una conexión de eventos con las clases de autenticación de DRF.
+    EventSource no permite cabeceras, así que el JWT también se acepta en ?token=
+    """
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        request.META['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        return IsReceptionistOrHigher().has_permission(drf_request, None)
+    except APIException:
+        return False
+
+
+async def eventos_habitaciones(request):
+    """
+    Stream (server-sent events) de cambios de habitaciones
+    URL: /api/rooms/eventos/   (reanudación con la cabecera Last-Event-ID)
+    Cada evento: {"id": 1, "numero": "101", "estado": "ocupada", "updated_at": "..."}
+    """
+    if not isinstance(request, ASGIRequest):
+        # Bajo WSGI Django acumula el iterador asíncrono en una lista antes de
+        # responder: el cliente nunca recibiría eventos y el worker quedaría tomado
+        return JsonResponse({'detail': 'El stream de eventos requiere servir la aplicación por ASGI.'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if not await sync_to_async(_autenticar_stream)(request):
+        return JsonResponse({'detail': 'Las credenciales de autenticación no se proveyeron o no son válidas.'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+    
+    ultimo_id = request.headers.get('Last-Event-ID') or request.GET.get('ultimo_evento')
+    response = StreamingHttpResponse(room_events.stream(ultimo_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
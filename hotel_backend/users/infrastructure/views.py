@@ -11,6 +11,7 @@ from django.views.decorators.csrf import csrf_exempt
 from accounts.models import User
 from accounts.serializers import UserSerializer, UserCreateSerializer, LoginSerializer
 from accounts.permissions import IsSuperAdmin, IsAdminOrSuperAdmin, CanManageUsers
+from hotel_backend.idempotencia import idempotente
 
 from ..application.services import (
     UserManagementService, 
@@ -34,6 +35,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         """Obtener usuarios según permisos usando servicio de dominio"""
         return UserManagementService.get_users_by_role(self.request.user)
     
+    @idempotente
     def create(self, request, *args, **kwargs):
         """Crear usuario usando servicio de dominio"""
         success, message, user = UserManagementService.create_user(
@@ -83,6 +85,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['post'], permission_classes=[IsAdminOrSuperAdmin])
+    @idempotente
     def create_receptionist(self, request):
         """Crear recepcionista"""
         data = request.data.copy()